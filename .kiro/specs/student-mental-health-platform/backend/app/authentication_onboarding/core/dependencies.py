@@ -32,7 +32,15 @@ async def get_current_user(
     The role is used to select the correct Beanie Document class for lookup,
     avoiding cross-collection scanning.
     """
-    token = credentials.credentials
+    return await authenticate_access_token(credentials.credentials)
+
+
+async def authenticate_access_token(token: str):
+    """
+    The active user for an access token, or HTTPException (401 / 403).
+    get_current_user for HTTP; the conversations WebSocket gateway calls it
+    once per socket.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials.",
@@ -38,6 +38,16 @@ class Settings(BaseSettings):
     ENCRYPTION_MASTER_KEY: str = ""
     GEMINI_API_KEY: str = ""
 
+    # ── Conversations ──
+    MESSAGE_DECRYPT_WORKERS: int = 4   # threads decrypting message pages
+    MESSAGE_DECRYPT_CHUNK: int = 32    # messages per decrypt task
+    NOTIFIER_BROKER: str = "local"     # "local" (single process) | "mongo" (change streams)
+    NOTIFIER_EVENT_TTL_SECONDS: int = 3600
+    NOTIFIER_REPLAY_BUFFER: int = 256          # events kept per conversation for Last-Event-ID
+    NOTIFIER_REPLAY_GRACE_SECONDS: int = 120   # keep buffering after the last subscriber leaves
+    SSE_HEARTBEAT_SECONDS: int = 15
+    WS_AUTH_TIMEOUT_SECONDS: int = 10          # first-frame deadline on /conversations/ws
+
     # ── Database Credentials (Optional override) ──
     MONGODB_USER: str = ""
     MONGODB_PASSWORD: str = ""
@@ -0,0 +1,151 @@
+"""
+Conversation actions shared by the HTTP endpoints (router.py) and the
+WebSocket gateway (gateway.py).
+
+Callers load the conversation and pass it through verify_conversation_access
+first; these functions do the writes and broadcast the resulting events.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.authentication_onboarding.models.user import AnyUser, Role
+from app.data_storage_and_encryption.encryption_utils import encrypt_field
+
+from . import read_marks
+from .message_reads import format_datetime
+from .models.conversation import ConversationStatus
+from .models.message import Message, SenderType
+from .notifier import notifier
+from .schemas import MessageRead
+
+
+async def load_conversation(db, id: str) -> dict:
+    """The conversation document; 400 for a malformed id, 404 if missing."""
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid conversation ID")
+    conversation = await db.conversations.find_one({"_id": ObjectId(id)})
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+
+async def post_message(db, conversation: dict, current_user: AnyUser, content: str, metadata: dict) -> MessageRead:
+    if conversation["status"] != ConversationStatus.OPEN.value:
+        raise HTTPException(status_code=400, detail="Conversation is closed")
+    conv_id = conversation["_id"]
+
+    # Explicit mapping for sender types
+    role_to_sender = {
+        Role.STUDENT: SenderType.STUDENT,
+        Role.COUNSELOR: SenderType.COUNSELOR,
+        Role.ADMIN: SenderType.COUNSELOR # Or add ADMIN to SenderType
+    }
+    sender_type = role_to_sender.get(current_user.role, SenderType.COUNSELOR)
+
+    message = Message.create_encrypted(
+        content=content,
+        conversation_id=conv_id,
+        sender_id=current_user.id,
+        sender_type=sender_type,
+        metadata=metadata
+    )
+
+    msg_dict = message.model_dump(by_alias=True, exclude={"id", "read_by"})
+    result = await db.messages.insert_one(msg_dict)
+
+    # Update conversation last message timestamp. The sender's watermark is
+    # left alone: own messages always count as read (read_marks.py)
+    await db.conversations.update_one(
+        {"_id": conv_id},
+        {"$set": {"last_message_at": msg_dict["created_at"]}}
+    )
+
+    # Broadcast the new message for streaming
+    msg_read = MessageRead(
+        id=str(result.inserted_id),
+        sender_id=str(current_user.id),
+        sender_type=sender_type,
+        content=content,
+        metadata=metadata,
+        created_at=message.created_at
+    )
+    await notifier.broadcast(str(conv_id), msg_read.model_dump(mode="json"))
+    return msg_read
+
+
+async def edit_message(db, id: str, message_id: str, current_user: AnyUser, content: str) -> MessageRead:
+    """Edit an existing message. Only the sender can edit their messages."""
+    if not ObjectId.is_valid(id) or not ObjectId.is_valid(message_id):
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+
+    msg_id = ObjectId(message_id)
+    conv_id = ObjectId(id)
+
+    message_raw = await db.messages.find_one({"_id": msg_id, "conversation_id": conv_id})
+    if not message_raw:
+        raise HTTPException(status_code=404, detail="Message not found")
+
+    # Only the original sender (non-AI) can edit their message
+    if str(message_raw.get("sender_id")) != str(current_user.id):
+        raise HTTPException(status_code=403, detail="You can only edit your own messages.")
+
+    # Encrypt new content
+    encrypted = encrypt_field(content)
+
+    await db.messages.update_one(
+        {"_id": msg_id},
+        {"$set": {
+            "encrypted_content": encrypted,
+            "updated_at": datetime.now(timezone.utc)
+        }}
+    )
+
+    # Broadcast the edit for streaming
+    # Use existing message_raw instead of extra DB read for metadata/sender_type
+    msg_read = MessageRead(
+        id=str(msg_id),
+        sender_id=str(current_user.id),
+        sender_type=message_raw["sender_type"],
+        content=content,
+        metadata=message_raw.get("metadata", {}),
+        created_at=message_raw["created_at"]
+    )
+    await notifier.broadcast(str(conv_id), {"type": "edit", "message": msg_read.model_dump(mode="json")})
+    return msg_read
+
+
+async def mark_read(db, conversation: dict, current_user: AnyUser) -> Optional[dict]:
+    """
+    Mark all messages in a conversation as read by the current user by moving
+    their watermark (read_marks.py) to the newest message. Returns the read
+    receipt that was broadcast, or None for an empty conversation.
+    """
+    conv_id = conversation["_id"]
+
+    latest = await db.messages.find_one(
+        {"conversation_id": conv_id, "is_deleted": False},
+        projection={"created_at": 1},
+        sort=[("created_at", -1), ("_id", -1)]
+    )
+    if latest is None:
+        return None
+
+    # One document update however long the conversation; never moves the mark back
+    await db.conversations.update_one(
+        {"_id": conv_id, **read_marks.behind_mark_filter(current_user.id, latest)},
+        {"$set": read_marks.mark_fields(current_user.id, latest)}
+    )
+
+    # Broadcast a read receipt
+    receipt = {
+        "type": "read",
+        "user_id": str(current_user.id),
+        "last_read_message_id": str(latest["_id"]),
+        "last_read_at": format_datetime(latest["created_at"]),
+    }
+    await notifier.broadcast(str(conv_id), receipt)
+    return receipt
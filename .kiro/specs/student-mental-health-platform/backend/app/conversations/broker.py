@@ -0,0 +1,205 @@
+"""
+Pub/sub backends for the conversation notifier (notifier.py).
+
+A broker carries conversation events between API processes. Each process
+holds at most one upstream subscription per conversation that has local
+SSE subscribers; the notifier fans events out to its queues from there.
+publish() gives every event the next id in its conversation's sequence,
+the same on every process, so SSE clients can resume with Last-Event-ID
+on any worker that buffered the events.
+
+Selected with the NOTIFIER_BROKER setting:
+
+- "local" (default): in-process delivery. Brokers sharing a LocalHub see
+  each other's events, which is how tests stand in for several workers.
+- "mongo": events are inserted into the conversation_events collection
+  and each subscription is a MongoDB change stream on it, so every
+  uvicorn worker and host receives every event. Event ids come from a
+  per-conversation counter in conversation_event_seq, incremented in the
+  same transaction as the insert, so events reach every stream in id
+  order. A stream starts from the moment subscribe() was called (a
+  second early, to absorb clock skew) rather than when it opens, so
+  nothing published in between is missed. Requires a replica set
+  (MongoDB Atlas always is one); events expire after
+  NOTIFIER_EVENT_TTL_SECONDS.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Set
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# deliver(conversation_id, event_id, message) — called on the event loop for every event
+Deliver = Callable[[str, int, dict], None]
+
+
+class Broker:
+    """Interface used by MessageNotifier."""
+
+    name = "base"
+
+    def subscribe(self, conversation_id: str, deliver: Deliver):
+        """Start receiving events for a conversation. Called once per conversation."""
+        raise NotImplementedError
+
+    def unsubscribe(self, conversation_id: str):
+        """Drop the upstream subscription once no local subscriber is left."""
+        raise NotImplementedError
+
+    async def publish(self, conversation_id: str, message: dict) -> int:
+        """Send an event to every subscribed process; returns its id."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+# ===============================
+# LOCAL
+# ===============================
+
+class LocalHub:
+    """The 'network' between LocalBrokers: one per process by default."""
+
+    def __init__(self):
+        self.brokers: Set["LocalBroker"] = set()
+        self.sequences: Dict[str, int] = {}
+
+
+class LocalBroker(Broker):
+    name = "local"
+
+    def __init__(self, hub: Optional[LocalHub] = None):
+        self.hub = hub if hub is not None else LocalHub()
+        self.hub.brokers.add(self)
+        self.topics: Dict[str, Deliver] = {}
+
+    def subscribe(self, conversation_id: str, deliver: Deliver):
+        self.topics[conversation_id] = deliver
+
+    def unsubscribe(self, conversation_id: str):
+        self.topics.pop(conversation_id, None)
+
+    async def publish(self, conversation_id: str, message: dict) -> int:
+        event_id = self.hub.sequences.get(conversation_id, 0) + 1
+        self.hub.sequences[conversation_id] = event_id
+        for broker in list(self.hub.brokers):
+            deliver = broker.topics.get(conversation_id)
+            if deliver is not None:
+                deliver(conversation_id, event_id, message)
+        return event_id
+
+    async def close(self):
+        self.topics.clear()
+        self.hub.brokers.discard(self)
+
+
+# ===============================
+# MONGO CHANGE STREAMS
+# ===============================
+
+class MongoBroker(Broker):
+    name = "mongo"
+    retry_seconds = 1.0
+    # Streams start this long before subscribe(): the app and cluster clocks may differ
+    start_margin_seconds = 1
+
+    def __init__(self, collection_name: str = "conversation_events"):
+        self.collection_name = collection_name
+        self.watchers: Dict[str, asyncio.Task] = {}
+        self._indexed = False
+
+    def _collection(self, name: Optional[str] = None):
+        from app import database
+        if database.client is None:
+            raise RuntimeError("Database client not initialized. Ensure connect_db() was called.")
+        return database.client[settings.MONGODB_DB_NAME][name or self.collection_name]
+
+    async def _ensure_indexes(self):
+        if not self._indexed:
+            await self._collection().create_index(
+                "created_at", expireAfterSeconds=settings.NOTIFIER_EVENT_TTL_SECONDS, name="event_ttl"
+            )
+            self._indexed = True
+
+    def subscribe(self, conversation_id: str, deliver: Deliver):
+        from bson import Timestamp
+
+        if conversation_id not in self.watchers:
+            # The stream opens later, in the task: start it from now so no event falls in between
+            start_at = Timestamp(int(time.time()) - self.start_margin_seconds, 0)
+            self.watchers[conversation_id] = asyncio.create_task(self._watch(conversation_id, deliver, start_at))
+
+    def unsubscribe(self, conversation_id: str):
+        task = self.watchers.pop(conversation_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def _watch(self, conversation_id: str, deliver: Deliver, start_at):
+        pipeline = [{"$match": {"operationType": "insert", "fullDocument.conversation_id": conversation_id}}]
+        resume_after, last_event_id = None, 0
+        while True:
+            try:
+                # Until a token is seen (even if the first open failed), start from subscribe time
+                stream = self._collection().watch(
+                    pipeline, resume_after=resume_after,
+                    start_at_operation_time=None if resume_after else start_at
+                )
+                async with stream:
+                    async for change in stream:
+                        resume_after = stream.resume_token
+                        event = change["fullDocument"]
+                        # Reopening from start_at can repeat events already delivered
+                        if event["event_id"] > last_event_id:
+                            last_event_id = event["event_id"]
+                            deliver(conversation_id, event["event_id"], event["message"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Stream errors (failover, network) resume from the last token seen
+                logger.warning(f"[notifier] change stream for {conversation_id} failed: {e}; retrying")
+                await asyncio.sleep(self.retry_seconds)
+
+    async def publish(self, conversation_id: str, message: dict) -> int:
+        from pymongo import ReturnDocument
+
+        await self._ensure_indexes()
+
+        async def append(session) -> int:
+            # The counter document stays locked until commit, so a concurrent
+            # publisher's insert commits (and streams) after this one
+            sequence = await self._collection("conversation_event_seq").find_one_and_update(
+                {"_id": conversation_id}, {"$inc": {"seq": 1}}, upsert=True,
+                return_document=ReturnDocument.AFTER, session=session
+            )
+            await self._collection().insert_one({
+                "conversation_id": conversation_id,
+                "event_id": sequence["seq"],
+                "message": message,
+                "created_at": datetime.now(timezone.utc),
+            }, session=session)
+            return sequence["seq"]
+
+        async with await self._collection().database.client.start_session() as session:
+            return await session.with_transaction(append)
+
+    async def close(self):
+        tasks = list(self.watchers.values())
+        self.watchers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+BACKENDS = {"local": LocalBroker, "mongo": MongoBroker}
+
+
+def create_broker() -> Broker:
+    if settings.NOTIFIER_BROKER not in BACKENDS:
+        raise ValueError(f"NOTIFIER_BROKER must be one of {sorted(BACKENDS)}, got {settings.NOTIFIER_BROKER!r}")
+    return BACKENDS[settings.NOTIFIER_BROKER]()
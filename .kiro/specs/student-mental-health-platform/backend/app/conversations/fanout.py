@@ -0,0 +1,101 @@
+"""
+Per-subscriber event buffers for the conversation notifier.
+
+A Subscriber replaces the plain asyncio.Queue each SSE stream / WebSocket
+subscription used to get, and applies the fan-out policy:
+
+- Idempotent events are coalesced in place of being queued again: a newer
+  `read` receipt from the same user, or a newer `edit` of the same message,
+  replaces the pending one (and moves to the back, so ids stay ascending).
+- Overflow never silently drops the subscriber. The pending events are
+  discarded and the consumer's next get() returns RESYNC, telling the
+  client to re-fetch history; delivery then continues with newer events.
+- Lag (pending events), coalesced and dropped counts are kept per
+  subscriber for GET /conversations/metrics.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+# Returned by Subscriber.get() after an overflow
+RESYNC = object()
+
+
+def coalesce_key(message: dict) -> Optional[tuple]:
+    """Key under which a newer event supersedes a pending one, or None."""
+    kind = message.get("type")
+    if kind == "read":
+        return ("read", message.get("user_id"))
+    if kind == "edit":
+        return ("edit", (message.get("message") or {}).get("id"))
+    return None
+
+
+class Subscriber:
+    """Single-consumer buffer of (event_id, message) pairs, bounded at max_size."""
+
+    def __init__(self, conversation_id: str, max_size: int):
+        self.conversation_id = conversation_id
+        self.max_size = max_size
+        self._events: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._resync = False
+        self._waiter: Optional[asyncio.Future] = None
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self.max_lag = 0
+
+    def put(self, event_id: int, message: dict):
+        key = coalesce_key(message)
+        if key is not None and key in self._events:
+            del self._events[key]
+            self.coalesced += 1
+        elif len(self._events) >= self.max_size:
+            self.dropped += len(self._events)
+            self.resyncs += 1
+            self._events.clear()
+            self._resync = True
+        self._events[key if key is not None else ("event", event_id)] = (event_id, message)
+        self.max_lag = max(self.max_lag, len(self._events))
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def get_nowait(self):
+        """The next (event_id, message), or RESYNC; raises asyncio.QueueEmpty."""
+        if self._resync:
+            self._resync = False
+            return RESYNC
+        if not self._events:
+            raise asyncio.QueueEmpty
+        self.delivered += 1
+        return self._events.popitem(last=False)[1]
+
+    async def get(self):
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                self._waiter = asyncio.get_running_loop().create_future()
+                try:
+                    await self._waiter
+                finally:
+                    self._waiter = None
+
+    def qsize(self) -> int:
+        return len(self._events)
+
+    def empty(self) -> bool:
+        return not self._events and not self._resync
+
+    def stats(self) -> dict:
+        return {
+            "conversation_id": self.conversation_id,
+            "lag": len(self._events),
+            "max_lag": self.max_lag,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+        }
@@ -0,0 +1,197 @@
+"""
+Multiplexed WebSocket gateway for conversations (/conversations/ws).
+
+One socket carries any number of conversations: it authenticates once,
+subscribes to conversations through the notifier and accepts send / edit /
+read actions as frames. Actions go through the same access check and code
+(actions.py) as the HTTP endpoints.
+
+Client frames (JSON; `ref` is optional and echoed in the reply):
+    {"type": "auth", "token": "<access token>"}              first frame
+    {"type": "subscribe", "conversation_id": "...", "last_event_id": 12}
+    {"type": "unsubscribe", "conversation_id": "..."}
+    {"type": "send", "conversation_id": "...", "content": "...", "metadata": {}}
+    {"type": "edit", "conversation_id": "...", "message_id": "...", "content": "..."}
+    {"type": "read", "conversation_id": "..."}
+
+Server frames:
+    {"type": "ready", "user_id": "..."}
+    {"type": "event", "conversation_id": "...", "id": 13, "data": {...}}   as the SSE stream
+    {"type": "resync", "conversation_id": "..."}     missed or dropped events; re-fetch history
+    {"type": "ack", "ref": ..., "action": "send", "result": {...}}
+    {"type": "error", "ref": ..., "status": 403, "detail": "..."}
+
+Conversation documents are cached for as long as the socket is subscribed
+to them (close events keep the cached status current); other actions load
+and check the conversation each time.
+"""
+
+import asyncio
+import json
+from typing import Dict, Optional
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+
+from app.authentication_onboarding.core.dependencies import authenticate_access_token
+from app.config import settings
+
+from . import actions
+from .access_control import verify_conversation_access
+from .models.conversation import ConversationStatus
+from .fanout import RESYNC
+from .notifier import notifier
+from .schemas import MessageCreate, MessageUpdate
+
+
+class ConversationSocket:
+    def __init__(self, websocket: WebSocket, db, user):
+        self.websocket = websocket
+        self.db = db
+        self.user = user
+        # Subscribed conversation id -> cached conversation document
+        self.conversations: Dict[str, dict] = {}
+        self.pumps: Dict[str, asyncio.Task] = {}
+        # Bounded: a slow socket backs up into the per-conversation Subscriber
+        # buffers, where coalescing and overflow resyncs apply
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=notifier.max_queue_size)
+
+    async def run(self):
+        writer = asyncio.create_task(self._write())
+        try:
+            await self.outbox.put({"type": "ready", "user_id": str(self.user.id)})
+            while True:
+                text = await self.websocket.receive_text()
+                try:
+                    frame = json.loads(text)
+                except ValueError:
+                    frame = None
+                await self.handle(frame if isinstance(frame, dict) else {"type": None})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for conversation_id in list(self.pumps):
+                self._unsubscribe(conversation_id)
+            writer.cancel()
+
+    async def _write(self):
+        while True:
+            await self.websocket.send_json(await self.outbox.get())
+
+    async def handle(self, frame: dict):
+        ref = frame.get("ref")
+        action = frame.get("type")
+        handler = getattr(self, f"_on_{action}", None) if isinstance(action, str) else None
+        try:
+            if handler is None:
+                raise HTTPException(status_code=400, detail="Frames must be JSON objects with a known type")
+            result = await handler(frame)
+        except HTTPException as e:
+            await self.outbox.put({"type": "error", "ref": ref, "status": e.status_code, "detail": e.detail})
+        except ValidationError as e:
+            await self.outbox.put({"type": "error", "ref": ref, "status": 422,
+                                   "detail": e.errors(include_url=False, include_context=False)})
+        else:
+            await self.outbox.put({"type": "ack", "ref": ref, "action": action, "result": result})
+
+    async def _conversation(self, frame: dict) -> dict:
+        conversation_id = frame.get("conversation_id")
+        if not isinstance(conversation_id, str):
+            raise HTTPException(status_code=400, detail="conversation_id is required")
+        cached = self.conversations.get(conversation_id)
+        if cached is not None:
+            return cached
+        conversation = await actions.load_conversation(self.db, conversation_id)
+        await verify_conversation_access(self.user, conversation)
+        return conversation
+
+    # ── Subscriptions ──
+
+    async def _on_subscribe(self, frame: dict):
+        conversation = await self._conversation(frame)
+        key = str(conversation["_id"])
+        if key in self.pumps:
+            return None
+        last_event_id = frame.get("last_event_id")
+        queue = notifier.subscribe(key)
+        # Same tick as subscribe(): the backlog ends where the queue starts
+        backlog = [] if last_event_id is None else (
+            notifier.replay(key, last_event_id) if isinstance(last_event_id, int) else None
+        )
+        self.conversations[key] = conversation
+        self.pumps[key] = asyncio.create_task(self._pump(key, queue, backlog))
+        return None
+
+    async def _on_unsubscribe(self, frame: dict):
+        self._unsubscribe(str(frame.get("conversation_id")))
+        return None
+
+    def _unsubscribe(self, key: str):
+        self.conversations.pop(key, None)
+        pump = self.pumps.pop(key, None)
+        if pump is not None:
+            pump.cancel()
+
+    async def _pump(self, key: str, queue: asyncio.Queue, backlog: Optional[list]):
+        """Forward one conversation's notifier events to the socket."""
+        try:
+            if backlog is None:
+                await self.outbox.put({"type": "resync", "conversation_id": key})
+                backlog = []
+            for event_id, message_data in backlog:
+                await self.outbox.put({"type": "event", "conversation_id": key, "id": event_id, "data": message_data})
+            while True:
+                item = await queue.get()
+                if item is RESYNC:
+                    await self.outbox.put({"type": "resync", "conversation_id": key})
+                    continue
+                event_id, message_data = item
+                if message_data.get("type") == "close" and key in self.conversations:
+                    self.conversations[key]["status"] = ConversationStatus.CLOSED.value
+                await self.outbox.put({"type": "event", "conversation_id": key, "id": event_id, "data": message_data})
+        finally:
+            notifier.unsubscribe(key, queue)
+
+    # ── Actions ──
+
+    async def _on_send(self, frame: dict):
+        data = MessageCreate(content=frame.get("content"), metadata=frame.get("metadata") or {})
+        conversation = await self._conversation(frame)
+        message = await actions.post_message(self.db, conversation, self.user, data.content, data.metadata)
+        return message.model_dump(mode="json")
+
+    async def _on_edit(self, frame: dict):
+        data = MessageUpdate(content=frame.get("content"))
+        conversation = await self._conversation(frame)
+        message = await actions.edit_message(
+            self.db, str(conversation["_id"]), str(frame.get("message_id")), self.user, data.content
+        )
+        return message.model_dump(mode="json")
+
+    async def _on_read(self, frame: dict):
+        conversation = await self._conversation(frame)
+        return await actions.mark_read(self.db, conversation, self.user)
+
+
+async def serve(websocket: WebSocket, db):
+    """Accept, authenticate from the first frame, then run the socket until it closes."""
+    await websocket.accept()
+    try:
+        text = await asyncio.wait_for(websocket.receive_text(), timeout=settings.WS_AUTH_TIMEOUT_SECONDS)
+        try:
+            frame = json.loads(text)
+        except ValueError:
+            frame = None
+        if not isinstance(frame, dict) or frame.get("type") != "auth" or not isinstance(frame.get("token"), str):
+            raise HTTPException(status_code=401, detail="First frame must be {\"type\": \"auth\", \"token\": ...}")
+        user = await authenticate_access_token(frame["token"])
+    except asyncio.TimeoutError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Authentication timed out")
+        return
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    except WebSocketDisconnect:
+        return
+
+    await ConversationSocket(websocket, db, user).run()
@@ -1,6 +1,6 @@
 from enum import Enum
 from datetime import datetime, timezone
-from typing import Annotated, Any, List, Optional
+from typing import Annotated, Any, Dict, List, Optional
 from pydantic import BaseModel, Field, ConfigDict, GetCoreSchemaHandler, GetJsonSchemaHandler
 from bson import ObjectId
 
@@ -54,6 +54,8 @@ class Conversation(BaseModel):
     institution_id: Optional[str] = None
     
     last_message_at: Optional[datetime] = Field(default=None)
+    # Per-participant read watermarks, keyed by user id (see read_marks.py)
+    read_marks: Dict[str, Any] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
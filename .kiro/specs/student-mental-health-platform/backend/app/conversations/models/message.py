@@ -23,7 +23,7 @@ class Message(BaseModel):
     
     metadata: Dict[str, Any] = Field(default_factory=dict)
     is_deleted: bool = False
-    read_by: List[Any] = Field(default_factory=list)
+    read_by: List[Any] = Field(default_factory=list)  # Legacy; reads are conversation watermarks (read_marks.py)
     
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -1,40 +1,135 @@
 import asyncio
-from typing import Dict, Set
-from bson import ObjectId
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from .broker import Broker, create_broker
+from .fanout import Subscriber
 
 class MessageNotifier:
     """
-    Simple in-memory broadcast system for real-time chat updates via SSE.
+    Broadcast system for real-time chat updates via SSE.
+
+    Events are published through a Broker (broker.py) so subscribers on
+    any API process receive them. Each process subscribes upstream once per
+    conversation with local subscribers and fans events out to their
+    Subscriber buffers (fanout.py) as (event_id, message) pairs; slow
+    subscribers get coalesced events and, on overflow, a resync.
+
+    The last NOTIFIER_REPLAY_BUFFER events of every subscribed conversation
+    are kept in a ring buffer, and the upstream subscription (with its
+    buffer) outlives the last local subscriber by
+    NOTIFIER_REPLAY_GRACE_SECONDS, so a client reconnecting with
+    Last-Event-ID is replayed from memory.
     """
-    def __init__(self):
-        # Map conversation_id (str) to a set of message queues
-        self.queues: Dict[str, Set[asyncio.Queue]] = {}
+    def __init__(self, broker: Optional[Broker] = None):
+        # Map conversation_id (str) to a set of subscriber buffers
+        self.queues: Dict[str, Set[Subscriber]] = {}
         self.max_queue_size = 100
+        self.replay_size = settings.NOTIFIER_REPLAY_BUFFER
+        self.grace_seconds = settings.NOTIFIER_REPLAY_GRACE_SECONDS
+        # Upstream-subscribed conversations -> recent (event_id, message)
+        self.buffers: Dict[str, Deque[Tuple[int, dict]]] = {}
+        self._releases: Dict[str, asyncio.TimerHandle] = {}
+        self._broker = broker
 
-    def subscribe(self, conversation_id: str) -> asyncio.Queue:
+    @property
+    def broker(self) -> Broker:
+        if self._broker is None:
+            self._broker = create_broker()
+        return self._broker
+
+    def subscribe(self, conversation_id: str) -> Subscriber:
         """Subscribe to new messages in a conversation."""
-        queue = asyncio.Queue(maxsize=self.max_queue_size)
-        if conversation_id not in self.queues:
-            self.queues[conversation_id] = set()
-        self.queues[conversation_id].add(queue)
+        queue = Subscriber(conversation_id, self.max_queue_size)
+        release = self._releases.pop(conversation_id, None)
+        if release is not None:
+            release.cancel()
+        if conversation_id not in self.buffers:
+            self.buffers[conversation_id] = deque(maxlen=self.replay_size)
+            self.broker.subscribe(conversation_id, self._deliver)
+        self.queues.setdefault(conversation_id, set()).add(queue)
         return queue
 
-    def unsubscribe(self, conversation_id: str, queue: asyncio.Queue):
+    def unsubscribe(self, conversation_id: str, queue: Subscriber):
         """Unsubscribe from a conversation."""
         if conversation_id in self.queues:
             self.queues[conversation_id].discard(queue)
             if not self.queues[conversation_id]:
                 del self.queues[conversation_id]
+                self._schedule_release(conversation_id)
 
-    async def broadcast(self, conversation_id: str, message: dict):
-        """Broadcast a new message to all subscribers of a conversation."""
-        if conversation_id in self.queues:
-            # Create a list because the set might change during iteration
-            for queue in list(self.queues[conversation_id]):
-                try:
-                    queue.put_nowait(message)
-                except asyncio.QueueFull:
-                    # Evict stale subscriber
-                    self.unsubscribe(conversation_id, queue)
+    def replay(self, conversation_id: str, last_event_id: int) -> Optional[List[Tuple[int, dict]]]:
+        """
+        Buffered events after `last_event_id`, oldest first, or None when the
+        buffer cannot prove it holds all of them (the client must re-fetch
+        history). Call right after subscribe(), with no await in between, so
+        the replay and the queue neither overlap nor leave a gap.
+        """
+        buffer = self.buffers.get(conversation_id)
+        if not buffer:
+            return None
+        events = sorted(buffer, key=lambda event: event[0])
+        if events[0][0] > last_event_id + 1:
+            return None  # Evicted from the ring, or sent before this process subscribed
+        missed = [event for event in events if event[0] > last_event_id]
+        if [event_id for event_id, _ in missed] != list(range(last_event_id + 1, last_event_id + 1 + len(missed))):
+            return None
+        return missed
+
+    async def broadcast(self, conversation_id: str, message: dict) -> int:
+        """Publish a message to the subscribers of a conversation on every process; returns its event id."""
+        return await self.broker.publish(conversation_id, message)
+
+    def _deliver(self, conversation_id: str, event_id: int, message: dict):
+        """Buffer an event from the broker and fan it out to this process's subscribers."""
+        buffer = self.buffers.get(conversation_id)
+        if buffer is not None:
+            buffer.append((event_id, message))
+        for queue in self.queues.get(conversation_id, ()):
+            queue.put(event_id, message)
+
+    def _schedule_release(self, conversation_id: str):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or self.grace_seconds <= 0:
+            self._release(conversation_id)
+        else:
+            self._releases[conversation_id] = loop.call_later(self.grace_seconds, self._release, conversation_id)
+
+    def _release(self, conversation_id: str):
+        """Drop the upstream subscription and buffer once nobody has resubscribed."""
+        self._releases.pop(conversation_id, None)
+        if conversation_id not in self.queues and self.buffers.pop(conversation_id, None) is not None:
+            self.broker.unsubscribe(conversation_id)
+
+    def stats(self) -> dict:
+        """Fan-out metrics for GET /conversations/metrics: totals plus every subscriber, most lagged first."""
+        subscribers = sorted(
+            (queue.stats() for queues in self.queues.values() for queue in queues),
+            key=lambda entry: entry["lag"], reverse=True
+        )
+        totals = {
+            field: sum(entry[field] for entry in subscribers)
+            for field in ("lag", "delivered", "coalesced", "dropped", "resyncs")
+        }
+        return {
+            "conversations": len(self.buffers),
+            "subscriber_count": len(subscribers),
+            **totals,
+            "subscribers": subscribers,
+        }
+
+    async def close(self):
+        for release in self._releases.values():
+            release.cancel()
+        self._releases.clear()
+        if self._broker is not None:
+            await self._broker.close()
+            self._broker = None
+        self.queues.clear()
+        self.buffers.clear()
 
 notifier = MessageNotifier()
@@ -0,0 +1,84 @@
+"""
+Per-participant read watermarks for conversations.
+
+Each conversation document keeps, per participant, the newest message they
+have read:
+
+    read_marks: {"<user id>": {"last_read_at": <created_at>, "last_read_message_id": <_id>}}
+
+A message is read by a user when they sent it, or when its (created_at,
+_id) is at or before their watermark, so marking a conversation read is one
+update to the conversation document, whatever its length. Sending does not
+move the watermark (as read_by=[sender] marked nothing else read). is_read
+and unread counts are computed from the watermark. The per-message read_by arrays this replaces
+are converted by tools/migrate_read_marks.py.
+"""
+
+from typing import Dict, Optional
+
+from bson import ObjectId
+
+
+def read_mark(conversation: dict, user_id) -> Optional[dict]:
+    return (conversation.get("read_marks") or {}).get(str(user_id))
+
+
+def mark_fields(user_id, message: dict) -> dict:
+    """$set fields moving `user_id`'s watermark to `message` (needs created_at and _id)."""
+    return {
+        f"read_marks.{user_id}": {
+            "last_read_at": message["created_at"],
+            "last_read_message_id": message["_id"],
+        }
+    }
+
+
+def behind_mark_filter(user_id, message: dict) -> dict:
+    """Conversation filter matching only if `user_id`'s watermark is older than `message`, so marks never move back."""
+    field = f"read_marks.{user_id}"
+    return {"$or": [
+        {field: {"$exists": False}},
+        {f"{field}.last_read_at": {"$lt": message["created_at"]}},
+        {f"{field}.last_read_at": message["created_at"], f"{field}.last_read_message_id": {"$lt": message["_id"]}},
+    ]}
+
+
+def is_read_expression(mark: Optional[dict], user_id) -> dict:
+    """Aggregation expression: did `user_id` send the current message, or is it at or before their watermark."""
+    own = {"$eq": ["$sender_id", {"$literal": user_id}]}
+    if not mark:
+        return own
+    return {"$or": [
+        own,
+        {"$lt": ["$created_at", mark["last_read_at"]]},
+        {"$and": [
+            {"$eq": ["$created_at", mark["last_read_at"]]},
+            {"$lte": ["$_id", mark["last_read_message_id"]]},
+        ]},
+    ]}
+
+
+def unread_filter(conversation_id: ObjectId, mark: Optional[dict], user_id) -> dict:
+    """Messages filter for what `user_id` has not read: after the watermark and sent by someone else."""
+    query = {"conversation_id": conversation_id, "is_deleted": False, "sender_id": {"$ne": user_id}}
+    if mark:
+        query["$or"] = [
+            {"created_at": {"$gt": mark["last_read_at"]}},
+            {"created_at": mark["last_read_at"], "_id": {"$gt": mark["last_read_message_id"]}},
+        ]
+    return query
+
+
+async def unread_counts(db, conversations: list, user_id) -> Dict[str, int]:
+    """{conversation id: unread messages} for `user_id`, in one aggregation."""
+    if not conversations:
+        return {}
+    branches = [unread_filter(c["_id"], read_mark(c, user_id), user_id) for c in conversations]
+    cursor = db.messages.aggregate([
+        {"$match": {"$or": branches}},
+        {"$group": {"_id": "$conversation_id", "count": {"$sum": 1}}},
+    ])
+    counts = {str(c["_id"]): 0 for c in conversations}
+    async for row in cursor:
+        counts[str(row["_id"])] = row["count"]
+    return counts
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from bson import ObjectId
 from app.authentication_onboarding.models.user import AnyUser, Role, get_model_for_role
-from app.authentication_onboarding.core.dependencies import get_current_user
+from app.authentication_onboarding.core.dependencies import get_current_user, role_required
 from app import database
 from app.config import settings
 
@@ -13,6 +13,10 @@ from .schemas import MessageCreate, MessageRead, ConversationCreate, Conversatio
 from .access_control import verify_conversation_access
 from app.data_storage_and_encryption.encryption_utils import encrypt_field
 from .notifier import notifier
+from .fanout import RESYNC
+from . import actions, gateway
+from .message_reads import read_messages, iter_json
+from .read_marks import read_mark, unread_counts
 import json
 import asyncio
 import logging
@@ -133,6 +137,7 @@ async def list_conversations(
     ).sort("last_message_at", -1)
     
     conversations = await cursor.to_list(length=100)
+    unread = await unread_counts(db, conversations, current_user.id)
     
     return [
         ConversationRead(
@@ -140,10 +145,21 @@ async def list_conversations(
             type=c["type"],
             status=c["status"],
             last_message_at=c["last_message_at"],
-            participant_ids=[str(p) for p in c["participants"]]
+            participant_ids=[str(p) for p in c["participants"]],
+            unread_count=unread[str(c["_id"])]
         ) for c in conversations
     ]
 
+@router.get("/metrics", dependencies=[Depends(role_required(Role.ADMIN))])
+async def get_fanout_metrics():
+    """Real-time fan-out metrics: per-subscriber lag, coalesced and dropped events. Admin only."""
+    return notifier.stats()
+
+@router.websocket("/ws")
+async def conversation_socket(websocket: WebSocket):
+    """Multiplexed WebSocket for many conversations over one connection (see gateway.py)."""
+    await gateway.serve(websocket, get_db())
+
 @router.get("/{id}/messages", response_model=List[MessageRead])
 async def get_messages(
     id: str,
@@ -178,33 +194,27 @@ async def get_messages(
         if after:
             query["created_at"]["$gt"] = after
     
-    cursor = db.messages.find(query).sort("created_at", -1).limit(limit)
-    
-    messages_raw = await cursor.to_list(length=limit)
-    messages_raw.reverse() # Show in chronological order
-    
-    result = []
-    for m in messages_raw:
-        msg_obj = Message(**m)
-        result.append(MessageRead(
-            id=str(m["_id"]),
-            sender_id=str(m["sender_id"]) if m.get("sender_id") else None,
-            sender_type=m["sender_type"],
-            content=msg_obj.get_content() or "",
-            metadata=m.get("metadata", {}),
-            created_at=m["created_at"],
-            is_read=current_user.id in m.get("read_by", [])
-        ))
-    
-    return result
+    messages = await read_messages(
+        db.messages, query, read_mark(conversation, current_user.id), current_user.id, limit
+    )
+    return StreamingResponse(iter_json(messages), media_type="application/json")
+
+def _sse_event(event_id: int, message: dict) -> str:
+    return f"id: {event_id}\ndata: {json.dumps(message)}\n\n"
 
 @router.get("/{id}/stream")
 async def stream_messages(
     id: str,
+    last_event_id: Optional[str] = Header(None),
     current_user: AnyUser = Depends(get_current_user)
 ):
     """
     Subscribe to real-time message updates via Server-Sent Events (SSE).
+
+    Every event carries an id. Reconnecting with Last-Event-ID replays the
+    events missed in between from the notifier's buffer; when it no longer
+    holds them, a `resync` event tells the client to re-fetch history.
+    Idle streams get a comment every SSE_HEARTBEAT_SECONDS.
     """
     db = get_db()
     conv_id = ObjectId(id)
@@ -215,19 +225,43 @@ async def stream_messages(
         
     await verify_conversation_access(current_user, conversation)
 
+    key = str(conv_id)
+
     async def event_generator():
-        queue = notifier.subscribe(id)
+        queue = notifier.subscribe(key)
+        backlog = []
+        if last_event_id is not None:
+            # Same tick as subscribe(): the backlog ends where the queue starts
+            backlog = notifier.replay(key, int(last_event_id)) if last_event_id.isdigit() else None
+        get = None
         try:
+            if backlog is None:
+                yield "event: resync\ndata: {}\n\n"
+                backlog = []
+            for event_id, message_data in backlog:
+                yield _sse_event(event_id, message_data)
             while True:
-                # Wait for a new message
-                message_data = await queue.get()
+                # Wait for a new message, keeping the pending get across heartbeats
+                get = get or asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({get}, timeout=settings.SSE_HEARTBEAT_SECONDS)
+                if not done:
+                    yield ": keep-alive\n\n"
+                    continue
+                item = get.result()
+                get = None
+                if item is RESYNC:
+                    # This client fell too far behind and events were dropped
+                    yield "event: resync\ndata: {}\n\n"
+                    continue
                 # Yield in SSE format
-                yield f"data: {json.dumps(message_data)}\n\n"
+                yield _sse_event(*item)
         except (asyncio.CancelledError, Exception):
             # Ensure unsubscribe always runs
             raise
         finally:
-            notifier.unsubscribe(id, queue)
+            if get is not None:
+                get.cancel()
+            notifier.unsubscribe(key, queue)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -246,49 +280,9 @@ async def send_message(
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
         
-    if conversation["status"] != ConversationStatus.OPEN.value:
-        raise HTTPException(status_code=400, detail="Conversation is closed")
-        
     await verify_conversation_access(current_user, conversation)
     
-    # Explicit mapping for sender types
-    role_to_sender = {
-        Role.STUDENT: SenderType.STUDENT,
-        Role.COUNSELOR: SenderType.COUNSELOR,
-        Role.ADMIN: SenderType.COUNSELOR # Or add ADMIN to SenderType
-    }
-    sender_type = role_to_sender.get(current_user.role, SenderType.COUNSELOR)
-    
-    message = Message.create_encrypted(
-        content=data.content,
-        conversation_id=conv_id,
-        sender_id=current_user.id,
-        sender_type=sender_type,
-        metadata=data.metadata,
-        read_by=[current_user.id] # Sender has read their own message
-    )
-    
-    msg_dict = message.model_dump(by_alias=True, exclude={"id"})
-    result = await db.messages.insert_one(msg_dict)
-    
-    # 7. Update conversation last message timestamp
-    await db.conversations.update_one(
-        {"_id": conv_id},
-        {"$set": {"last_message_at": msg_dict["created_at"]}}
-    )
-
-    # 8. Broadcast the new message for streaming
-    msg_read = MessageRead(
-        id=str(result.inserted_id),
-        sender_id=str(current_user.id),
-        sender_type=sender_type,
-        content=data.content,
-        metadata=data.metadata,
-        created_at=message.created_at
-    )
-    await notifier.broadcast(id, msg_read.model_dump(mode="json"))
-    
-    return msg_read
+    return await actions.post_message(db, conversation, current_user, data.content, data.metadata)
 
 @router.patch("/{id}/messages/{message_id}", response_model=MessageRead)
 async def edit_message(
@@ -298,45 +292,7 @@ async def edit_message(
     current_user: AnyUser = Depends(get_current_user)
 ):
     """Edit an existing message. Only the sender can edit their messages."""
-    db = get_db()
-    if not ObjectId.is_valid(id) or not ObjectId.is_valid(message_id):
-        raise HTTPException(status_code=400, detail="Invalid ID format")
-        
-    msg_id = ObjectId(message_id)
-    conv_id = ObjectId(id)
-    
-    message_raw = await db.messages.find_one({"_id": msg_id, "conversation_id": conv_id})
-    if not message_raw:
-        raise HTTPException(status_code=404, detail="Message not found")
-        
-    # Only the original sender (non-AI) can edit their message
-    if str(message_raw.get("sender_id")) != str(current_user.id):
-        raise HTTPException(status_code=403, detail="You can only edit your own messages.")
-    
-    # Encrypt new content
-    encrypted = encrypt_field(data.content)
-    
-    await db.messages.update_one(
-        {"_id": msg_id},
-        {"$set": {
-            "encrypted_content": encrypted,
-            "updated_at": datetime.now(timezone.utc)
-        }}
-    )
-    
-    # Broadcast the edit for streaming
-    # Use existing message_raw instead of extra DB read for metadata/sender_type
-    msg_read = MessageRead(
-        id=str(msg_id),
-        sender_id=str(current_user.id),
-        sender_type=message_raw["sender_type"],
-        content=data.content,
-        metadata=message_raw.get("metadata", {}),
-        created_at=message_raw["created_at"]
-    )
-    await notifier.broadcast(id, {"type": "edit", "message": msg_read.model_dump(mode="json")})
-    
-    return msg_read
+    return await actions.edit_message(get_db(), id, message_id, current_user, data.content)
 
 @router.delete("/{id}/messages/{message_id}", response_model=MessageResponse)
 async def delete_message(
@@ -365,7 +321,7 @@ async def delete_message(
     )
     
     # Broadcast the deletion
-    await notifier.broadcast(id, {"type": "delete", "message_id": message_id})
+    await notifier.broadcast(str(conv_id), {"type": "delete", "message_id": message_id})
     
     return MessageResponse(message="Message deleted successfully.")
 
@@ -386,14 +342,7 @@ async def mark_as_read(
         
     await verify_conversation_access(current_user, conversation)
     
-    # Update all messages that don't have this user in read_by
-    await db.messages.update_many(
-        {"conversation_id": conv_id, "read_by": {"$ne": current_user.id}},
-        {"$addToSet": {"read_by": current_user.id}}
-    )
-    
-    # Broadcast a read receipt
-    await notifier.broadcast(id, {"type": "read", "user_id": str(current_user.id)})
+    await actions.mark_read(db, conversation, current_user)
     
     return MessageResponse(message="Conversation marked as read.")
 
@@ -421,5 +370,6 @@ async def close_conversation(
             "updated_at": datetime.now(timezone.utc)
         }}
     )
+    await notifier.broadcast(str(conv_id), {"type": "close"})
     
     return MessageResponse(message="Conversation closed successfully.")
@@ -36,5 +36,6 @@ class ConversationRead(BaseModel):
     status: ConversationStatus
     last_message_at: Optional[datetime]
     participant_ids: List[str]
+    unread_count: int = 0
     
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,133 @@
+"""
+Benchmark the message history read path (message_reads.py).
+
+Times the application-side work of one GET /conversations/{id}/messages
+page, from fetched documents to response bytes, both ways:
+- per-row: Message(**m) + get_content() + MessageRead + read_by scan,
+           serialised as List[MessageRead] (what FastAPI did)
+- fast:    projected documents + chunked batch decrypt + streamed JSON
+
+MongoDB is not involved; the projection's saving (read_by arrays and
+unused fields not sent over the wire) comes on top of these numbers.
+The per-row baseline reads legacy read_by arrays; is_read now comes from
+read watermarks (read_marks.py), computed in the same projection.
+Needs ENCRYPTION_MASTER_KEY; a throwaway key is used if it is unset.
+
+Usage:
+    python -m app.conversations.tools.bench_message_reads [--limit 100] [--pages 500] [--readers 50]
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("ENCRYPTION_MASTER_KEY", base64.b64encode(os.urandom(32)).decode())
+
+from bson import ObjectId  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.conversations import message_reads  # noqa: E402
+from app.conversations.models.message import Message  # noqa: E402
+from app.conversations.schemas import MessageRead  # noqa: E402
+from app.data_storage_and_encryption.encryption_utils import encrypt_field  # noqa: E402
+
+
+def _documents(limit: int, readers: int) -> list:
+    conv_id, start = ObjectId(), datetime(2026, 1, 1, tzinfo=timezone.utc)
+    read_by = [ObjectId() for _ in range(readers)]
+    return [
+        {
+            "_id": ObjectId(),
+            "conversation_id": conv_id,
+            "sender_id": ObjectId(),
+            "sender_type": "student",
+            "encrypted_content": encrypt_field(f"message {i}: " + "I have been feeling a bit overwhelmed " * 4),
+            "metadata": {"client": "web"},
+            "is_deleted": False,
+            "read_by": read_by,
+            "created_at": start + timedelta(seconds=i),
+            "updated_at": start + timedelta(seconds=i),
+        }
+        for i in reversed(range(limit))
+    ]
+
+
+def _per_row(docs: list, user_id) -> bytes:
+    result = []
+    for m in reversed(docs):
+        msg_obj = Message(**m)
+        result.append(MessageRead(
+            id=str(m["_id"]),
+            sender_id=str(m["sender_id"]) if m.get("sender_id") else None,
+            sender_type=m["sender_type"],
+            content=msg_obj.get_content() or "",
+            metadata=m.get("metadata", {}),
+            created_at=m["created_at"],
+            is_read=user_id in m.get("read_by", [])
+        ))
+    return TypeAdapter(list[MessageRead]).dump_json(result)
+
+
+class _Projected:
+    """Stands in for the collection: returns the documents as the pipeline projects them."""
+
+    def __init__(self, docs: list, user_id):
+        fields = ("_id", "sender_id", "sender_type", "encrypted_content", "metadata", "created_at")
+        self.docs = [{k: d[k] for k in fields} | {"is_read": user_id in d["read_by"]} for d in docs]
+
+    def aggregate(self, pipeline):
+        return self
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+
+async def _fast(collection, limit: int) -> bytes:
+    messages = await message_reads.read_messages(collection, {}, None, None, limit)
+    return b"".join(message_reads.iter_json(messages))
+
+
+def _time(op, pages: int) -> tuple:
+    op()  # warm up
+    times = []
+    for _ in range(pages):
+        t0 = time.perf_counter()
+        op()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return sum(times) / pages, times[pages // 2], times[int(pages * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=50, help="read_by entries per message")
+    args = parser.parse_args()
+
+    user_id = ObjectId()
+    docs = _documents(args.limit, args.readers)
+    collection = _Projected(docs, user_id)
+    loop = asyncio.new_event_loop()
+    try:
+        rows = [
+            ("per-row models", *_time(lambda: _per_row(docs, user_id), args.pages)),
+            ("fast path", *_time(lambda: loop.run_until_complete(_fast(collection, args.limit)), args.pages)),
+        ]
+    finally:
+        loop.close()
+
+    print(f"# Message page, limit={args.limit}, {args.readers} readers per message, {args.pages} pages (ms)")
+    print()
+    print("| Path | Mean | p50 | p95 |")
+    print("|------|------|-----|-----|")
+    for path, mean, p50, p95 in rows:
+        print(f"| {path} | {mean:.2f} | {p50:.2f} | {p95:.2f} |")
+    print(f"\nSpeed-up (mean): {rows[0][1] / rows[1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
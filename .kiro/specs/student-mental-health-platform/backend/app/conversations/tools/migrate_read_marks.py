@@ -0,0 +1,100 @@
+"""
+Convert per-message read_by arrays into conversation read watermarks (read_marks.py).
+
+For every (conversation, user) pair the newest message by someone else whose
+read_by holds the user becomes that user's watermark; messages before it
+count as read from then on. The sender's own entry in read_by is skipped:
+own messages always count as read, and sending does not mark earlier
+messages read. Marks only
+ever move forward, so the job can be re-run, and watermarks written by the
+live API since are kept when they are newer.
+
+Also creates the (conversation_id, created_at, _id) index that history
+pages, mark-read and unread counts rely on. With --drop-read-by the
+converted arrays are $unset afterwards.
+
+Usage:
+    python -m app.conversations.tools.migrate_read_marks [--mongo-url URL] [--db NAME]
+        [--batch 1000] [--drop-read-by]
+"""
+
+import argparse
+import asyncio
+import time
+
+from pymongo import UpdateOne
+
+from app.conversations import read_marks
+
+
+def latest_reads_pipeline() -> list:
+    """One row per (conversation, reader): the newest message by someone else in their read_by."""
+    return [
+        {"$match": {"is_deleted": False, "read_by.0": {"$exists": True}}},
+        {"$project": {"conversation_id": 1, "created_at": 1, "read_by": 1, "sender_id": 1}},
+        {"$unwind": "$read_by"},
+        {"$match": {"$expr": {"$ne": ["$read_by", "$sender_id"]}}},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$group": {
+            "_id": {"conversation_id": "$conversation_id", "user_id": "$read_by"},
+            "created_at": {"$first": "$created_at"},
+            "message_id": {"$first": "$_id"},
+        }},
+    ]
+
+
+def mark_update(row: dict) -> UpdateOne:
+    user_id, message = row["_id"]["user_id"], {"created_at": row["created_at"], "_id": row["message_id"]}
+    return UpdateOne(
+        {"_id": row["_id"]["conversation_id"], **read_marks.behind_mark_filter(user_id, message)},
+        {"$set": read_marks.mark_fields(user_id, message)}
+    )
+
+
+async def migrate(db, batch_size: int = 1000, drop_read_by: bool = False) -> int:
+    """Write watermarks from read_by; returns the number of marks set or advanced."""
+    await db.messages.create_index(
+        [("conversation_id", 1), ("created_at", -1), ("_id", -1)], name="conversation_history"
+    )
+
+    written, batch = 0, []
+    async for row in db.messages.aggregate(latest_reads_pipeline(), allowDiskUse=True):
+        batch.append(mark_update(row))
+        if len(batch) >= batch_size:
+            written += (await db.conversations.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        written += (await db.conversations.bulk_write(batch, ordered=False)).modified_count
+
+    if drop_read_by:
+        await db.messages.update_many({"read_by": {"$exists": True}}, {"$unset": {"read_by": ""}})
+    return written
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db", default=settings.MONGODB_DB_NAME)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--drop-read-by", action="store_true", help="$unset read_by once the marks are written")
+    args = parser.parse_args()
+
+    async def run():
+        import certifi
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_url, tlsCAFile=certifi.where())
+        try:
+            started = time.perf_counter()
+            written = await migrate(client[args.db], args.batch, drop_read_by=args.drop_read_by)
+            print(f"Set {written} read watermarks in {time.perf_counter() - started:.1f}s")
+        finally:
+            client.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
+import base64
 import logging
+import os
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.exceptions import InvalidTag
-from typing import Optional
+from typing import List, Optional
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -57,6 +59,29 @@ def decrypt_field(encrypted_data: Optional[str]) -> Optional[str]:
         logger.error(f"Decryption failed: {e}")
         raise
 
+def decrypt_many(encrypted_values: List[Optional[str]]) -> List[Optional[str]]:
+    """
+    Decrypts a batch of values produced by encrypt_field, in order.
+    Same format and errors as decrypt_field, without the per-call overhead;
+    used by bulk read paths (see app/conversations/message_reads.py).
+    """
+    b64decode, decrypt = base64.b64decode, aesgcm.decrypt
+    results = []
+    for encrypted_data in encrypted_values:
+        if encrypted_data is None:
+            results.append(None)
+            continue
+        try:
+            blob = b64decode(encrypted_data)
+            results.append(decrypt(blob[:12], blob[12:], None).decode('utf-8'))
+        except InvalidTag:
+            logger.error("Decryption failed: Invalid tag (tampering detected)")
+            raise
+        except Exception as e:
+            logger.error(f"Decryption failed: {e}")
+            raise
+    return results
+
 if __name__ == "__main__":
     # Quick test
     original_text = "Highly sensitive health note."
@@ -19,10 +19,24 @@ logging.basicConfig(level=logging.INFO)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup: connect to MongoDB.  Shutdown: close the connection."""
+    """Startup: connect to MongoDB, prepare Syna storage, start the crisis alert dispatcher.  Shutdown: reverse."""
     await connect_db()
     log.info("Connected to MongoDB and initialised Beanie ODM.")
+    from app.syna_ai.database import init_db, close_db_pool
+    from app.syna_ai.alert_dispatcher import get_dispatcher
+    from app.syna_ai.storage import get_storage
+    init_db()  # Syna SQLite schema (crisis alert outbox), once per process
+    await get_storage().open()  # SYNA_STORAGE backend: schema / indexes
+    get_dispatcher().start()
     yield
+    await get_dispatcher().stop()
+    from app.conversations.notifier import notifier
+    await notifier.close()
+    from app.syna_ai import inference, llm_client
+    await inference.close()
+    await llm_client.close()
+    await get_storage().close()
+    close_db_pool()
     await close_db()
     log.info("MongoDB connection closed.")
 
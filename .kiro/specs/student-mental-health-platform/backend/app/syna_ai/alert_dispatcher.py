@@ -0,0 +1,244 @@
+"""
+PSYNOVA Crisis Alert Dispatcher
+Background worker that drains the crisis alert outbox (crisis_alert_deliveries).
+
+- Deliveries are claimed with a lease, so several API workers can run a
+  dispatcher and a crashed worker's claims are retried after ALERT_LEASE_S.
+- All due deliveries are sent concurrently, each channel with its own timeout.
+- Failures are retried with exponential backoff; after ALERT_MAX_ATTEMPTS the
+  delivery is marked 'failed'.
+- crisis_alerts.alerted_<channel> is set as soon as that channel succeeds.
+- Outcomes are recorded only while this worker still holds the lease: a send
+  that outlives ALERT_LEASE_S (timeouts do not stop the thread) cannot undo
+  or overwrite what the worker that reclaimed the row recorded.
+- Pending rows survive restarts; the first poll after startup picks them up.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+
+from app.syna_ai.config import (
+    ALERT_BACKOFF_BASE_S, ALERT_BACKOFF_MAX_S, ALERT_CHANNEL_TIMEOUT_S, ALERT_LEASE_S,
+    ALERT_MAX_ATTEMPTS, ALERT_POLL_INTERVAL_S,
+)
+from app.syna_ai.database import get_db_context
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number `attempts` (1-based), with +/-20% jitter."""
+    delay = min(ALERT_BACKOFF_MAX_S, ALERT_BACKOFF_BASE_S * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class _ChannelStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed_attempts = 0
+        self.gave_up = 0
+        self.send_ms = []        # channel call latency, last 1000
+        self.delivery_ms = []    # alert created -> delivered, last 1000
+
+    @staticmethod
+    def _summary(values):
+        if not values:
+            return {"mean": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(values)
+        return {
+            "mean": round(sum(ordered) / len(ordered), 1),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+            "max": round(ordered[-1], 1),
+        }
+
+    def snapshot(self):
+        return {
+            "sent": self.sent,
+            "failed_attempts": self.failed_attempts,
+            "gave_up": self.gave_up,
+            "send_ms": self._summary(self.send_ms),
+            "delivery_ms": self._summary(self.delivery_ms),
+        }
+
+
+class CrisisAlertDispatcher:
+    def __init__(self, channels: dict = None, poll_interval: float = ALERT_POLL_INTERVAL_S,
+                 channel_timeout: float = ALERT_CHANNEL_TIMEOUT_S, max_attempts: int = ALERT_MAX_ATTEMPTS,
+                 lease_s: float = ALERT_LEASE_S):
+        if channels is None:
+            from app.syna_ai.crisis_alerts import CHANNELS
+            channels = CHANNELS
+        self.channels = channels
+        self.poll_interval = poll_interval
+        self.channel_timeout = channel_timeout
+        self.max_attempts = max_attempts
+        self.lease_s = lease_s
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stats = {name: _ChannelStats() for name in channels}
+        self._wake = None
+        self._loop = None
+        self._task = None
+
+    # ---------- DB operations (run in threads) ----------
+
+    def _claim_due(self, limit: int = 100) -> list:
+        now = time.time()
+        with get_db_context() as (conn, cursor):
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT d.alert_id, d.channel, d.attempts, d.created_at, a.message
+                FROM crisis_alert_deliveries d JOIN crisis_alerts a ON a.id = d.alert_id
+                WHERE (d.status = 'pending' AND d.next_attempt_at <= ?)
+                   OR (d.status = 'in_flight' AND d.claimed_at < ?)
+                ORDER BY d.next_attempt_at LIMIT ?
+            """, (now, now - self.lease_s, limit))
+            rows = [r for r in cursor.fetchall() if r[1] in self.channels]
+            cursor.executemany(
+                "UPDATE crisis_alert_deliveries SET status = 'in_flight', claimed_by = ?, claimed_at = ? "
+                "WHERE alert_id = ? AND channel = ?",
+                [(self.worker_id, now, r[0], r[1]) for r in rows]
+            )
+            conn.commit()
+        return rows
+
+    def _mark_sent(self, alert_id: int, channel: str, latency_ms: float) -> bool:
+        """Record a delivery; False if the lease was lost to another worker (nothing written)."""
+        with get_db_context() as (conn, cursor):
+            cursor.execute(
+                "UPDATE crisis_alert_deliveries SET status = 'sent', attempts = attempts + 1, latency_ms = ?, "
+                "delivered_at = ?, last_error = NULL "
+                "WHERE alert_id = ? AND channel = ? AND status = 'in_flight' AND claimed_by = ?",
+                (latency_ms, time.time(), alert_id, channel, self.worker_id)
+            )
+            recorded = cursor.rowcount == 1
+            if recorded:
+                # channel names come from CHANNELS, never from input
+                cursor.execute(f"UPDATE crisis_alerts SET alerted_{channel} = 1 WHERE id = ?", (alert_id,))
+            conn.commit()
+        return recorded
+
+    def _mark_failed(self, alert_id: int, channel: str, attempts: int, error: str) -> bool:
+        """Schedule a retry or give up; True if this gave up. A lost lease writes nothing."""
+        gave_up = attempts >= self.max_attempts
+        with get_db_context() as (conn, cursor):
+            cursor.execute(
+                "UPDATE crisis_alert_deliveries SET status = ?, attempts = ?, next_attempt_at = ?, "
+                "last_error = ?, claimed_by = NULL "
+                "WHERE alert_id = ? AND channel = ? AND status = 'in_flight' AND claimed_by = ?",
+                ("failed" if gave_up else "pending", attempts, time.time() + backoff_seconds(attempts),
+                 error[:500], alert_id, channel, self.worker_id)
+            )
+            recorded = cursor.rowcount == 1
+            conn.commit()
+        return gave_up and recorded
+
+    def backlog(self) -> dict:
+        with get_db_context() as (conn, cursor):
+            cursor.execute("""
+                SELECT channel, status, COUNT(*), MIN(created_at) FROM crisis_alert_deliveries
+                WHERE status != 'sent' GROUP BY channel, status
+            """)
+            rows = cursor.fetchall()
+        now = time.time()
+        result = {}
+        for channel, status, count, oldest in rows:
+            entry = result.setdefault(channel, {"pending": 0, "in_flight": 0, "failed": 0, "oldest_age_s": 0.0})
+            entry[status] = count
+            if status != "failed":
+                entry["oldest_age_s"] = max(entry["oldest_age_s"], round(now - oldest, 1))
+        return result
+
+    # ---------- delivery ----------
+
+    async def _deliver(self, alert_id, channel, attempts, created_at, message):
+        stats = self.stats[channel]
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self.channels[channel], alert_id, message), timeout=self.channel_timeout
+            )
+        except Exception as e:
+            stats.failed_attempts += 1
+            error = "timed out" if isinstance(e, asyncio.TimeoutError) else f"{type(e).__name__}: {e}"
+            print(f"WARNING: Crisis alert {alert_id} -> {channel} failed (attempt {attempts + 1}): {error}")
+            if await asyncio.to_thread(self._mark_failed, alert_id, channel, attempts + 1, error):
+                stats.gave_up += 1
+                print(f"ERROR: Giving up on crisis alert {alert_id} -> {channel} after {attempts + 1} attempts")
+            return
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        if not await asyncio.to_thread(self._mark_sent, alert_id, channel, latency_ms):
+            print(f"WARNING: Crisis alert {alert_id} -> {channel} sent after its lease was reclaimed")
+        stats.sent += 1
+        stats.send_ms = stats.send_ms[-999:] + [latency_ms]
+        stats.delivery_ms = stats.delivery_ms[-999:] + [(time.time() - created_at) * 1000]
+
+    async def run_once(self) -> int:
+        """Claim and deliver every due delivery concurrently. Returns how many were attempted."""
+        rows = await asyncio.to_thread(self._claim_due)
+        if rows:
+            await asyncio.gather(*(self._deliver(*row) for row in rows))
+        return len(rows)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"ERROR: Crisis alert dispatcher error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            print(f"DEBUG: Crisis alert dispatcher started ({self.worker_id})")
+
+    def wake(self):
+        """Thread-safe: deliver newly queued alerts without waiting for the next poll."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "channels": {name: s.snapshot() for name, s in self.stats.items()},
+        }
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> CrisisAlertDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = CrisisAlertDispatcher()
+        return _dispatcher
+
+
+def wake_dispatcher():
+    if _dispatcher is not None:
+        _dispatcher.wake()
+
+
+def stats() -> dict:
+    dispatcher = get_dispatcher()
+    return {**dispatcher.snapshot(), "backlog": dispatcher.backlog()}
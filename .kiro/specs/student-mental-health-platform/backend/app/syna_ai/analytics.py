@@ -1,30 +1,119 @@
-from app.syna_ai.database import cursor
-
-def get_risk_distribution():
-    cursor.execute("""
-        SELECT risk_level, COUNT(*) 
-        FROM chats
-        GROUP BY risk_level
-    """)
+"""
+PSYNOVA Analytics Rollups
+Dashboard aggregates kept in small rollup tables, updated in the same
+transaction as every chats / moods insert, so reads never touch the base
+tables and cost the same however much history exists:
+
+- rollup_daily_risk:      (scope, day, risk_level) -> count
+- rollup_hourly_activity: (scope, day, hour)       -> count of chats rows
+- rollup_daily_mood:      (scope, day)             -> mood_sum, mood_count
+
+`scope` is a user id, or PLATFORM for the platform-wide totals. Days and
+hours are UTC, taken from the row's created_at.
+"""
+
+PLATFORM = "*"
+
+
+# ===============================
+# WRITE PATH (caller's transaction)
+# ===============================
+
+def record_chat(cursor, user_id: str, chat_id: int):
+    """Count a chats row (just inserted on this cursor) in the risk and activity rollups."""
+    for scope in (user_id, PLATFORM):
+        cursor.execute("""
+            INSERT INTO rollup_daily_risk (scope, day, risk_level, count)
+            SELECT ?, DATE(created_at), risk_level, 1 FROM chats WHERE id = ?
+            ON CONFLICT (scope, day, risk_level) DO UPDATE SET count = count + 1
+        """, (scope, chat_id))
+        cursor.execute("""
+            INSERT INTO rollup_hourly_activity (scope, day, hour, count)
+            SELECT ?, DATE(created_at), CAST(STRFTIME('%H', created_at) AS INTEGER), 1 FROM chats WHERE id = ?
+            ON CONFLICT (scope, day, hour) DO UPDATE SET count = count + 1
+        """, (scope, chat_id))
+
+
+def record_mood(cursor, user_id: str, mood_id: int):
+    """Add a moods row (just inserted on this cursor) to the daily mood rollup."""
+    for scope in (user_id, PLATFORM):
+        cursor.execute("""
+            INSERT INTO rollup_daily_mood (scope, day, mood_sum, mood_count)
+            SELECT ?, DATE(created_at), mood_score, 1 FROM moods WHERE id = ?
+            ON CONFLICT (scope, day) DO UPDATE
+                SET mood_sum = mood_sum + excluded.mood_sum, mood_count = mood_count + 1
+        """, (scope, mood_id))
+
+
+def rebuild_rollups(cursor):
+    """
+    Recompute every rollup from the base tables and the chat archive
+    (backfill / repair; full scan, archived blocks included).
+    """
+    from app.syna_ai.archive import iter_archive
+
+    # Archived chats (archive.py) are staged so the same queries count them
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rebuild_archived_chats (user_id TEXT, created_at TEXT, risk_level TEXT)")
+    cursor.execute("DELETE FROM rebuild_archived_chats")
+    for user_id, rows in iter_archive(cursor):
+        cursor.executemany(
+            "INSERT INTO rebuild_archived_chats (user_id, created_at, risk_level) VALUES (?, ?, ?)",
+            [(user_id, row[1], row[4]) for row in rows]
+        )
+    all_chats = """(SELECT user_id, created_at, risk_level FROM chats WHERE user_id IS NOT NULL
+                    UNION ALL SELECT user_id, created_at, risk_level FROM rebuild_archived_chats)"""
+
+    cursor.execute("DELETE FROM rollup_daily_risk")
+    cursor.execute("DELETE FROM rollup_hourly_activity")
+    cursor.execute("DELETE FROM rollup_daily_mood")
+    for scope in ("user_id", "?"):
+        params = () if scope == "user_id" else (PLATFORM,)
+        cursor.execute(f"""
+            INSERT INTO rollup_daily_risk (scope, day, risk_level, count)
+            SELECT {scope}, DATE(created_at), risk_level, COUNT(*) FROM {all_chats}
+            GROUP BY 1, 2, 3
+        """, params)
+        cursor.execute(f"""
+            INSERT INTO rollup_hourly_activity (scope, day, hour, count)
+            SELECT {scope}, DATE(created_at), CAST(STRFTIME('%H', created_at) AS INTEGER), COUNT(*) FROM {all_chats}
+            GROUP BY 1, 2, 3
+        """, params)
+        cursor.execute(f"""
+            INSERT INTO rollup_daily_mood (scope, day, mood_sum, mood_count)
+            SELECT {scope}, DATE(created_at), SUM(mood_score), COUNT(*) FROM moods
+            WHERE user_id IS NOT NULL GROUP BY 1, 2
+        """, params)
+    cursor.execute("DROP TABLE rebuild_archived_chats")
+
+
+# ===============================
+# READ PATH (rollups only)
+# ===============================
+
+def get_risk_distribution(cursor, scope: str, since_day: str) -> dict:
+    """{risk_level: count} for days >= since_day ("YYYY-MM-DD")."""
+    cursor.execute(
+        "SELECT risk_level, SUM(count) FROM rollup_daily_risk WHERE scope = ? AND day >= ? GROUP BY risk_level",
+        (scope, since_day)
+    )
     return dict(cursor.fetchall())
 
 
-def get_mood_trend():
-    cursor.execute("""
-        SELECT DATE(created_at), AVG(mood_score)
-        FROM moods
-        GROUP BY DATE(created_at)
-        ORDER BY DATE(created_at)
-    """)
+def get_mood_trend(cursor, scope: str, since_day: str) -> list:
+    """[(day, average mood)] in day order."""
+    cursor.execute(
+        "SELECT day, ROUND(1.0 * mood_sum / mood_count, 2) FROM rollup_daily_mood "
+        "WHERE scope = ? AND day >= ? ORDER BY day",
+        (scope, since_day)
+    )
     return cursor.fetchall()
 
 
-def get_peak_hours():
-    cursor.execute("""
-        SELECT STRFTIME('%H', created_at) AS hour, COUNT(*)
-        FROM chats
-        GROUP BY hour
-        ORDER BY COUNT(*) DESC
-        LIMIT 5
-    """)
+def get_peak_hours(cursor, scope: str, since_day: str, top: int = 5) -> list:
+    """[(hour, chats)] for the busiest UTC hours, busiest first."""
+    cursor.execute(
+        "SELECT hour, SUM(count) AS total FROM rollup_hourly_activity WHERE scope = ? AND day >= ? "
+        "GROUP BY hour ORDER BY total DESC, hour LIMIT ?",
+        (scope, since_day, top)
+    )
     return cursor.fetchall()
@@ -0,0 +1,252 @@
+"""
+PSYNOVA Chat Archive
+Moves old chats rows out of syna_internal.db into compressed per-month
+segment files, keeping the live table (and its page cache footprint) small.
+
+- archive_old_chats() takes every complete calendar month older than
+  ARCHIVE_AFTER_DAYS and writes it as one segment file in the archive
+  directory: one compressed block per user, rows newest first.
+- chat_archive_index maps (user_id, month) to the block's segment file,
+  offset and length, so reading a user's month touches only their block.
+- The segment is fsynced and renamed into place before the index rows are
+  written and the live rows deleted (one transaction); a crash in between
+  leaves an unreferenced file and no lost rows.
+- extend_page() continues a history page into the archive once it runs past
+  the live rows, with the same (created_at, id) cursors.
+
+Blocks are zstd-compressed when the optional `zstandard` package is
+installed (ARCHIVE_CODEC "auto" / "zstd"), zlib otherwise. The codec is
+recorded per block. Analytics rollups already count archived rows, and
+analytics.rebuild_rollups() and tools/migrate_to_mongo.py read them back
+with iter_archive().
+"""
+
+import json
+import os
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from app.syna_ai.config import ARCHIVE_AFTER_DAYS, ARCHIVE_CODEC, ARCHIVE_DIR
+
+# Row layout inside a block; matches storage.HISTORY_COLUMNS["chats"]
+COLUMNS = ("id", "created_at", "role", "message", "risk_level")
+
+_block_cache = OrderedDict()
+_block_cache_lock = threading.Lock()
+_BLOCK_CACHE_SIZE = 64
+
+
+def archive_dir(db_path=None) -> Path:
+    """Segment directory for the database at `db_path` (default: database.DB_PATH)."""
+    if ARCHIVE_DIR:
+        return Path(ARCHIVE_DIR)
+    if db_path is None:
+        from app.syna_ai import database
+        db_path = database.DB_PATH
+    return Path(db_path).parent / "syna_archive"
+
+
+# ===============================
+# CODECS
+# ===============================
+
+def _codec() -> str:
+    if ARCHIVE_CODEC in ("auto", "zstd"):
+        try:
+            import zstandard  # noqa: F401
+            return "zstd"
+        except ImportError:
+            if ARCHIVE_CODEC == "zstd":
+                print("WARNING: zstandard is not installed; archiving with zlib")
+    return "zlib"
+
+
+def _compress(codec: str, raw: bytes) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    return zlib.compress(raw, 9)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+# ===============================
+# ARCHIVAL JOB
+# ===============================
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}-01"
+
+
+def _write_segment(month: str, blocks: list, codec: str) -> tuple:
+    """Write [(user_id, rows)] to a new segment file; returns (file name, [(user_id, offset, length, rows)])."""
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"chats-{month}-{uuid.uuid4().hex[:8]}.seg"
+    entries, offset = [], 0
+    tmp = directory / (name + ".tmp")
+    with open(tmp, "wb") as f:
+        for user_id, rows in blocks:
+            data = _compress(codec, json.dumps(rows, separators=(",", ":")).encode())
+            f.write(data)
+            entries.append((user_id, offset, len(data), rows))
+            offset += len(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, directory / name)
+    return name, entries
+
+
+def _archive_month(conn, cursor, month: str, codec: str) -> int:
+    cursor.execute(
+        f"""SELECT user_id, {', '.join(COLUMNS)} FROM chats
+            WHERE created_at >= ? AND created_at < ? AND user_id IS NOT NULL
+            ORDER BY user_id, created_at DESC, id DESC""",
+        (f"{month}-01", _next_month(month))
+    )
+    blocks = []
+    for user_id, *row in cursor.fetchall():
+        if not blocks or blocks[-1][0] != user_id:
+            blocks.append((user_id, []))
+        blocks[-1][1].append(row)
+    if not blocks:
+        return 0
+
+    segment, entries = _write_segment(month, blocks, codec)
+    ids = [(row[0],) for _, _, _, rows in entries for row in rows]
+    cursor.executemany(
+        """INSERT INTO chat_archive_index
+           (user_id, month, segment, block_offset, block_length, codec, row_count,
+            newest_created_at, newest_id, oldest_created_at, oldest_id)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(user_id, month, segment, offset, length, codec, len(rows),
+          str(rows[0][1]), rows[0][0], str(rows[-1][1]), rows[-1][0])
+         for user_id, offset, length, rows in entries]
+    )
+    cursor.executemany("DELETE FROM chat_embeddings WHERE chat_id = ?", ids)
+    cursor.executemany("DELETE FROM chats WHERE id = ?", ids)
+    conn.commit()
+    print(f"DEBUG: Archived {len(ids)} chats from {month} to {segment} ({len(entries)} users, {codec})")
+    return len(ids)
+
+
+def archive_old_chats(older_than_days: int = None, now: datetime = None) -> dict:
+    """
+    Archive every complete month before (now - older_than_days), one
+    transaction per month. Returns {month: rows archived}.
+    """
+    from app.syna_ai.database import get_db_context
+
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    now = now or datetime.now(timezone.utc)
+    cutoff = _month_start(now - timedelta(days=days)).strftime("%Y-%m-%d")
+    codec = _codec()
+
+    archived = {}
+    with get_db_context() as (conn, cursor):
+        cursor.execute(
+            "SELECT DISTINCT STRFTIME('%Y-%m', created_at) FROM chats WHERE created_at < ? AND user_id IS NOT NULL",
+            (cutoff,)
+        )
+        for (month,) in sorted(cursor.fetchall()):
+            archived[month] = _archive_month(conn, cursor, month, codec)
+    return archived
+
+
+# ===============================
+# READ PATH
+# ===============================
+
+def _load_block(path: Path, offset: int, length: int, codec: str) -> list:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        rows = json.loads(_decompress(codec, f.read(length)))
+    return [tuple(row) for row in rows]
+
+
+def _read_block(segment: str, offset: int, length: int, codec: str) -> list:
+    key = (segment, offset)
+    with _block_cache_lock:
+        rows = _block_cache.get(key)
+        if rows is not None:
+            _block_cache.move_to_end(key)
+            return rows
+    rows = _load_block(archive_dir() / segment, offset, length, codec)
+    with _block_cache_lock:
+        _block_cache[key] = rows
+        while len(_block_cache) > _BLOCK_CACHE_SIZE:
+            _block_cache.popitem(last=False)
+    return rows
+
+
+def read_archived(cursor, user_id: str, before, limit: int) -> list:
+    """Up to `limit` archived rows older than `before` ((created_at, id) or None), newest first."""
+    if before is None:
+        cursor.execute(
+            """SELECT segment, block_offset, block_length, codec FROM chat_archive_index WHERE user_id = ?
+               ORDER BY month DESC, newest_created_at DESC, newest_id DESC""",
+            (user_id,)
+        )
+    else:
+        cursor.execute(
+            """SELECT segment, block_offset, block_length, codec FROM chat_archive_index
+               WHERE user_id = ? AND (oldest_created_at, oldest_id) < (?, ?)
+               ORDER BY month DESC, newest_created_at DESC, newest_id DESC""",
+            (user_id, str(before[0]), before[1])
+        )
+    rows = []
+    for segment, offset, length, codec in cursor.fetchall():
+        block = _read_block(segment, offset, length, codec)
+        if before is not None:
+            block = [r for r in block if (str(r[1]), r[0]) < (str(before[0]), before[1])]
+        rows.extend(block[:limit - len(rows)])
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def iter_archive(cursor, directory: Path = None):
+    """
+    Every archived block as (user_id, rows newest first), in index order.
+    For full passes (rollup rebuilds, exports): bypasses the block cache, and
+    yields nothing if the archive index has not been created yet.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chat_archive_index'")
+    if cursor.fetchone() is None:
+        return
+    directory = directory or archive_dir()
+    # Fetched up front so callers can use the same cursor while iterating
+    cursor.execute(
+        "SELECT user_id, segment, block_offset, block_length, codec FROM chat_archive_index ORDER BY rowid"
+    )
+    for user_id, segment, offset, length, codec in cursor.fetchall():
+        yield user_id, _load_block(directory / segment, offset, length, codec)
+
+
+def extend_page(cursor, user_id: str, rows: list, after, limit: int) -> tuple:
+    """
+    Fill a chats page that ran out of live rows from the archive.
+    (rows, next_cursor); `after` is the decoded request cursor or None.
+    """
+    from app.syna_ai import pagination
+
+    before = (rows[-1][1], rows[-1][0]) if rows else after
+    rows = list(rows) + read_archived(cursor, user_id, before, limit + 1 - len(rows))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, pagination.encode_cursor(rows[-1][1], rows[-1][0])
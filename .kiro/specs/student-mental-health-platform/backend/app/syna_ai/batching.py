@@ -0,0 +1,143 @@
+"""
+PSYNOVA Micro-Batching
+Collects concurrent inference calls into small batches so each forward pass
+serves several chat turns instead of one.
+"""
+
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Any, Callable, List
+
+
+class BatchMetrics:
+    """Batch-size distribution and queue-wait statistics for one batcher."""
+
+    def __init__(self, window: int = 1000):
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.size_histogram: Counter = Counter()
+        self._waits_ms: deque = deque(maxlen=window)
+        self.max_wait_ms = 0.0
+
+    def record(self, batch_size: int, waits_ms: List[float]):
+        self.batches += 1
+        self.items += batch_size
+        self.size_histogram[batch_size] += 1
+        self._waits_ms.extend(waits_ms)
+        self.max_wait_ms = max(self.max_wait_ms, *waits_ms)
+
+    def snapshot(self) -> dict:
+        waits = sorted(self._waits_ms)
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.size_histogram.items())},
+            "queue_wait_ms": {
+                "mean": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p50": round(waits[len(waits) // 2], 3) if waits else 0.0,
+                "p95": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+                "max": round(self.max_wait_ms, 3),
+            },
+        }
+
+
+class MicroBatcher:
+    """
+    Async front-end for a batch function.
+
+    `submit(item)` enqueues one item and resolves with its own result once the
+    batch it landed in has run. A batch is flushed when `max_batch_size` items
+    are waiting or `max_wait_ms` has passed since the first item arrived.
+    `batch_fn` takes a list of items and returns a list of results in the same
+    order; it runs in a worker thread so the event loop is never blocked.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 10.0, name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self.metrics = BatchMetrics()
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(), name=f"{self.name}-worker")
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item for the next batch and wait for its result."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                # Window closed: still take anything already queued
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            self.metrics.record(len(batch), [(started - enq) * 1000 for _, _, enq in batch])
+            try:
+                results = await asyncio.to_thread(self.batch_fn, [item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn returned {len(results)} results for {len(batch)} items"
+                    )
+            except Exception as e:
+                self.metrics.errors += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                # Caller may have been cancelled while the batch was running
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            **self.metrics.snapshot(),
+        }
+
+    async def close(self):
+        """Stop the worker; pending callers receive CancelledError."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                future.cancel()
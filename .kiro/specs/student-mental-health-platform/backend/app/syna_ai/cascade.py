@@ -0,0 +1,90 @@
+"""
+PSYNOVA Risk Cascade
+Confidence-gated ordering of the Syna risk detectors.
+
+Stage 1 (cheap): keyword rule, XGBoost probabilities, MiniLM anchor similarity.
+Stage 2 (expensive): BERT/DistilBERT ensemble and temporal LSTM.
+
+Stage 2 is skipped when stage 1 already determines the pipeline's answer:
+- rule_high / xgb_high: a cheap detector says high, and max() can't go higher
+- cheap_low: XGBoost is confidently low, the message is far from every
+  high-risk anchor and the user has no recent high-risk history
+Everything else escalates to the full pipeline.
+"""
+
+import threading
+from app.syna_ai.config import (
+    CASCADE_MAX_HIST_RISK, CASCADE_SEMANTIC_CLEAR, CASCADE_XGB_LOW_CONFIDENCE,
+)
+
+OUTCOMES = ("rule_high", "xgb_high", "cheap_low", "escalated")
+
+
+def default_thresholds() -> dict:
+    return {
+        "xgb_low_confidence": CASCADE_XGB_LOW_CONFIDENCE,
+        "semantic_clear": CASCADE_SEMANTIC_CLEAR,
+        "max_hist_risk": CASCADE_MAX_HIST_RISK,
+    }
+
+
+def cheap_stage(text: str, hist_risk: float = 0.0, mood_trend: float = 7.0) -> dict:
+    """Run the stage 1 detectors. Results are reused by stage 2 when escalating."""
+    from app.syna_ai import inference
+    from app.syna_ai.models.risk_model import detect_risk_rule
+
+    probs = inference.xgb_probabilities(text, hist_risk=hist_risk, mood_trend=mood_trend)
+    semantic_embedding = inference.encode_semantic(text)
+    semantic_risk, info = inference.detect_semantic_risk(text, text_embedding=semantic_embedding)
+    return {
+        "rule": detect_risk_rule(text),
+        "xgb_probs": probs,
+        "xgb": max(range(len(probs)), key=lambda i: probs[i]),
+        "semantic": semantic_risk,
+        "semantic_score": info["similarity"],
+        "semantic_embedding": semantic_embedding,
+    }
+
+
+def decide(cheap: dict, hist_risk: float, thresholds: dict = None):
+    """
+    Returns (final_risk, outcome). final_risk is None when the expensive
+    stage has to run.
+    """
+    t = thresholds or default_thresholds()
+    if cheap["rule"] == 2:
+        return 2, "rule_high"
+    if cheap["xgb"] == 2:
+        return 2, "xgb_high"
+    if (
+        cheap["xgb_probs"][0] >= t["xgb_low_confidence"]
+        and cheap["semantic_score"] < t["semantic_clear"]
+        and hist_risk <= t["max_hist_risk"]
+    ):
+        return 0, "cheap_low"
+    return None, "escalated"
+
+
+# ===============================
+# SHORT-CIRCUIT COUNTERS
+# ===============================
+
+_lock = threading.Lock()
+_counts = dict.fromkeys(OUTCOMES, 0)
+
+
+def record(outcome: str):
+    with _lock:
+        _counts[outcome] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        counts = dict(_counts)
+    total = sum(counts.values())
+    return {
+        "turns": total,
+        "counts": counts,
+        "short_circuit_rate": round((total - counts["escalated"]) / total, 4) if total else 0.0,
+        "thresholds": default_thresholds(),
+    }
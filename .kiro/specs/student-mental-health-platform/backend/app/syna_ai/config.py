@@ -8,3 +8,109 @@ MODELS_DIR = os.path.join(BASE_DIR, "trained_models")
 
 # Gemini API Key (should be in .env)
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+# Micro-batching for the BERT/DistilBERT ensemble
+# Concurrent chat turns are collected for up to MAX_WAIT_MS (or until MAX_SIZE
+# messages are queued) and run as one padded batch per model.
+BATCH_MAX_WAIT_MS = float(os.environ.get("SYNA_BATCH_MAX_WAIT_MS", "10"))
+BATCH_MAX_SIZE = int(os.environ.get("SYNA_BATCH_MAX_SIZE", "16"))
+
+# Shared encode stage
+# Reuse the fine-tuned distilbert-risk backbone as the temporal feature
+# extractor instead of loading distilbert-base-uncased separately.
+SHARE_DISTIL_BACKBONE = os.environ.get("SYNA_SHARE_DISTIL_BACKBONE", "0") == "1"
+
+# Temporal LSTM mode
+# "window":    re-run the LSTM over the last 5 messages every turn (default)
+# "streaming": carry (h_n, c_n) per conversation and advance one step per message
+TEMPORAL_MODE = os.environ.get("SYNA_TEMPORAL_MODE", "window")
+# Streaming only: re-prime the state from the recent window after this many
+# steps (0 = never reset)
+TEMPORAL_RESET_STEPS = int(os.environ.get("SYNA_TEMPORAL_RESET_STEPS", "0"))
+
+# Transformer inference backend
+# "eager":     fp32 PyTorch (default)
+# "int8":      PyTorch with dynamic INT8 quantization of Linear layers
+# "onnx":      ONNX Runtime, fp32 graphs from tools/export_onnx.py
+# "onnx-int8": ONNX Runtime, dynamically quantized graphs
+INFERENCE_BACKEND = os.environ.get("SYNA_INFERENCE_BACKEND", "eager")
+ONNX_DIR = os.path.join(MODELS_DIR, "onnx")
+ONNX_THREADS = int(os.environ.get("SYNA_ONNX_THREADS", "1"))
+
+# Shared model server (python -m app.syna_ai.model_server)
+# "unix:/path/to.sock" or "tcp:127.0.0.1:8790". Empty = load models in-process.
+MODEL_SERVER_ADDRESS = os.environ.get("SYNA_MODEL_SERVER", "")
+MODEL_SERVER_WORKERS = int(os.environ.get("SYNA_MODEL_SERVER_WORKERS", "2"))
+# Max in-flight calls per model on the server
+MODEL_SERVER_CONCURRENCY = int(os.environ.get("SYNA_MODEL_SERVER_CONCURRENCY", "2"))
+MODEL_SERVER_TIMEOUT = float(os.environ.get("SYNA_MODEL_SERVER_TIMEOUT", "30"))
+
+# Confidence-gated risk cascade (see cascade.py)
+# Cheap detectors (rule, XGBoost, MiniLM similarity) run first; the BERT
+# ensemble and temporal LSTM only run when the cheap stage is not confident.
+CASCADE_ENABLED = os.environ.get("SYNA_CASCADE", "0") == "1"
+# Exit as low risk only if XGBoost P(low) is at least this...
+CASCADE_XGB_LOW_CONFIDENCE = float(os.environ.get("SYNA_CASCADE_XGB_LOW_CONFIDENCE", "0.85"))
+# ...the best MiniLM anchor similarity is below this...
+CASCADE_SEMANTIC_CLEAR = float(os.environ.get("SYNA_CASCADE_SEMANTIC_CLEAR", "0.5"))
+# ...and at most this share of the user's last 10 messages were high risk
+CASCADE_MAX_HIST_RISK = float(os.environ.get("SYNA_CASCADE_MAX_HIST_RISK", "0.0"))
+
+# Speculative Gemini generation (see speculation.py)
+# Start the reply as soon as the message is translated, assuming SPECULATIVE_RISK,
+# while risk detection runs. Discarded if the final risk differs.
+SPECULATIVE_LLM = os.environ.get("SYNA_SPECULATIVE_LLM", "0") == "1"
+SPECULATIVE_RISK = int(os.environ.get("SYNA_SPECULATIVE_RISK", "0"))
+
+# Gemini client (see llm_client.py)
+# One pooled HTTP/1.1 keep-alive client per API worker. GEMINI_BASE_URL can
+# point at tools/fake_llm_server.py for offline latency tests.
+GEMINI_BASE_URL = os.environ.get("SYNA_GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = os.environ.get("SYNA_GEMINI_MODEL", "gemini-2.5-flash")
+# Retried once with this model when the primary fails or times out ("" = off)
+GEMINI_FALLBACK_MODEL = os.environ.get("SYNA_GEMINI_FALLBACK_MODEL", "gemini-2.5-pro")
+LLM_TIMEOUT = float(os.environ.get("SYNA_LLM_TIMEOUT", "20"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("SYNA_LLM_CONNECT_TIMEOUT", "5"))
+# Max in-flight Gemini calls per API worker
+LLM_MAX_CONCURRENCY = int(os.environ.get("SYNA_LLM_MAX_CONCURRENCY", "8"))
+
+# Crisis alert delivery (see alert_dispatcher.py)
+ALERT_POLL_INTERVAL_S = float(os.environ.get("SYNA_ALERT_POLL_INTERVAL_S", "5"))
+ALERT_CHANNEL_TIMEOUT_S = float(os.environ.get("SYNA_ALERT_CHANNEL_TIMEOUT_S", "30"))
+# Retry with exponential backoff (base * 2^(attempt-1), capped); give up after MAX_ATTEMPTS
+ALERT_MAX_ATTEMPTS = int(os.environ.get("SYNA_ALERT_MAX_ATTEMPTS", "8"))
+ALERT_BACKOFF_BASE_S = float(os.environ.get("SYNA_ALERT_BACKOFF_BASE_S", "2"))
+ALERT_BACKOFF_MAX_S = float(os.environ.get("SYNA_ALERT_BACKOFF_MAX_S", "300"))
+# A claimed delivery whose worker died is retried after this long
+ALERT_LEASE_S = float(os.environ.get("SYNA_ALERT_LEASE_S", "120"))
+
+# Syna storage backend (see storage.py): "sqlite" or "mongo"
+STORAGE_BACKEND = os.environ.get("SYNA_STORAGE", "sqlite").lower()
+
+# SQLite (Syna storage) connection settings, applied to every pooled connection
+SQLITE_SYNCHRONOUS = os.environ.get("SYNA_SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_MB = int(os.environ.get("SYNA_SQLITE_MMAP_MB", "256"))
+SQLITE_CACHE_MB = int(os.environ.get("SYNA_SQLITE_CACHE_MB", "16"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SYNA_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Group-commit writer (see db_writer.py): chat turn writes arriving within
+# DB_WRITE_WAIT_MS of each other share one transaction, up to DB_WRITE_BATCH_SIZE
+DB_WRITE_BATCH_SIZE = int(os.environ.get("SYNA_DB_WRITE_BATCH_SIZE", "64"))
+DB_WRITE_WAIT_MS = float(os.environ.get("SYNA_DB_WRITE_WAIT_MS", "2"))
+
+# Per-user feature store: max user records kept in memory per API worker
+FEATURE_CACHE_SIZE = int(os.environ.get("SYNA_FEATURE_CACHE_SIZE", "10000"))
+
+# Chat archive (see archive.py): complete months older than ARCHIVE_AFTER_DAYS
+# move to compressed segment files ("" dir = syna_archive/ next to the database)
+ARCHIVE_AFTER_DAYS = int(os.environ.get("SYNA_ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_DIR = os.environ.get("SYNA_ARCHIVE_DIR", "")
+# "auto" (zstd if the zstandard package is installed), "zstd" or "zlib"
+ARCHIVE_CODEC = os.environ.get("SYNA_ARCHIVE_CODEC", "auto").lower()
+
+# History endpoints: keyset page size (see pagination.py)
+HISTORY_PAGE_SIZE = int(os.environ.get("SYNA_HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.environ.get("SYNA_HISTORY_MAX_PAGE_SIZE", "200"))
+
+# Analytics endpoints: longest window (days) a dashboard may request
+ANALYTICS_MAX_DAYS = int(os.environ.get("SYNA_ANALYTICS_MAX_DAYS", "365"))
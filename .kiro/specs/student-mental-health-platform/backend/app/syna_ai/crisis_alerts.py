@@ -3,23 +3,31 @@ PSYNOVA Crisis Alert System
 Sends backend notifications when a high-risk crisis is detected.
 """
 
-from app.syna_ai.database import get_db
+import time
+from app.syna_ai.database import get_db_context
 from datetime import datetime
 
 
-def send_crisis_alerts(user_id: str, role: str, user_message: str, risk_source: str) -> int:
+def enqueue_crisis_alert(cursor, user_id: str, role: str, user_message: str, risk_source: str) -> int:
     """
-    Log a crisis event and dispatch alerts to all relevant parties.
+    Log a crisis event and queue one delivery per channel in the outbox
+    (crisis_alert_deliveries). Runs on the caller's cursor so it commits
+    atomically with the chat row; alert_dispatcher.py does the sending.
     """
-    conn, cursor = get_db()
     # 1. Log crisis event to database with user isolation
     cursor.execute(
         "INSERT INTO crisis_alerts (user_id, role, message, risk_source) VALUES (?, ?, ?, ?)",
         (user_id, role, user_message, risk_source)
     )
-    conn.commit()
     alert_id = cursor.lastrowid
 
+    # 2. Queue alerts to all parties
+    now = time.time()
+    cursor.executemany(
+        "INSERT INTO crisis_alert_deliveries (alert_id, channel, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+        [(alert_id, channel, now, now) for channel in CHANNELS]
+    )
+
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"\n{'='*60}")
     print(f"!!! CRISIS ALERT TRIGGERED - ID: {alert_id}")
@@ -27,26 +35,20 @@ def send_crisis_alerts(user_id: str, role: str, user_message: str, risk_source:
     print(f"Source: {risk_source}")
     print(f"Message: {user_message[:100]}{'...' if len(user_message) > 100 else ''}")
     print(f"{'='*60}")
+    return alert_id
 
-    # 2. Dispatch alerts to all parties
-    notify_psychologist(alert_id, user_message)
-    notify_psynova_team(alert_id, user_message)
-    notify_parents(alert_id, user_message)
-    notify_institution(alert_id, user_message)
 
-    # 3. Mark all alerts as sent in DB
-    cursor.execute(
-        """UPDATE crisis_alerts 
-           SET alerted_psychologist = 1, 
-               alerted_psynova_team = 1, 
-               alerted_parents = 1, 
-               alerted_institution = 1 
-           WHERE id = ?""",
-        (alert_id,)
-    )
-    conn.commit()
+def send_crisis_alerts(user_id: str, role: str, user_message: str, risk_source: str) -> int:
+    """
+    Standalone variant of enqueue_crisis_alert with its own transaction.
+    Wakes the dispatcher so delivery starts immediately.
+    """
+    with get_db_context() as (conn, cursor):
+        alert_id = enqueue_crisis_alert(cursor, user_id, role, user_message, risk_source)
+        conn.commit()
 
-    print(f"DONE: All crisis alerts dispatched for alert ID: {alert_id}\n")
+    from app.syna_ai.alert_dispatcher import wake_dispatcher
+    wake_dispatcher()
     return alert_id
 
 
@@ -76,3 +78,12 @@ def notify_institution(alert_id: int, message: str):
     """Send alert to the user's educational institution."""
     # TODO: Integrate actual notification service
     print(f"  [EMAIL] Alert -> Institution (alert_id: {alert_id}) - SENT (placeholder)")
+
+
+# Channel name -> sender. Each channel has an alerted_<name> flag on crisis_alerts.
+CHANNELS = {
+    "psychologist": notify_psychologist,
+    "psynova_team": notify_psynova_team,
+    "parents": notify_parents,
+    "institution": notify_institution,
+}
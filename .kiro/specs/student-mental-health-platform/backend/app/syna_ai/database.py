@@ -3,6 +3,7 @@ import threading
 from pathlib import Path
 import os
 from contextlib import contextmanager
+from app.syna_ai.config import SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_MB, SQLITE_MMAP_MB, SQLITE_SYNCHRONOUS
 
 # Store DB in the syna_ai folder
 DB_PATH = Path(os.path.dirname(__file__)) / "syna_internal.db"
@@ -11,47 +12,267 @@ _db_conn = None
 _db_cursor = None
 _db_lock = threading.RLock()
 
+# Connection pool: one reusable connection per (thread, database file).
+# asyncio.to_thread workers are long-lived, so storage calls reuse them.
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pool_connections = []
+_pool_generation = 0
+_schema_ready = set()
 
-def _migrate_schema(cursor):
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+# ===============================
+# VERSIONED MIGRATIONS
+# ===============================
+# Applied in order, once each, and recorded in schema_version. Append new
+# migrations to MIGRATIONS; never edit or reorder one that has shipped.
+
+def _columns(cursor, table: str) -> set:
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+
+
+def _m001_user_columns(cursor):
+    """Role-based isolation columns on tables created before they existed."""
+    for table, column in (
+        ("chats", "user_id"), ("chats", "role"),
+        ("moods", "user_id"),
+        ("journals", "user_id"),
+        ("crisis_alerts", "user_id"), ("crisis_alerts", "role"),
+    ):
+        if column not in _columns(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+
+
+def _m002_user_indexes(cursor):
     """
-    Add new role-based columns to existing tables without data loss.
-    ALTER TABLE ADD COLUMN is a no-op if the column already exists (handled via try/except).
+    Every per-user query filters on user_id and orders by created_at.
+    chats also carries id (newest-first tie-break) and risk_level, so the
+    risk-history and context queries are answered from the index alone.
     """
-    migrations = [
-        # chats: add user_id and role columns
-        "ALTER TABLE chats ADD COLUMN user_id TEXT",
-        "ALTER TABLE chats ADD COLUMN role TEXT",
-        # moods: add user_id
-        "ALTER TABLE moods ADD COLUMN user_id TEXT",
-        # journals: add user_id
-        "ALTER TABLE journals ADD COLUMN user_id TEXT",
-        # crisis_alerts: add user_id and role
-        "ALTER TABLE crisis_alerts ADD COLUMN user_id TEXT",
-        "ALTER TABLE crisis_alerts ADD COLUMN role TEXT",
-    ]
-    for stmt in migrations:
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chats_user_created ON chats (user_id, created_at, id, risk_level)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_moods_user_created ON moods (user_id, created_at, mood_score)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_journals_user_created ON journals (user_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_crisis_alerts_user_created ON crisis_alerts (user_id, created_at)")
+
+
+def _m003_user_features(cursor):
+    """Incrementally maintained per-user model context (see feature_store.py)."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS user_features (
+        user_id TEXT PRIMARY KEY,
+        revision TEXT NOT NULL,
+        moods TEXT NOT NULL,
+        risks TEXT NOT NULL,
+        recent TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _m004_analytics_rollups(cursor):
+    """Daily risk / hourly activity / daily mood rollups (see analytics.py), backfilled once."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS rollup_daily_risk (
+        scope TEXT NOT NULL,
+        day TEXT NOT NULL,
+        risk_level TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (scope, day, risk_level)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS rollup_hourly_activity (
+        scope TEXT NOT NULL,
+        day TEXT NOT NULL,
+        hour INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (scope, day, hour)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS rollup_daily_mood (
+        scope TEXT NOT NULL,
+        day TEXT NOT NULL,
+        mood_sum INTEGER NOT NULL,
+        mood_count INTEGER NOT NULL,
+        PRIMARY KEY (scope, day)
+    )
+    """)
+    from app.syna_ai.analytics import rebuild_rollups
+    rebuild_rollups(cursor)
+
+
+def _m005_chat_archive_index(cursor):
+    """(user_id, month) -> compressed block in an archive segment file (see archive.py)."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS chat_archive_index (
+        user_id TEXT NOT NULL,
+        month TEXT NOT NULL,
+        segment TEXT NOT NULL,
+        block_offset INTEGER NOT NULL,
+        block_length INTEGER NOT NULL,
+        codec TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        newest_created_at TEXT NOT NULL,
+        newest_id INTEGER NOT NULL,
+        oldest_created_at TEXT NOT NULL,
+        oldest_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, month, segment)
+    )
+    """)
+
+
+def _m006_journal_search(cursor):
+    """FTS5 index over journals, kept in sync by triggers (see journal_search.py)."""
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS journals_fts USING fts5(
+        user_id, content,
+        content='journals', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS journals_fts_insert AFTER INSERT ON journals BEGIN
+        INSERT INTO journals_fts (rowid, user_id, content) VALUES (new.id, new.user_id, new.content);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS journals_fts_delete AFTER DELETE ON journals BEGIN
+        INSERT INTO journals_fts (journals_fts, rowid, user_id, content)
+        VALUES ('delete', old.id, old.user_id, old.content);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS journals_fts_update AFTER UPDATE ON journals BEGIN
+        INSERT INTO journals_fts (journals_fts, rowid, user_id, content)
+        VALUES ('delete', old.id, old.user_id, old.content);
+        INSERT INTO journals_fts (rowid, user_id, content) VALUES (new.id, new.user_id, new.content);
+    END
+    """)
+    # Index the entries written before the triggers existed
+    cursor.execute("INSERT INTO journals_fts (journals_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = [
+    (1, "Add user_id / role columns", _m001_user_columns),
+    (2, "Per-user (user_id, created_at) covering indexes", _m002_user_indexes),
+    (3, "Per-user feature store", _m003_user_features),
+    (4, "Analytics rollups", _m004_analytics_rollups),
+    (5, "Chat archive index", _m005_chat_archive_index),
+    (6, "Journal full-text search", _m006_journal_search),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(cursor) -> int:
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def _migrate_schema(cursor):
+    """Apply pending migrations, each in its own savepoint."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    current = schema_version(cursor)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        cursor.execute("SAVEPOINT syna_migration")
         try:
-            cursor.execute(stmt)
+            migrate(cursor)
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+            cursor.execute("RELEASE syna_migration")
         except Exception:
-            # Column already exists — skip silently
-            pass
+            cursor.execute("ROLLBACK TO syna_migration")
+            cursor.execute("RELEASE syna_migration")
+            raise
+        print(f"DEBUG: Applied Syna schema migration {version}: {description}")
+
+
+def _connect(path, check_same_thread: bool = True):
+    """Open a connection with the Syna pragmas applied."""
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread)
+    # WAL: readers don't block the writer; persisted in the database file
+    conn.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is durable across application crashes in WAL mode (only an OS
+    # crash / power loss can drop the last transactions)
+    synchronous = SQLITE_SYNCHRONOUS.upper() if SQLITE_SYNCHRONOUS.upper() in _SYNCHRONOUS_MODES else "NORMAL"
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    conn.execute(f"PRAGMA cache_size={-SQLITE_CACHE_MB * 1024}")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def init_db(path=None):
+    """Create tables and run migrations once per database file (called at startup)."""
+    path = str(path or DB_PATH)
+    with _pool_lock:
+        if path in _schema_ready:
+            return
+        conn = _connect(path)
+        try:
+            _init_db(conn.cursor())
+            conn.commit()
+        finally:
+            conn.close()
+        _schema_ready.add(path)
+
+
+def _pooled_connection():
+    path = str(DB_PATH)
+    conns = getattr(_local, "connections", None)
+    if conns is None or _local.generation != _pool_generation:
+        # First use on this thread, or the pool was closed since
+        conns = _local.connections = {}
+        _local.generation = _pool_generation
+    conn = conns.get(path)
+    if conn is None:
+        init_db(path)
+        conn = _connect(path)
+        conns[path] = conn
+        with _pool_lock:
+            _pool_connections.append(conn)
+    return conn
 
 
 @contextmanager
 def get_db_context():
     """
     Context manager for SQLite DB access.
-    Ensures that the connection and cursor are closed after use,
-    preventing resource leaks on the event loop.
+    Yields this thread's pooled connection and a fresh cursor. Work that
+    wasn't committed is rolled back on exit, so the next op starts clean.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = _pooled_connection()
+    cursor = conn.cursor()
     try:
-        # Ensure tables and migrations are up to date
-        _init_db(conn.cursor())
-        conn.commit()
-        yield conn, conn.cursor()
+        yield conn, cursor
     finally:
-        conn.close()
+        cursor.close()
+        if conn.in_transaction:
+            conn.rollback()
+
+
+def close_db_pool():
+    """Close every pooled connection (app shutdown). Threads reconnect on next use."""
+    global _pool_generation
+    with _pool_lock:
+        for conn in _pool_connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        _pool_connections.clear()
+        _pool_generation += 1
 
 
 def get_db():
@@ -62,10 +283,9 @@ def get_db():
     global _db_conn, _db_cursor
     with _db_lock:
         if _db_conn is None:
-            _db_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+            init_db()
+            _db_conn = _connect(DB_PATH, check_same_thread=False)
             _db_cursor = _db_conn.cursor()
-            _init_db(_db_cursor)
-            _db_conn.commit()
 
         return _db_conn, _db_cursor
 
@@ -116,4 +336,44 @@ def _init_db(cursor):
     )
     """)
 
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS chat_embeddings (
+        chat_id INTEGER PRIMARY KEY REFERENCES chats(id),
+        embedding BLOB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS temporal_state (
+        conversation_id TEXT PRIMARY KEY,
+        h_n BLOB NOT NULL,
+        c_n BLOB NOT NULL,
+        steps INTEGER NOT NULL DEFAULT 0,
+        last_chat_id INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Crisis alert outbox: one row per (alert, channel), drained by alert_dispatcher.py
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS crisis_alert_deliveries (
+        alert_id INTEGER NOT NULL REFERENCES crisis_alerts(id),
+        channel TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        claimed_by TEXT,
+        claimed_at REAL,
+        last_error TEXT,
+        latency_ms REAL,
+        delivered_at REAL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (alert_id, channel)
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_alert_deliveries_due ON crisis_alert_deliveries (status, next_attempt_at)"
+    )
+
     _migrate_schema(cursor)
@@ -0,0 +1,101 @@
+"""
+PSYNOVA Group-Commit Writer
+Chat turn writes from concurrent requests share one SQLite transaction.
+
+`await write_db_op(op)` queues `op(conn, cursor)` on a MicroBatcher. Each
+batch (up to DB_WRITE_BATCH_SIZE ops, or whatever arrived within
+DB_WRITE_WAIT_MS of the first) runs in one BEGIN IMMEDIATE ... COMMIT, so N
+concurrent turns cost one commit and one write-lock acquisition instead of N.
+Batches run one at a time, making this the single writer per API worker.
+
+- Each op runs inside its own SAVEPOINT: an op that raises is rolled back
+  alone and its caller gets the exception; the rest of the batch commits.
+- The awaitable resolves only after the COMMIT returns, i.e. once the write
+  is as durable as SQLITE_SYNCHRONOUS makes it.
+- Ops must not call conn.commit() / conn.rollback() themselves.
+"""
+
+import threading
+import time
+
+from app.syna_ai.batching import MicroBatcher
+from app.syna_ai.config import DB_WRITE_BATCH_SIZE, DB_WRITE_WAIT_MS
+from app.syna_ai.database import get_db_context
+
+_writer = None
+_writer_lock = threading.Lock()
+_commit_ms = []          # last 1000 group commits
+_failed_commits = 0
+
+
+class _Failed:
+    """An op's exception, carried through the batch result list."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def _commit_group(ops: list) -> list:
+    """Run ops in one transaction; one result (or _Failed) per op."""
+    global _failed_commits
+    results = []
+    with get_db_context() as (conn, cursor):
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for op in ops:
+                cursor.execute("SAVEPOINT write_op")
+                try:
+                    results.append(op(conn, conn.cursor()))
+                    cursor.execute("RELEASE write_op")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_op")
+                    cursor.execute("RELEASE write_op")
+                    results.append(_Failed(e))
+            started = time.perf_counter()
+            conn.commit()
+        except Exception as e:
+            # Nothing in the batch is durable; get_db_context rolls back
+            _failed_commits += 1
+            print(f"ERROR: Group commit of {len(ops)} writes failed: {e}")
+            return [_Failed(e)] * len(ops)
+    _commit_ms[:] = _commit_ms[-999:] + [(time.perf_counter() - started) * 1000]
+    return results
+
+
+def get_writer() -> MicroBatcher:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = MicroBatcher(
+                _commit_group, max_batch_size=DB_WRITE_BATCH_SIZE, max_wait_ms=DB_WRITE_WAIT_MS, name="db-writer"
+            )
+        return _writer
+
+
+async def write_db_op(op_func):
+    """Run a write op(conn, cursor) in the next group commit; returns its result once committed."""
+    result = await get_writer().submit(op_func)
+    if isinstance(result, _Failed):
+        raise result.error
+    return result
+
+
+def stats() -> dict:
+    writer = get_writer()
+    ordered = sorted(_commit_ms)
+    return {
+        **writer.stats(),
+        "failed_commits": _failed_commits,
+        "commit_ms": {
+            "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            "p95": round(ordered[int(len(ordered) * 0.95)], 3) if ordered else 0.0,
+        },
+    }
+
+
+async def close():
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        await writer.close()
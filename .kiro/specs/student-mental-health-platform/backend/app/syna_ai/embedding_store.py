@@ -0,0 +1,53 @@
+"""
+PSYNOVA Chat Embedding Store
+Keeps each chat message's 768-d CLS embedding (float16 blob) keyed by chats.id,
+so the temporal LSTM reads history features instead of re-encoding them.
+"""
+
+import numpy as np
+from app.syna_ai.database import get_db_context
+
+EMBEDDING_DIM = 768
+
+
+def pack_embedding(vec) -> bytes:
+    """768 floats -> 1536-byte float16 blob."""
+    return np.asarray(vec, dtype=np.float16).tobytes()
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+
+
+def save_embedding(cursor, chat_id: int, vec):
+    """Store the embedding for one chats row (caller commits)."""
+    cursor.execute(
+        "INSERT OR REPLACE INTO chat_embeddings (chat_id, embedding) VALUES (?, ?)",
+        (chat_id, pack_embedding(vec))
+    )
+
+
+def resolve_history_embeddings(rows: list, translate) -> list:
+    """
+    rows: (chat_id, message, embedding_blob_or_None), oldest first.
+
+    Returns one float32 vector per row. Rows written before the store existed
+    (or without an embedding, e.g. bot replies) are translated, encoded in a
+    single batch and written back, so each message is encoded at most once.
+    """
+    result = [unpack_embedding(blob) if blob is not None else None for _, _, blob in rows]
+    missing = [i for i, vec in enumerate(result) if vec is None]
+    if not missing:
+        return result
+
+    from app.syna_ai import inference
+    texts = [translate(rows[i][1]) for i in missing]
+    vectors = inference.embed_texts(texts)
+
+    with get_db_context() as (conn, cursor):
+        for i, vec in zip(missing, vectors):
+            save_embedding(cursor, rows[i][0], vec)
+            # Use the stored precision so results don't depend on cache state
+            result[i] = unpack_embedding(pack_embedding(vec))
+        conn.commit()
+    return result
@@ -0,0 +1,207 @@
+"""
+PSYNOVA Per-User Feature Store
+Rolling context for the risk models, maintained incrementally on every write
+to chats / moods instead of recomputed from the tables on every chat turn.
+
+One user_features row per user holds:
+- moods:  last MOOD_WINDOW mood scores (-> mood trend for XGBoost)
+- risks:  risk levels of the last RISK_WINDOW chats (-> high-risk frequency)
+- recent: last RECENT_WINDOW chats as [chat_id, text, is_english] (-> LSTM history)
+
+Records are cached in memory with write-through to SQLite. Each write stores
+a new random revision; a read checks the revision with one primary-key lookup,
+so a record changed by another API worker (or a rolled-back write) is reloaded.
+"""
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+
+from app.syna_ai.config import FEATURE_CACHE_SIZE
+from app.syna_ai.embedding_store import pack_embedding
+
+MOOD_WINDOW = 5
+RISK_WINDOW = 10
+RECENT_WINDOW = 4
+DEFAULT_MOOD_TREND = 7.0
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ===============================
+# CACHE
+# ===============================
+
+def _cache_get(user_id: str):
+    with _cache_lock:
+        record = _cache.get(user_id)
+        if record is not None:
+            _cache.move_to_end(user_id)
+        return record
+
+
+def _cache_put(user_id: str, record: dict):
+    with _cache_lock:
+        _cache[user_id] = record
+        _cache.move_to_end(user_id)
+        while len(_cache) > FEATURE_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate(user_id: str = None):
+    with _cache_lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+
+# ===============================
+# STORAGE
+# ===============================
+
+def _bootstrap(cursor, user_id: str) -> dict:
+    """Build a record from the base tables (first use for a user)."""
+    cursor.execute(
+        "SELECT mood_score FROM moods WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+        (user_id, MOOD_WINDOW)
+    )
+    moods = [r[0] for r in cursor.fetchall()][::-1]
+    cursor.execute(
+        "SELECT id, message, risk_level FROM chats WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+        (user_id, RISK_WINDOW)
+    )
+    chats = cursor.fetchall()[::-1]
+    return {
+        "moods": moods,
+        "risks": [r[2] for r in chats],
+        # Stored chat text is the raw (possibly non-English) input
+        "recent": [[r[0], r[1], False] for r in chats[-RECENT_WINDOW:]],
+        "embeddings": {},
+    }
+
+
+def _write(cursor, user_id: str, record: dict):
+    record["revision"] = uuid.uuid4().hex
+    cursor.execute(
+        """INSERT INTO user_features (user_id, revision, moods, risks, recent, updated_at)
+           VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+           ON CONFLICT(user_id) DO UPDATE SET revision = excluded.revision, moods = excluded.moods,
+               risks = excluded.risks, recent = excluded.recent, updated_at = excluded.updated_at""",
+        (user_id, record["revision"], json.dumps(record["moods"]), json.dumps(record["risks"]),
+         json.dumps(record["recent"]))
+    )
+    _cache_put(user_id, record)
+
+
+def _load_embeddings(cursor, record: dict):
+    """Fetch stored CLS embeddings for ring entries not yet known in memory."""
+    missing = [entry[0] for entry in record["recent"] if entry[0] not in record["embeddings"]]
+    if not missing:
+        return
+    cursor.execute(
+        f"SELECT chat_id, embedding FROM chat_embeddings WHERE chat_id IN ({','.join('?' * len(missing))})",
+        missing
+    )
+    record["embeddings"].update(cursor.fetchall())
+
+
+def get_features(cursor, user_id: str) -> dict:
+    """Current feature record for a user; bootstraps and persists it on first use."""
+    cursor.execute("SELECT revision FROM user_features WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone()
+    if row is None:
+        record = _bootstrap(cursor, user_id)
+        _write(cursor, user_id, record)
+    else:
+        record = _cache_get(user_id)
+        if record is None or record["revision"] != row[0]:
+            cursor.execute("SELECT revision, moods, risks, recent FROM user_features WHERE user_id = ?", (user_id,))
+            revision, moods, risks, recent = cursor.fetchone()
+            record = {
+                "revision": revision, "moods": json.loads(moods), "risks": json.loads(risks),
+                "recent": json.loads(recent), "embeddings": {},
+            }
+            _cache_put(user_id, record)
+    _load_embeddings(cursor, record)
+    return record
+
+
+def _for_write(cursor, user_id: str):
+    """(record, bootstrapped). Call after the new row is inserted, inside its transaction."""
+    cursor.execute("SELECT 1 FROM user_features WHERE user_id = ?", (user_id,))
+    if cursor.fetchone() is None:
+        # The bootstrap query already sees the row just inserted
+        return _bootstrap(cursor, user_id), True
+    record = get_features(cursor, user_id)
+    return {**record, "embeddings": dict(record["embeddings"])}, False
+
+
+def record_chat(cursor, user_id: str, chat_id: int, text: str, is_english: bool, risk_level: str,
+                embedding=None):
+    """
+    Append a chats row to the user's record (write-through). Runs on the
+    caller's cursor right after the INSERT, so it commits atomically with it.
+    `text` should be the English text the models saw, when there is one;
+    `embedding` is its CLS vector if the encode stage produced one.
+    """
+    record, bootstrapped = _for_write(cursor, user_id)
+    if bootstrapped:
+        # Replace the raw text of the new row with the caller's version
+        record["recent"] = [[cid, text, is_english] if cid == chat_id else [cid, t, e]
+                            for cid, t, e in record["recent"]]
+    else:
+        record["risks"] = (record["risks"] + [risk_level])[-RISK_WINDOW:]
+        record["recent"] = (record["recent"] + [[chat_id, text, is_english]])[-RECENT_WINDOW:]
+    if embedding is not None:
+        record["embeddings"][chat_id] = pack_embedding(embedding)
+    kept = {entry[0] for entry in record["recent"]}
+    record["embeddings"] = {cid: blob for cid, blob in record["embeddings"].items() if cid in kept}
+    _write(cursor, user_id, record)
+
+
+def record_mood(cursor, user_id: str, mood_score: int):
+    """Append a moods row to the user's record (write-through, same transaction)."""
+    record, bootstrapped = _for_write(cursor, user_id)
+    if not bootstrapped:
+        record["moods"] = (record["moods"] + [mood_score])[-MOOD_WINDOW:]
+    _write(cursor, user_id, record)
+
+
+# ===============================
+# MODEL CONTEXT
+# ===============================
+
+def mood_trend(record: dict) -> float:
+    moods = record["moods"]
+    return sum(moods) / len(moods) if moods else DEFAULT_MOOD_TREND
+
+
+def hist_risk(record: dict) -> float:
+    risks = record["risks"]
+    return sum(1 for r in risks if r == "high") / len(risks) if risks else 0.0
+
+
+def history_rows(record: dict, translate) -> list:
+    """
+    (chat_id, english_text, embedding_blob_or_None), oldest first, in the
+    shape embedding_store.resolve_history_embeddings expects. Texts are only
+    translated when there is no stored embedding, once per message; the
+    translation is persisted with the next write.
+    """
+    rows = []
+    for entry in record["recent"]:
+        chat_id, text, is_english = entry
+        blob = record["embeddings"].get(chat_id)
+        if blob is None and not is_english:
+            text = translate(text)
+            entry[1], entry[2] = text, True
+        rows.append((chat_id, text, blob))
+    return rows
+
+
+def already_english(text: str) -> str:
+    """`translate` for rows returned by history_rows()."""
+    return text
@@ -1,8 +1,5 @@
-import os
-from google import genai
-from google.genai import types
-
 from app.config import settings
+from app.syna_ai.llm_client import get_llm_client
 
 SYSTEM_PROMPT = """
 You are the PSYNOVA student mental-health companion.
@@ -102,26 +99,19 @@ LANGUAGE_MAP = {
     "en": "English"
 }
 
-def get_gemini_response(user_text: str, risk_level: int, language: str = "en") -> str:
-    api_key = settings.GEMINI_API_KEY
-    if not api_key:
-        return "I'm here with you. Please tell me more about how you're feeling."
-        
-    try:
-        client = genai.Client(api_key=api_key)
-        
-        # Get the full name of the detected language
-        lang_name = LANGUAGE_MAP.get(language, "English")
-        
-        # Determine the target instruction
-        target_instruction = f"""
+def build_prompt(user_text: str, risk_level: int, language: str = "en") -> str:
+    # Get the full name of the detected language
+    lang_name = LANGUAGE_MAP.get(language, "English")
+
+    # Determine the target instruction
+    target_instruction = f"""
 MIRROR THE USER'S LINGUISTIC STYLE EXACTLY.
 - If they use Romanized {lang_name} (Hinglish/Kanglish/etc.), you MUST reply using the same Romanized style.
 - If they use a mix of {lang_name} and English, you MUST mirror that natural code-switching.
 - Only use Native {lang_name} script if the user also uses Native script.
 """
 
-        prompt = f"""
+    return f"""
 ### LANGUAGE ENFORCEMENT RULE ###
 {target_instruction} 
 THE USER IS WRITING IN {lang_name} (OR A MIX). 
@@ -139,15 +129,21 @@ User risk level: {risk_level}
 ### FINAL REMINDER ###
 {target_instruction}
 """
-        print(f"DEBUG: Gemini Request - Lang: {lang_name} ({language})")
 
-        # Using gemini-2.5-flash as it was confirmed to work with this key and v1beta API
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-        )
 
-        return response.text.strip()
+async def get_gemini_response(user_text: str, risk_level: int, language: str = "en") -> str:
+    """
+    Reply from Gemini via the shared async client (llm_client.py): pooled
+    connections, per-call timeout, Flash -> Pro fallback. Never raises.
+    """
+    api_key = settings.GEMINI_API_KEY
+    if not api_key:
+        return "I'm here with you. Please tell me more about how you're feeling."
+        
+    try:
+        prompt = build_prompt(user_text, risk_level, language)
+        print(f"DEBUG: Gemini Request - Lang: {LANGUAGE_MAP.get(language, 'English')} ({language})")
+        return await get_llm_client(api_key).generate(prompt)
 
     except Exception as e:
         print(f"ERROR: Gemini error: {e}")
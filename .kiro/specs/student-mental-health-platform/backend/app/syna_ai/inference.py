@@ -0,0 +1,160 @@
+"""
+PSYNOVA Inference Facade
+Single entry point for Syna model calls from the API.
+
+Models run in-process by default. When SYNA_MODEL_SERVER is set, every call is
+forwarded to the shared model server (model_server.py) and the API worker never
+loads torch or any model weights. The async functions are the ones chat() calls
+on the event loop; their remote calls run in a thread so a worker keeps serving
+(and the server can batch) other turns while it waits.
+"""
+
+import asyncio
+import numpy as np
+from app.syna_ai.config import MODEL_SERVER_ADDRESS, MODEL_SERVER_TIMEOUT
+
+_client = None
+
+
+def is_remote() -> bool:
+    return bool(MODEL_SERVER_ADDRESS)
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from app.syna_ai.model_client import ModelServerClient
+        _client = ModelServerClient(MODEL_SERVER_ADDRESS, timeout=MODEL_SERVER_TIMEOUT)
+    return _client
+
+
+def _as_list(values):
+    if values is None or isinstance(values, list):
+        return values
+    return values.tolist()
+
+
+def encode_semantic(text: str):
+    """MiniLM sentence embedding only (cascade cheap stage)."""
+    if is_remote():
+        return get_client().call("encode_semantic", text=text)
+    from app.syna_ai.models.encoder import encode_semantic as local_encode_semantic
+    return local_encode_semantic(text)
+
+
+def encode_turn(text: str, semantic=None) -> dict:
+    """Shared encode stage (see models/encoder.py)."""
+    if is_remote():
+        encoded = get_client().call("encode_turn", text=text, semantic=_as_list(semantic))
+        encoded["cls"] = np.asarray(encoded["cls"], dtype=np.float32)
+        return encoded
+    from app.syna_ai.models.encoder import encode_turn as local_encode_turn
+    return local_encode_turn(text, semantic=semantic)
+
+
+def embed_texts(texts: list) -> list:
+    """CLS embeddings for history texts (temporal LSTM features)."""
+    if is_remote():
+        if not texts:
+            return []
+        # One request for the whole history rather than one batch window per text
+        vectors = get_client().call("embed_many", items=list(texts))
+        return [np.asarray(v, dtype=np.float32) for v in vectors]
+    from app.syna_ai.models.encoder import tokenize, cls_embeddings
+    return list(cls_embeddings([tokenize(t) for t in texts]))
+
+
+async def predict_ensemble(input_ids: list) -> int:
+    """BERT/DistilBERT ensemble on encoded ids, micro-batched with concurrent turns."""
+    if is_remote():
+        return await asyncio.to_thread(get_client().call, "ensemble", item=list(input_ids))
+    from app.syna_ai.models.ensemble_risk import ensemble_batcher
+    return await ensemble_batcher.submit(input_ids)
+
+
+async def predict_risk_ensemble(text: str) -> int:
+    if is_remote():
+        return await asyncio.to_thread(get_client().call, "predict_ensemble_text", text=text)
+    from app.syna_ai.models.ensemble_risk import predict_risk_ensemble as local_predict
+    return local_predict(text)
+
+
+async def predict_risk_xgb(text: str, hist_risk: float = 0.0, mood_trend: float = 7.0) -> int:
+    if is_remote():
+        return await asyncio.to_thread(
+            get_client().call, "predict_xgb", text=text, hist_risk=hist_risk, mood_trend=mood_trend
+        )
+    from app.syna_ai.models.ml_infer import predict_risk_xgb as local_predict
+    return local_predict(text, hist_risk=hist_risk, mood_trend=mood_trend)
+
+
+def xgb_probabilities(text: str, hist_risk: float = 0.0, mood_trend: float = 7.0) -> list:
+    """[p_low, p_medium, p_high] from the XGBoost classifier."""
+    if is_remote():
+        return get_client().call("xgb_probabilities", text=text, hist_risk=hist_risk, mood_trend=mood_trend)
+    from app.syna_ai.models.ml_infer import get_probabilities
+    return [float(x) for x in get_probabilities(text, hist_risk=hist_risk, mood_trend=mood_trend)]
+
+
+async def predict_temporal_risk_lstm(history_texts: list) -> int:
+    if is_remote():
+        return await asyncio.to_thread(get_client().call, "predict_temporal_texts", texts=history_texts)
+    from app.syna_ai.models.temporal_infer import predict_temporal_risk_lstm as local_predict
+    return local_predict(history_texts)
+
+
+async def predict_temporal_risk_from_embeddings(embeddings: list) -> int:
+    if is_remote():
+        return await asyncio.to_thread(
+            get_client().call, "predict_temporal", embeddings=[np.asarray(e).tolist() for e in embeddings]
+        )
+    from app.syna_ai.models.temporal_infer import predict_temporal_risk_from_embeddings as local_predict
+    return local_predict(embeddings)
+
+
+def advance_temporal_state(embeddings: list, state=None):
+    """Streaming LSTM step(s); returns (risk_class, (h_n, c_n) or None)."""
+    if is_remote():
+        risk, new_state = get_client().call(
+            "advance_temporal",
+            embeddings=[np.asarray(e).tolist() for e in embeddings],
+            state=None if state is None else [np.asarray(s).tolist() for s in state],
+        )
+        if new_state is not None:
+            new_state = tuple(np.asarray(s, dtype=np.float32) for s in new_state)
+        return risk, new_state
+    from app.syna_ai.models.temporal_infer import advance_temporal_state as local_advance
+    return local_advance(embeddings, state)
+
+
+def detect_semantic_risk(text: str, text_embedding=None):
+    """Blocking; for the cascade's cheap stage, which already runs in a thread."""
+    if is_remote():
+        risk, info = get_client().call("detect_semantic", text=text, embedding=_as_list(text_embedding))
+        return risk, info
+    from app.syna_ai.models.semantic_risk import detect_semantic_risk as local_detect
+    return local_detect(text, text_embedding=text_embedding)
+
+
+async def detect_semantic_risk_async(text: str, text_embedding=None):
+    if is_remote():
+        return await asyncio.to_thread(detect_semantic_risk, text, text_embedding)
+    return detect_semantic_risk(text, text_embedding)
+
+
+def stats() -> dict:
+    """Batching / serving metrics for GET /syna/metrics."""
+    if is_remote():
+        return {"model_server": get_client().call("health")}
+    from app.syna_ai.models.ensemble_risk import ensemble_batcher
+    return {"ensemble_batcher": ensemble_batcher.stats()}
+
+
+async def close():
+    """Release the server connection or flush the local batcher (app shutdown)."""
+    if is_remote():
+        if _client is not None:
+            _client.close()
+        return
+    from app.syna_ai.models.ensemble_risk import ensemble_batcher
+    await ensemble_batcher.close()
@@ -0,0 +1,82 @@
+"""
+PSYNOVA Journal Search
+Full-text search over a user's journals with SQLite FTS5.
+
+journals_fts is an external-content FTS5 index over journals (user_id,
+content), kept in sync by triggers (schema migration 6). The user id is an
+indexed column, so a search intersects the query terms' posting lists with
+the user's instead of scanning other users' entries.
+
+- Terms are ANDed; a trailing * makes a term a prefix ("anx*").
+- Results are ranked by bm25 over the content, best first.
+- Snippets are HTML-escaped with matches wrapped in <mark></mark>.
+- Pages continue with a (score, id) keyset cursor.
+"""
+
+import html
+import re
+
+from app.syna_ai import pagination
+
+_TERM = re.compile(r"\w+\*?", re.UNICODE)
+# Private-use sentinels, swapped for <mark> after escaping the snippet
+_OPEN, _CLOSE = "\ue000", "\ue001"
+SNIPPET_TOKENS = 12
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def match_expression(user_id: str, query: str) -> str:
+    """FTS5 MATCH expression for `query` within one user's entries. Raises ValueError if it has no terms."""
+    terms = _TERM.findall(query)
+    if not terms:
+        raise ValueError("search query has no searchable terms")
+    content = " AND ".join(_quote(t[:-1]) + "*" if t.endswith("*") else _quote(t) for t in terms[:16])
+    return f"user_id : {_quote(user_id)} AND content : ({content})"
+
+
+def highlight(snippet: str) -> str:
+    return html.escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def query_terms(query: str) -> list:
+    """Search terms without prefix markers (for backends without prefix search)."""
+    return [t.rstrip("*").lower() for t in _TERM.findall(query)][:16]
+
+
+def make_snippet(content: str, terms: list) -> str:
+    """snippet()-style excerpt for backends without one: SNIPPET_TOKENS words around the first match."""
+    words = content.split()
+    hits = [i for i, w in enumerate(words) if any(w.lower().strip(".,!?;:'\"()").startswith(t) for t in terms)]
+    start = max(0, (hits[0] if hits else 0) - SNIPPET_TOKENS // 4)
+    window = words[start:start + SNIPPET_TOKENS]
+    marked = [_OPEN + w + _CLOSE if start + i in hits else w for i, w in enumerate(window)]
+    text = ("..." if start else "") + " ".join(marked) + ("..." if start + SNIPPET_TOKENS < len(words) else "")
+    return highlight(text)
+
+
+def search(cursor, user_id: str, query: str, after: str = None, limit: int = 20) -> tuple:
+    """
+    (rows, next_cursor); rows are (id, created_at, snippet_html, score),
+    best match first. Raises ValueError for an empty query or bad cursor.
+    """
+    sql = """
+        SELECT j.id, j.created_at, snippet(journals_fts, 1, ?, ?, '...', ?), bm25(journals_fts, 0.0, 1.0) AS score
+        FROM journals_fts JOIN journals j ON j.id = journals_fts.rowid
+        WHERE journals_fts MATCH ? AND j.user_id = ?"""
+    # The user_id phrase narrows the index scan; the column check is the isolation
+    # boundary (a phrase can match inside a longer tokenized id, e.g. "a-b" in "a-b-c")
+    params = [_OPEN, _CLOSE, SNIPPET_TOKENS, match_expression(user_id, query), user_id]
+    if after:
+        score, row_id = pagination.decode_cursor(after, key_type=float)
+        sql += " AND (score > ? OR (score = ? AND j.id > ?))"
+        params += [score, score, row_id]
+    sql += " ORDER BY score, j.id LIMIT ?"
+    cursor.execute(sql, params + [limit + 1])
+    rows = [(r[0], str(r[1]), highlight(r[2]), r[3]) for r in cursor.fetchall()]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, pagination.encode_cursor(rows[-1][3], rows[-1][0])
@@ -0,0 +1,127 @@
+"""
+PSYNOVA LLM Client
+Long-lived async client for the Gemini generateContent REST API.
+
+- One httpx.AsyncClient per API worker, so TLS connections are kept alive
+  and reused across chat turns (genai.Client opened a new session per call).
+- Per-call timeouts; a timed-out or failed primary model falls back once to
+  GEMINI_FALLBACK_MODEL (Flash -> Pro by default).
+- A semaphore caps in-flight calls so a slow LLM can't pile up requests.
+- Fully async: cancelling the awaiting task aborts the HTTP request.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from app.syna_ai.config import (
+    GEMINI_BASE_URL, GEMINI_FALLBACK_MODEL, GEMINI_MODEL,
+    LLM_CONNECT_TIMEOUT, LLM_MAX_CONCURRENCY, LLM_TIMEOUT,
+)
+
+
+class LLMError(RuntimeError):
+    """Every model in the chain failed or timed out."""
+
+
+class GeminiClient:
+    def __init__(self, api_key: str, base_url: str = GEMINI_BASE_URL, model: str = GEMINI_MODEL,
+                 fallback_model: str = GEMINI_FALLBACK_MODEL, timeout: float = LLM_TIMEOUT,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.models = [m for m in (model, fallback_model) if m]
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self._http = None
+        self._semaphore = None
+        self._loop = None
+        self.stats = {"calls": 0, "fallbacks": 0, "timeouts": 0, "errors": 0, "in_flight": 0, "total_ms": 0.0}
+
+    def _ensure_started(self):
+        # Bound to the running loop; recreated if a different loop (e.g. tests) uses the client
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                headers={"x-goog-api-key": self.api_key},
+            )
+
+    async def _generate_once(self, model: str, prompt: str) -> str:
+        response = await self._http.post(
+            f"/v1beta/models/{model}:generateContent",
+            json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
+        )
+        response.raise_for_status()
+        candidates = response.json().get("candidates") or [{}]
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        text = "".join(p.get("text", "") for p in parts).strip()
+        if not text:
+            raise LLMError(f"{model} returned no text")
+        return text
+
+    async def generate(self, prompt: str) -> str:
+        self._ensure_started()
+        async with self._semaphore:
+            self.stats["in_flight"] += 1
+            started = time.perf_counter()
+            try:
+                last_error = None
+                for i, model in enumerate(self.models):
+                    if i > 0:
+                        self.stats["fallbacks"] += 1
+                        print(f"WARNING: Gemini {self.models[i - 1]} failed ({last_error}); falling back to {model}")
+                    try:
+                        # Hard per-attempt deadline on top of httpx's per-phase timeouts
+                        return await asyncio.wait_for(self._generate_once(model, prompt), timeout=self.timeout)
+                    except (asyncio.TimeoutError, httpx.TimeoutException):
+                        self.stats["timeouts"] += 1
+                        last_error = f"timed out after {self.timeout}s"
+                    except Exception as e:
+                        last_error = f"{type(e).__name__}: {e}"
+                self.stats["errors"] += 1
+                raise LLMError(last_error)
+            finally:
+                self.stats["in_flight"] -= 1
+                self.stats["calls"] += 1
+                self.stats["total_ms"] += (time.perf_counter() - started) * 1000
+
+    def snapshot(self) -> dict:
+        calls = self.stats["calls"]
+        return {
+            **{k: v for k, v in self.stats.items() if k != "total_ms"},
+            "mean_ms": round(self.stats["total_ms"] / calls, 1) if calls else 0.0,
+            "models": self.models,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+_client = None
+
+
+def get_llm_client(api_key: str) -> GeminiClient:
+    global _client
+    if _client is None or _client.api_key != api_key:
+        _client = GeminiClient(api_key)
+    return _client
+
+
+def stats() -> dict:
+    return _client.snapshot() if _client is not None else {}
+
+
+async def close():
+    if _client is not None:
+        await _client.aclose()
@@ -0,0 +1,107 @@
+"""
+PSYNOVA Model Server Client
+Talks to `python -m app.syna_ai.model_server` over a Unix socket or local TCP.
+
+Wire format: 4-byte big-endian length + UTF-8 JSON, one request/response pair
+at a time per connection.
+    request:  {"op": "<name>", "payload": {...}}
+    response: {"ok": true, "result": ...} | {"ok": false, "error": "..."}
+"""
+
+import json
+import socket
+import struct
+import threading
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class ModelServerError(RuntimeError):
+    """The model server rejected or failed a request."""
+
+
+def encode_frame(message: dict) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+def decode_body(body: bytes) -> dict:
+    return json.loads(body.decode("utf-8"))
+
+
+def parse_address(address: str):
+    """'unix:/path' -> (AF_UNIX, '/path'); 'tcp:host:port' -> (AF_INET, (host, port))."""
+    scheme, _, rest = address.partition(":")
+    if scheme == "unix" and rest:
+        return socket.AF_UNIX, rest
+    if scheme == "tcp" and rest:
+        host, _, port = rest.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    raise ValueError(f"Invalid model server address '{address}'. Use unix:/path or tcp:host:port")
+
+
+def _recv_exactly(sock, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = sock.recv(n)
+        if not chunk:
+            raise ConnectionError("model server closed the connection")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+class ModelServerClient:
+    """
+    Blocking, thread-safe client. Each thread keeps its own connection, so
+    calls made from asyncio.to_thread workers run concurrently on the server.
+    """
+
+    def __init__(self, address: str, timeout: float = 30.0):
+        self.family, self.target = parse_address(address)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.target)
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def call(self, op: str, **payload):
+        frame = encode_frame({"op": op, "payload": payload})
+        for attempt in (1, 2):
+            try:
+                sock = self._connection()
+                sock.sendall(frame)
+                (length,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+                response = decode_body(_recv_exactly(sock, length))
+                break
+            except (ConnectionError, BrokenPipeError):
+                # Stale connection (e.g. server restarted): reconnect once
+                self._drop_connection()
+                if attempt == 2:
+                    raise
+            except OSError:
+                # Timeouts included: the server is overloaded or hung, so don't resend
+                # the work; the reply may still arrive, so this connection is unusable
+                self._drop_connection()
+                raise
+        if not response.get("ok"):
+            raise ModelServerError(f"{op}: {response.get('error', 'unknown error')}")
+        return response["result"]
+
+    def close(self):
+        self._drop_connection()
@@ -0,0 +1,337 @@
+"""
+PSYNOVA Model Server
+A fixed pool of inference processes that load the Syna models once and serve
+every uvicorn worker over a local socket, so HTTP workers can scale without
+multiplying model RAM.
+
+- Ensemble and embedding calls from all API workers are micro-batched together;
+  a turn's history texts are embedded in one "embed_many" call.
+- Each model has its own concurrency limit (SYNA_MODEL_SERVER_CONCURRENCY).
+- The "health" op reports pool liveness and per-model call/latency stats.
+
+Usage:
+    python -m app.syna_ai.model_server [--address unix:/tmp/syna-models.sock] [--workers 2]
+
+Point the API at it with SYNA_MODEL_SERVER=<same address>.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.syna_ai.batching import MicroBatcher
+from app.syna_ai.config import (
+    BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, MODEL_SERVER_ADDRESS, MODEL_SERVER_CONCURRENCY, MODEL_SERVER_WORKERS,
+)
+from app.syna_ai.model_client import MAX_FRAME_BYTES, _HEADER, decode_body, encode_frame, parse_address
+
+DEFAULT_ADDRESS = "unix:/tmp/syna-models.sock" if os.name != "nt" else "tcp:127.0.0.1:8790"
+
+
+# ===============================
+# WORKER PROCESS SIDE
+# ===============================
+
+def _worker_init(warm: bool):
+    try:
+        import torch
+        torch.set_num_threads(1)
+        if not warm:
+            return
+        from app.syna_ai.models.ensemble_risk import load_ensemble
+        from app.syna_ai.models.encoder import get_feature_extractor
+        from app.syna_ai.models.semantic_risk import get_anchors
+        from app.syna_ai.models.temporal_infer import _load_resources
+        from app.syna_ai.models.ml_infer import load_ml_resources
+        load_ensemble()
+        get_feature_extractor()
+        get_anchors()
+        _load_resources()
+        load_ml_resources()
+        print(f"Model worker {os.getpid()} ready.")
+    except Exception as e:
+        print(f"WARNING: Model worker {os.getpid()} warm-up failed: {e}")
+
+
+def _tensor_or_none(values):
+    if values is None:
+        return None
+    import torch
+    return torch.tensor(values)
+
+
+def _op_encode_turn(p):
+    from app.syna_ai.models.encoder import encode_turn
+    encoded = encode_turn(p["text"], semantic=_tensor_or_none(p.get("semantic")))
+    return {
+        "input_ids": list(encoded["input_ids"]),
+        "cls": encoded["cls"].tolist(),
+        "semantic": encoded["semantic"].tolist(),
+    }
+
+
+def _op_encode_semantic(p):
+    from app.syna_ai.models.encoder import encode_semantic
+    return encode_semantic(p["text"]).tolist()
+
+
+def _op_predict_ensemble_text(p):
+    from app.syna_ai.models.ensemble_risk import predict_risk_ensemble
+    return predict_risk_ensemble(p["text"])
+
+
+def _op_predict_xgb(p):
+    from app.syna_ai.models.ml_infer import predict_risk_xgb
+    return predict_risk_xgb(p["text"], hist_risk=p["hist_risk"], mood_trend=p["mood_trend"])
+
+
+def _op_xgb_probabilities(p):
+    from app.syna_ai.models.ml_infer import get_probabilities
+    return [float(x) for x in get_probabilities(p["text"], hist_risk=p["hist_risk"], mood_trend=p["mood_trend"])]
+
+
+def _op_predict_temporal(p):
+    from app.syna_ai.models.temporal_infer import predict_temporal_risk_from_embeddings
+    return predict_temporal_risk_from_embeddings(p["embeddings"])
+
+
+def _op_predict_temporal_texts(p):
+    from app.syna_ai.models.temporal_infer import predict_temporal_risk_lstm
+    return predict_temporal_risk_lstm(p["texts"])
+
+
+def _op_advance_temporal(p):
+    from app.syna_ai.models.temporal_infer import advance_temporal_state
+    risk, state = advance_temporal_state(p["embeddings"], p["state"])
+    return [risk, None if state is None else [s.tolist() for s in state]]
+
+
+def _op_detect_semantic(p):
+    from app.syna_ai.models.semantic_risk import detect_semantic_risk
+    return list(detect_semantic_risk(p["text"], text_embedding=_tensor_or_none(p.get("embedding"))))
+
+
+def _op_embed_many(p):
+    # A whole history in one forward pass, without waiting in the embed batcher
+    return _batch_embed(p["items"])
+
+
+def _batch_ensemble(items):
+    from app.syna_ai.models.ensemble_risk import predict_risk_ensemble_ids
+    return predict_risk_ensemble_ids(items)
+
+
+def _batch_embed(items):
+    from app.syna_ai.models.encoder import tokenize, cls_embeddings
+    return cls_embeddings([tokenize(t) for t in items]).tolist()
+
+
+OPS = {
+    "encode_turn": _op_encode_turn,
+    "encode_semantic": _op_encode_semantic,
+    "predict_ensemble_text": _op_predict_ensemble_text,
+    "predict_xgb": _op_predict_xgb,
+    "xgb_probabilities": _op_xgb_probabilities,
+    "predict_temporal": _op_predict_temporal,
+    "predict_temporal_texts": _op_predict_temporal_texts,
+    "advance_temporal": _op_advance_temporal,
+    "detect_semantic": _op_detect_semantic,
+    "embed_many": _op_embed_many,
+}
+
+# Ops whose single "item" is micro-batched across all connected API workers
+BATCH_OPS = {
+    "ensemble": _batch_ensemble,
+    "embed": _batch_embed,
+}
+
+
+# ===============================
+# SERVER (PARENT PROCESS) SIDE
+# ===============================
+
+class _OpStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+class ModelServer:
+    def __init__(self, address: str, workers: int = MODEL_SERVER_WORKERS,
+                 concurrency: int = MODEL_SERVER_CONCURRENCY, warm: bool = True,
+                 ops: dict = None, batch_ops: dict = None):
+        self.address = address
+        self.workers = max(1, workers)
+        self.concurrency = max(1, concurrency)
+        self.warm = warm
+        # Module-level functions only: they are pickled by reference to the workers
+        self.ops = OPS if ops is None else ops
+        self.batch_ops = BATCH_OPS if batch_ops is None else batch_ops
+        self.started_at = time.time()
+        self.stats = {op: _OpStats() for op in list(self.ops) + list(self.batch_ops)}
+        self._limits = {}
+        self._batchers = {}
+        self._executor = None
+        # Bumped on every pool rebuild so concurrent callers rebuild a broken pool once
+        self._generation = 0
+        self._pool_lock = threading.Lock()
+        self._server = None
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init, initargs=(self.warm,))
+
+    def _submit_blocking(self, fn, *args):
+        with self._pool_lock:
+            executor, generation = self._executor, self._generation
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM): rebuild the pool and retry once.
+            # Only the first caller to see this generation broken rebuilds it.
+            with self._pool_lock:
+                if self._generation == generation:
+                    print("WARNING: model worker pool broken; restarting workers")
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = self._new_executor()
+                    self._generation += 1
+                executor = self._executor
+            return executor.submit(fn, *args).result()
+
+    async def start(self):
+        self._executor = self._new_executor()
+        # Batched ops are already serialised by their batcher; limit the rest
+        self._limits = {op: asyncio.Semaphore(self.concurrency) for op in self.ops}
+        self._batchers = {
+            op: MicroBatcher(
+                lambda items, fn=fn: self._submit_blocking(fn, items),
+                max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS, name=f"server-{op}",
+            )
+            for op, fn in self.batch_ops.items()
+        }
+
+        family, target = parse_address(self.address)
+        if family == getattr(socket, "AF_UNIX", None):
+            if os.path.exists(target):
+                os.unlink(target)  # stale socket from a previous run
+            self._server = await asyncio.start_unix_server(self._handle, path=target)
+            os.chmod(target, 0o600)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=target[0], port=target[1])
+        return self._server
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self._batchers.values():
+            await batcher.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def health(self) -> dict:
+        try:
+            pid = await asyncio.wait_for(
+                asyncio.to_thread(self._submit_blocking, os.getpid), timeout=10
+            )
+            alive = True
+        except Exception:
+            pid, alive = None, False
+        return {
+            "status": "ok" if alive else "degraded",
+            "workers": self.workers,
+            "workers_responding": alive,
+            "sample_worker_pid": pid,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "concurrency_per_model": self.concurrency,
+            "ops": {op: s.snapshot() for op, s in self.stats.items()},
+            "batchers": {op: b.stats() for op, b in self._batchers.items()},
+        }
+
+    async def dispatch(self, op: str, payload: dict):
+        if op == "health":
+            return await self.health()
+        if op not in self.stats:
+            raise ValueError(f"unknown op '{op}'")
+
+        stats = self.stats[op]
+        async with self._limits.get(op) or contextlib.nullcontext():
+            stats.in_flight += 1
+            started = time.perf_counter()
+            try:
+                if op in self._batchers:
+                    return await self._batchers[op].submit(payload["item"])
+                return await asyncio.to_thread(self._submit_blocking, self.ops[op], payload)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+                stats.calls += 1
+                stats.total_ms += (time.perf_counter() - started) * 1000
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                except asyncio.IncompleteReadError:
+                    break  # client disconnected
+                if length > MAX_FRAME_BYTES:
+                    break
+                request = decode_body(await reader.readexactly(length))
+                try:
+                    result = await self.dispatch(request.get("op"), request.get("payload") or {})
+                    response = {"ok": True, "result": result}
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(encode_frame(response))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def _main(address: str, workers: int, concurrency: int, warm: bool):
+    server = ModelServer(address, workers=workers, concurrency=concurrency, warm=warm)
+    await server.start()
+    print(f"Syna model server listening on {address} ({workers} workers)")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default=MODEL_SERVER_ADDRESS or DEFAULT_ADDRESS)
+    parser.add_argument("--workers", type=int, default=MODEL_SERVER_WORKERS)
+    parser.add_argument("--concurrency", type=int, default=MODEL_SERVER_CONCURRENCY)
+    parser.add_argument("--no-warm", action="store_true", help="Load models lazily on first call")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args.address, args.workers, args.concurrency, not args.no_warm))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
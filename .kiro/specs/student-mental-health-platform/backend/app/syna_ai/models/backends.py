@@ -0,0 +1,157 @@
+"""
+PSYNOVA Inference Backends
+Loads the Syna transformer models for the backend selected by
+SYNA_INFERENCE_BACKEND and wraps them behind a common call signature:
+
+    runner(**inputs) -> torch.Tensor   (logits or last_hidden_state)
+
+ONNX graphs are produced by `python -m app.syna_ai.tools.export_onnx`.
+If onnxruntime or an exported graph is missing, loading falls back to eager.
+"""
+
+import os
+from app.syna_ai.config import MODELS_DIR, INFERENCE_BACKEND, ONNX_DIR, ONNX_THREADS
+
+BACKENDS = ("eager", "int8", "onnx", "onnx-int8")
+
+# Model names as used for trained_models/onnx/<name>/
+SEMANTIC_MODEL_NAME = "all-MiniLM-L6-v2"
+FEATURE_MODEL_NAME = "distilbert-base-uncased"
+
+
+class TorchRunner:
+    """Eager or dynamically quantized PyTorch module."""
+
+    def __init__(self, module, output: str):
+        self.module = module
+        self.output = output
+
+    def __call__(self, **inputs):
+        import torch
+        with torch.no_grad():
+            return getattr(self.module(**inputs), self.output)
+
+
+class OnnxRunner:
+    """ONNX Runtime session; only feeds the inputs the graph declares."""
+
+    module = None
+
+    def __init__(self, path: str):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = ONNX_THREADS
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, **inputs):
+        import torch
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names if name in inputs}
+        return torch.from_numpy(self.session.run(None, feed)[0])
+
+
+def onnx_path(name: str, quantized: bool = False) -> str:
+    return os.path.join(ONNX_DIR, name, "model.int8.onnx" if quantized else "model.onnx")
+
+
+def quantize_linear(module):
+    """Dynamic INT8 quantization of every nn.Linear (weights int8, activations fp32)."""
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _onnx_runner(name: str, backend: str):
+    """OnnxRunner for `name`, or None (with a warning) if it can't be used."""
+    path = onnx_path(name, quantized=backend == "onnx-int8")
+    if not os.path.exists(path):
+        print(f"WARNING: {backend} backend requested but {path} is missing; using eager. "
+              f"Run: python -m app.syna_ai.tools.export_onnx")
+        return None
+    try:
+        return OnnxRunner(path)
+    except ImportError:
+        print(f"WARNING: onnxruntime is not installed; using eager for {name}")
+        return None
+
+
+def _check(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown SYNA_INFERENCE_BACKEND '{backend}'. Expected one of {BACKENDS}")
+
+
+def load_sequence_classifier(name: str, model_class, device, backend: str = INFERENCE_BACKEND):
+    """Runner returning logits for trained_models/<name> (distilbert-risk, bert-risk)."""
+    _check(backend)
+    if backend.startswith("onnx"):
+        runner = _onnx_runner(name, backend)
+        if runner is not None:
+            return runner
+
+    model = model_class.from_pretrained(os.path.join(MODELS_DIR, name), low_cpu_mem_usage=True)
+    model.to(device)
+    model.eval()
+    if backend == "int8":
+        model = quantize_linear(model)
+    return TorchRunner(model, "logits")
+
+
+def load_feature_extractor(device, backend: str = INFERENCE_BACKEND):
+    """Runner returning last_hidden_state of distilbert-base-uncased (temporal features)."""
+    _check(backend)
+    if backend.startswith("onnx"):
+        runner = _onnx_runner(FEATURE_MODEL_NAME, backend)
+        if runner is not None:
+            return runner
+
+    from transformers import DistilBertModel
+    model = DistilBertModel.from_pretrained(FEATURE_MODEL_NAME)
+    model.to(device)
+    model.eval()
+    if backend == "int8":
+        model = quantize_linear(model)
+    return TorchRunner(model, "last_hidden_state")
+
+
+class OnnxSentenceEncoder:
+    """
+    ONNX Runtime replacement for SentenceTransformer("all-MiniLM-L6-v2").encode:
+    transformer -> mean pooling over the attention mask -> L2 normalisation.
+    """
+
+    def __init__(self, runner: OnnxRunner, tokenizer, max_seq_length: int = 256):
+        self.runner = runner
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+
+    def encode(self, sentences, convert_to_tensor: bool = False, **kwargs):
+        import torch.nn.functional as F
+        single = isinstance(sentences, str)
+        batch = [sentences] if single else list(sentences)
+
+        inputs = self.tokenizer(batch, padding=True, truncation=True,
+                                max_length=self.max_seq_length, return_tensors="pt")
+        hidden = self.runner(**inputs)
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        embeddings = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        embeddings = F.normalize(embeddings, p=2, dim=1)
+
+        out = embeddings[0] if single else embeddings
+        return out if convert_to_tensor else out.numpy()
+
+
+def load_sentence_encoder(backend: str = INFERENCE_BACKEND):
+    """Object with a SentenceTransformer-compatible encode() for MiniLM."""
+    _check(backend)
+    if backend.startswith("onnx"):
+        runner = _onnx_runner(SEMANTIC_MODEL_NAME, backend)
+        if runner is not None:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(os.path.join(ONNX_DIR, SEMANTIC_MODEL_NAME))
+            return OnnxSentenceEncoder(runner, tokenizer)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(SEMANTIC_MODEL_NAME)
+    if backend == "int8":
+        model = quantize_linear(model)
+    return model
@@ -0,0 +1,119 @@
+"""
+PSYNOVA Shared Encode Stage
+Tokenizes each chat message once per tokenizer family and hands the resulting
+tensors to every model head.
+
+Tokenizer families:
+- WordPiece (uncased, 30522 vocab): distilbert-risk, bert-risk and the
+  distilbert-base-uncased feature extractor of the temporal LSTM all ship the
+  same vocabulary and normalizer, so one tokenization serves all three.
+- MiniLM: the SentenceTransformer used by semantic_risk.py, encoded once per turn.
+"""
+
+import os
+from app.syna_ai.config import MODELS_DIR, SHARE_DISTIL_BACKBONE
+
+# Sequence lengths used by the individual heads
+CLASSIFIER_MAX_LENGTH = 128
+TEMPORAL_MAX_LENGTH = 96
+
+_shared = {
+    "tokenizer": None,
+    "feature_extractor": None,
+    "device": None,
+}
+
+
+def get_tokenizer():
+    """Single WordPiece tokenizer shared by every BERT-family head."""
+    if _shared["tokenizer"] is None:
+        from transformers import DistilBertTokenizerFast
+        _shared["tokenizer"] = DistilBertTokenizerFast.from_pretrained(
+            os.path.join(MODELS_DIR, "distilbert-risk")
+        )
+    return _shared["tokenizer"]
+
+
+def get_feature_extractor():
+    """
+    DistilBERT encoder used for the temporal LSTM's CLS features, as a runner
+    returning last_hidden_state (see backends.py).
+
+    With SYNA_SHARE_DISTIL_BACKBONE=1 this is the backbone of the fine-tuned
+    distilbert-risk classifier, so only one set of DistilBERT weights is kept
+    in memory. The LSTM was trained on distilbert-base-uncased features,
+    so sharing is off by default. It is also unavailable on the ONNX backends,
+    where the classifier has no torch module.
+    """
+    if _shared["feature_extractor"] is None:
+        import torch
+        from app.syna_ai.models.backends import TorchRunner, load_feature_extractor
+        if SHARE_DISTIL_BACKBONE:
+            from app.syna_ai.models.ensemble_risk import load_ensemble, _models
+            load_ensemble()
+            if _models["distil_model"] is not None:
+                _shared["device"] = _models["device"]
+                _shared["feature_extractor"] = TorchRunner(_models["distil_model"].distilbert, "last_hidden_state")
+                return _shared["feature_extractor"]
+        _shared["device"] = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        _shared["feature_extractor"] = load_feature_extractor(_shared["device"])
+    return _shared["feature_extractor"]
+
+
+def tokenize(text: str) -> list:
+    """WordPiece ids for one message, truncated to the classifier length."""
+    return get_tokenizer()(
+        text, truncation=True, max_length=CLASSIFIER_MAX_LENGTH
+    )["input_ids"]
+
+
+def truncate_ids(input_ids: list, max_length: int) -> list:
+    """Re-truncate an encoded sequence, keeping the trailing [SEP]."""
+    if len(input_ids) <= max_length:
+        return list(input_ids)
+    return list(input_ids[:max_length - 1]) + [input_ids[-1]]
+
+
+def pad_batch(id_lists: list, token_type_ids: bool = False):
+    """Pad a list of id sequences into a tensor batch on the model device."""
+    batch = get_tokenizer().pad(
+        {"input_ids": [list(ids) for ids in id_lists]},
+        padding=True,
+        return_tensors="pt",
+    )
+    if token_type_ids:
+        import torch
+        batch["token_type_ids"] = torch.zeros_like(batch["input_ids"])
+    return batch
+
+
+def cls_embeddings(id_lists: list):
+    """768-d CLS embeddings for already tokenized messages, as one batch."""
+    extractor = get_feature_extractor()
+    inputs = pad_batch([truncate_ids(ids, TEMPORAL_MAX_LENGTH) for ids in id_lists])
+    inputs = {k: v.to(_shared["device"]) for k, v in inputs.items()}
+    return extractor(**inputs)[:, 0, :].cpu().numpy()
+
+
+def encode_semantic(text: str):
+    """MiniLM sentence embedding for the semantic detector (cheap cascade stage)."""
+    from app.syna_ai.models.semantic_risk import get_model as get_semantic_model
+    return get_semantic_model().encode(text, convert_to_tensor=True)
+
+
+def encode_turn(text: str, semantic=None) -> dict:
+    """
+    Encode stage for one chat turn.
+
+    Returns:
+    - input_ids: WordPiece ids (max 128) for the ensemble classifiers
+    - cls: 768-d CLS embedding for the temporal LSTM
+    - semantic: MiniLM sentence embedding for the semantic detector
+      (reused if the cascade's cheap stage already computed it)
+    """
+    input_ids = tokenize(text)
+    return {
+        "input_ids": input_ids,
+        "cls": cls_embeddings([input_ids])[0],
+        "semantic": semantic if semantic is not None else encode_semantic(text),
+    }
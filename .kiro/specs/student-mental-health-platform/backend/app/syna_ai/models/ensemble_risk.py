@@ -1,30 +1,33 @@
-import os
 # Heavy imports moved inside load_ensemble for stability
-from app.syna_ai.config import MODELS_DIR
+from app.syna_ai.config import MODELS_DIR, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, INFERENCE_BACKEND
+from app.syna_ai.batching import MicroBatcher
+from app.syna_ai.models.encoder import get_tokenizer, tokenize, pad_batch
+from app.syna_ai.models.backends import load_sequence_classifier
 
 # Global cache for models and device
+# *_runner: backend-agnostic callables returning logits (see backends.py)
+# *_model:  the underlying torch module (None on the ONNX backends)
 _models = {
     "distil_tokenizer": None,
     "distil_model": None,
+    "distil_runner": None,
     "bert_tokenizer": None,
     "bert_model": None,
+    "bert_runner": None,
     "device": None
 }
 
 def load_ensemble():
     """Lazy load BERT and DistilBERT models."""
-    if _models["distil_model"] is not None:
+    if _models["distil_runner"] is not None:
         return
         
-    print(f"DEBUG: Loading BERT Ensemble models from: {MODELS_DIR}")
+    print(f"DEBUG: Loading BERT Ensemble models from: {MODELS_DIR} (backend: {INFERENCE_BACKEND})")
     try:
         import torch
         torch.set_num_threads(1) # CRITICAL: Fix for Windows Access Violations
-        import torch.nn.functional as F
         from transformers import (
-            DistilBertTokenizerFast as DistilBertTokenizer,
             DistilBertForSequenceClassification,
-            BertTokenizerFast as BertTokenizer,
             BertForSequenceClassification,
         )
 
@@ -33,36 +36,20 @@ def load_ensemble():
         _models["device"] = torch.device("cpu") # Force CPU for stability
         device = _models["device"]
         print(f"DEBUG: Using device: {device}")
-        
-        # Check paths
-        distil_model_path = os.path.join(MODELS_DIR, "distilbert-risk")
-        bert_model_path = os.path.join(MODELS_DIR, "bert-risk")
-        
-        print(f"DEBUG: Paths - DistilBERT: {distil_model_path}, BERT: {bert_model_path}")
+
+        # Both models share one WordPiece vocabulary (see encoder.py)
+        print("DEBUG: Loading shared WordPiece Tokenizer...")
+        _models["distil_tokenizer"] = _models["bert_tokenizer"] = get_tokenizer()
 
         # Load DistilBERT
-        print("DEBUG: Loading DistilBERT Tokenizer...")
-        _models["distil_tokenizer"] = DistilBertTokenizer.from_pretrained(distil_model_path)
-        print("DEBUG: DistilBERT Tokenizer OK. Loading DistilBERT Model...")
-        _models["distil_model"] = DistilBertForSequenceClassification.from_pretrained(
-            distil_model_path, low_cpu_mem_usage=True
-        )
-        print("DEBUG: DistilBERT Model OK. Moving to device...")
-        _models["distil_model"].to(device)
-        print("DEBUG: DistilBERT Model on device. Eval mode...")
-        _models["distil_model"].eval()
+        print("DEBUG: Tokenizer OK. Loading DistilBERT Model...")
+        distil = load_sequence_classifier("distilbert-risk", DistilBertForSequenceClassification, device)
+        _models["distil_runner"], _models["distil_model"] = distil, distil.module
 
         # Load BERT
-        print("DEBUG: Loading BERT Tokenizer...")
-        _models["bert_tokenizer"] = BertTokenizer.from_pretrained(bert_model_path)
-        print("DEBUG: BERT Tokenizer OK. Loading BERT Model...")
-        _models["bert_model"] = BertForSequenceClassification.from_pretrained(
-            bert_model_path, low_cpu_mem_usage=True
-        )
-        print("DEBUG: BERT Model OK. Moving to device...")
-        _models["bert_model"].to(device)
-        print("DEBUG: BERT Model on device. Eval mode...")
-        _models["bert_model"].eval()
+        print("DEBUG: DistilBERT Model OK. Loading BERT Model...")
+        bert = load_sequence_classifier("bert-risk", BertForSequenceClassification, device)
+        _models["bert_runner"], _models["bert_model"] = bert, bert.module
         print("BERT Ensemble loaded successfully.")
     except Exception as e:
         print(f"CRITICAL ERROR loading Ensemble models: {e}")
@@ -75,43 +62,45 @@ def load_ensemble():
 # ENSEMBLE PREDICT FUNCTION
 # ===========================
 
-def predict_risk_ensemble(text: str) -> int:
+def predict_risk_ensemble_ids(id_lists: list) -> list:
+    """
+    Run already tokenized messages through DistilBERT and BERT as one padded
+    batch per model. Returns one class per input, in order.
+    """
     load_ensemble()
     import torch
     import torch.nn.functional as F
     device = _models["device"]
 
     # ---- DistilBERT ----
-    inputs_d = _models["distil_tokenizer"](
-        text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=128
-    ).to(device)
-
-    with torch.no_grad():
-        outputs_d = _models["distil_model"](**inputs_d)
+    inputs_d = pad_batch(id_lists).to(device)
 
-    probs_d = F.softmax(outputs_d.logits, dim=1)
+    probs_d = F.softmax(_models["distil_runner"](**inputs_d), dim=1)
 
-    # ---- BERT ----
-    inputs_b = _models["bert_tokenizer"](
-        text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=128
-    ).to(device)
+    # ---- BERT (same ids, plus segment ids) ----
+    inputs_b = pad_batch(id_lists, token_type_ids=True).to(device)
 
-    with torch.no_grad():
-        outputs_b = _models["bert_model"](**inputs_b)
-
-    probs_b = F.softmax(outputs_b.logits, dim=1)
+    probs_b = F.softmax(_models["bert_runner"](**inputs_b), dim=1)
 
     # ---- Average probabilities ----
     avg_probs = (probs_d + probs_b) / 2
 
-    final_class = torch.argmax(avg_probs, dim=1).item()
+    return torch.argmax(avg_probs, dim=1).tolist()
+
+
+def predict_risk_ensemble_batch(texts: list) -> list:
+    return predict_risk_ensemble_ids([tokenize(text) for text in texts])
+
+
+def predict_risk_ensemble(text: str) -> int:
+    return predict_risk_ensemble_batch([text])[0]
+
 
-    return final_class
+# Shared batcher: concurrent chat turns are coalesced into one forward pass
+# Items are WordPiece id lists produced by the encode stage
+ensemble_batcher = MicroBatcher(
+    predict_risk_ensemble_ids,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    name="ensemble",
+)
@@ -1,22 +1,26 @@
-from app.syna_ai.database import get_db
+from app.syna_ai.database import get_db_context
+from app.syna_ai.feature_store import record_mood
+from app.syna_ai.analytics import record_mood as mood_rollup
 
-def save_mood(user_id: str, mood: int):
+def insert_mood(cursor, user_id: str, mood: int) -> int:
     """
-    Store daily mood score (1–10) for a specific user.
+    Insert a mood score with its rollup and feature-store updates, in the
+    caller's transaction (SQLiteStorage.add_mood runs it on the writer).
     """
-    conn, cursor = get_db()
     cursor.execute(
         "INSERT INTO moods (user_id, mood_score) VALUES (?, ?)",
         (user_id, mood)
     )
-    conn.commit()
+    mood_id = cursor.lastrowid
+    mood_rollup(cursor, user_id, mood_id)
+    record_mood(cursor, user_id, mood)
+    return mood_id
 
 
-def get_recent_moods(user_id: str, limit: int = 7):
+def fetch_recent_moods(cursor, user_id: str, limit: int = 7):
     """
-    Fetch recent mood check-ins for a specific user.
+    Recent mood check-ins for a specific user, newest first.
     """
-    conn, cursor = get_db()
     cursor.execute(
         """
         SELECT mood_score, created_at
@@ -28,3 +32,22 @@ def get_recent_moods(user_id: str, limit: int = 7):
         (user_id, limit)
     )
     return cursor.fetchall()
+
+
+def save_mood(user_id: str, mood: int):
+    """
+    Store daily mood score (1–10) for a specific user.
+    Blocking, on this thread's pooled connection; the API goes through
+    SynaStorage.add_mood.
+    """
+    with get_db_context() as (conn, cursor):
+        insert_mood(cursor, user_id, mood)
+        conn.commit()
+
+
+def get_recent_moods(user_id: str, limit: int = 7):
+    """
+    Fetch recent mood check-ins for a specific user.
+    """
+    with get_db_context() as (conn, cursor):
+        return fetch_recent_moods(cursor, user_id, limit)
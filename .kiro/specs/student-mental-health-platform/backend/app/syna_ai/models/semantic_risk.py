@@ -1,3 +1,5 @@
+from app.syna_ai.config import INFERENCE_BACKEND
+
 # Global model cache
 _model = None
 SIMILARITY_THRESHOLD = 0.85
@@ -5,9 +7,9 @@ SIMILARITY_THRESHOLD = 0.85
 def get_model():
     global _model
     if _model is None:
-        print("🧠 Loading SentenceTransformer (all-MiniLM-L6-v2)...")
-        from sentence_transformers import SentenceTransformer
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
+        print(f"🧠 Loading SentenceTransformer (all-MiniLM-L6-v2, backend: {INFERENCE_BACKEND})...")
+        from app.syna_ai.models.backends import load_sentence_encoder
+        _model = load_sentence_encoder()
         print("✅ SentenceTransformer loaded.")
     return _model
 
@@ -29,17 +31,18 @@ def get_anchors():
     return _anchor_embeddings
 
 
-def detect_semantic_risk(text: str):
+def detect_semantic_risk(text: str, text_embedding=None):
     """
     Returns:
     (risk_level, debug_info)
     risk_level: 0 or 2
+    `text_embedding` may be passed in from the shared encode stage.
     """
     from sentence_transformers import util
-    model = get_model()
     anchor_embeddings = get_anchors()
 
-    text_embedding = model.encode(text, convert_to_tensor=True)
+    if text_embedding is None:
+        text_embedding = get_model().encode(text, convert_to_tensor=True)
     similarities = util.cos_sim(text_embedding, anchor_embeddings)[0]
 
     best_score = float(similarities.max())
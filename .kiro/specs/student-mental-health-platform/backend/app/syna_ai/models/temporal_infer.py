@@ -2,6 +2,7 @@ import os
 import numpy as np
 import torch
 from app.syna_ai.config import MODELS_DIR
+from app.syna_ai.models.encoder import tokenize, cls_embeddings
 
 # Configuration
 INPUT_DIM = 768
@@ -11,18 +12,15 @@ NUM_CLASSES = 3
 
 # Global model instance cache
 _temporal_model = None
-_tokenizer = None
-_bert_model = None
 _device = None
 
 def _load_resources():
-    global _temporal_model, _tokenizer, _bert_model, _device
+    global _temporal_model, _device
     
     if _temporal_model is None:
         try:
             torch.set_num_threads(1)
             import torch.nn as nn
-            from transformers import DistilBertTokenizerFast, DistilBertModel
 
             class RiskLSTM(nn.Module):
                 def __init__(self, input_dim, hidden_dim, num_layers, num_classes):
@@ -41,12 +39,8 @@ def _load_resources():
             model_path = os.path.join(MODELS_DIR, "lstm_temporal.pth")
             _device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
             
-            # Load BERT for feature extraction
-            _tokenizer = DistilBertTokenizerFast.from_pretrained("distilbert-base-uncased")
-            _bert_model = DistilBertModel.from_pretrained("distilbert-base-uncased")
-            _bert_model.to(_device)
-            _bert_model.eval()
-            
+            # Feature extraction (tokenizer + DistilBERT) lives in the shared encode stage
+
             # Load LSTM
             if os.path.exists(model_path):
                 _temporal_model = RiskLSTM(INPUT_DIM, HIDDEN_DIM, NUM_LAYERS, NUM_CLASSES)
@@ -58,46 +52,107 @@ def _load_resources():
         except Exception as e:
             print(f"ERROR: Error loading Temporal LSTM resources: {e}")
 
-def predict_temporal_risk_lstm(history_texts: list) -> int:
+def _window(items: list) -> list:
+    """Last 5 items; short histories are padded by repeating the oldest one."""
+    # Take last 5
+    seq = items[-5:]
+
+    # Pad if needed
+    if len(seq) < 5:
+        seq = [seq[0]] * (5 - len(seq)) + seq
+    return seq
+
+
+def embed_history(history_texts: list, current_embedding=None) -> list:
     """
-    Predict risk based on a sequence of past messages (max 5).
+    CLS embeddings for the last 5 history texts, oldest first. Each distinct
+    text is encoded once, as a single batch. If the encode stage already
+    produced the newest message's embedding it is reused.
+    """
+    seq_texts = history_texts[-5:]
+    by_text = {}
+    if current_embedding is not None:
+        by_text[seq_texts[-1]] = np.asarray(current_embedding, dtype=np.float32)
+    missing = [t for t in dict.fromkeys(seq_texts) if t not in by_text]
+    if missing:
+        by_text.update(zip(missing, cls_embeddings([tokenize(t) for t in missing])))
+    return [by_text[t] for t in seq_texts]
+
+
+def _sequence_tensor(embeddings: list):
+    # Shape: (1, 5, 768)
+    return torch.tensor(np.array([_window(embeddings)]), dtype=torch.float32).to(_device)
+
+
+def predict_temporal_risk_from_embeddings(embeddings: list) -> int:
+    """
+    Predict risk from precomputed CLS embeddings of past messages, oldest
+    first (see embedding_store.py). Only the last 5 are used.
     """
     _load_resources()
-    
-    if _temporal_model is None or not history_texts:
+
+    if _temporal_model is None or not embeddings:
         return 0
 
     try:
-        # Take last 5
-        seq_texts = history_texts[-5:]
-        
-        # Pad if needed
-        if len(seq_texts) < 5:
-            padding = [seq_texts[0]] * (5 - len(seq_texts))
-            seq_texts = padding + seq_texts
-            
-        embeddings = []
-        with torch.no_grad():
-            for text in seq_texts:
-                inputs = _tokenizer(text, return_tensors="pt", truncation=True, padding="max_length", max_length=96).to(_device)
-                outputs = _bert_model(**inputs)
-                embed = outputs.last_hidden_state[:, 0, :].cpu().numpy()[0]
-                embeddings.append(embed)
-        
-        # Shape: (1, 5, 768)
-        input_tensor = torch.tensor(np.array([embeddings]), dtype=torch.float32).to(_device)
-        
+        input_tensor = _sequence_tensor(embeddings)
+
         _temporal_model.eval()
         with torch.no_grad():
             outputs = _temporal_model(input_tensor)
             pred = torch.argmax(outputs, dim=1).item()
-            
+
         return int(pred)
     except Exception as e:
         print(f"ERROR: Temporal prediction error: {e}")
         return 0
 
-def get_probabilities(history_texts: list):
+
+def advance_temporal_state(embeddings: list, state=None):
+    """
+    Streaming mode: advance the LSTM by one step per embedding, starting from
+    `state` ((h_n, c_n) numpy arrays, flat or (layers, 1, hidden), or None
+    for a zero state). Returns (risk_class, (h_n, c_n)).
+    """
+    _load_resources()
+
+    if _temporal_model is None or not embeddings:
+        return 0, state
+
+    x = torch.tensor(np.array([embeddings]), dtype=torch.float32).to(_device)
+    hidden = None
+    if state is not None:
+        hidden = tuple(
+            torch.tensor(np.asarray(s), dtype=torch.float32).reshape(NUM_LAYERS, 1, HIDDEN_DIM).to(_device)
+            for s in state
+        )
+
+    with torch.no_grad():
+        _, (h_n, c_n) = _temporal_model.lstm(x, hidden)
+        # Dropout is a no-op in eval mode, so fc(h_n[-1]) matches forward()
+        logits = _temporal_model.fc(h_n[-1])
+
+    return int(torch.argmax(logits, dim=1).item()), (h_n.cpu().numpy(), c_n.cpu().numpy())
+
+
+def predict_temporal_risk_lstm(history_texts: list, current_embedding=None) -> int:
+    """
+    Predict risk based on a sequence of past messages (max 5).
+    `current_embedding` is the newest message's CLS vector from encode_turn().
+    """
+    _load_resources()
+    
+    if _temporal_model is None or not history_texts:
+        return 0
+
+    try:
+        embeddings = embed_history(history_texts, current_embedding)
+    except Exception as e:
+        print(f"ERROR: Temporal prediction error: {e}")
+        return 0
+    return predict_temporal_risk_from_embeddings(embeddings)
+
+def get_probabilities(history_texts: list, current_embedding=None):
     """
     Returns [prob_low, prob_medium, prob_high] using Softmax on LSTM logits.
     """
@@ -106,20 +161,7 @@ def get_probabilities(history_texts: list):
         return [0.34, 0.33, 0.33]
 
     try:
-        seq_texts = history_texts[-5:]
-        if len(seq_texts) < 5:
-            padding = [seq_texts[0]] * (5 - len(seq_texts))
-            seq_texts = padding + seq_texts
-            
-        embeddings = []
-        with torch.no_grad():
-            for text in seq_texts:
-                inputs = _tokenizer(text, return_tensors="pt", truncation=True, padding="max_length", max_length=96).to(_device)
-                outputs = _bert_model(**inputs)
-                embed = outputs.last_hidden_state[:, 0, :].cpu().numpy()[0]
-                embeddings.append(embed)
-        
-        input_tensor = torch.tensor(np.array([embeddings]), dtype=torch.float32).to(_device)
+        input_tensor = _sequence_tensor(embed_history(history_texts, current_embedding))
         
         with torch.no_grad():
             logits = _temporal_model(input_tensor)
@@ -0,0 +1,84 @@
+"""
+PSYNOVA History Pagination
+Keyset cursors and ETags for the Syna history endpoints.
+
+Pages walk a user's rows newest to oldest on (created_at, id), which the
+per-user indexes serve directly, so a page costs the same however long the
+history is. A cursor is the (created_at, id) of the last row returned,
+encoded opaquely; the next page continues strictly after it.
+
+The ETag of a page is derived from the user's newest row id plus the page
+parameters: a client polling with If-None-Match gets a 304 from a single
+index lookup while nothing new has been written.
+"""
+
+import base64
+import hashlib
+import json
+from typing import Optional
+
+
+def encode_cursor(key, row_id: int) -> str:
+    """Opaque cursor for a (key, id) position; key is created_at (as text) or a float score."""
+    key = key if isinstance(key, float) else str(key)
+    raw = json.dumps([key, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_type: type = str) -> tuple:
+    """(key, id) from a cursor. Raises ValueError if it is malformed."""
+    try:
+        key, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}") from None
+    if key_type is float and isinstance(key, int):
+        key = float(key)
+    if not isinstance(key, key_type) or not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("invalid cursor")
+    return key, row_id
+
+
+def fetch_page(cursor, table: str, columns: str, user_id: str, after: Optional[str], limit: int) -> tuple:
+    """
+    (rows, next_cursor) for one page of `table`, newest first. `columns`
+    must start with "id, created_at". next_cursor is None on the last page.
+    Raises ValueError for a malformed `after` cursor.
+    """
+    sql = f"SELECT {columns} FROM {table} WHERE user_id = ?"
+    params = [user_id]
+    if after:
+        sql += " AND (created_at, id) < (?, ?)"
+        params += decode_cursor(after)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    # One extra row tells whether there is a next page
+    cursor.execute(sql, params + [limit + 1])
+    rows = cursor.fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][1], rows[-1][0])
+
+
+def latest_id(cursor, table: str, user_id: str) -> int:
+    """Id of the user's newest row in `table` (0 if none)."""
+    cursor.execute(
+        f"SELECT id FROM {table} WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 1", (user_id,)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def page_etag(table: str, user_id: str, newest_id: int, after: Optional[str], limit: int) -> str:
+    key = f"{table}:{user_id}:{newest_id}:{after or ''}:{limit}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional
 import os
@@ -11,34 +11,47 @@ import sys
 # LAZY IMPORTS & UTILS
 # ---------------------------------------------------------
 import asyncio
-from app.syna_ai.database import get_db, get_db_context
-from app.authentication_onboarding.core.dependencies import get_current_user
-from app.authentication_onboarding.models.user import AnyUser
+from app.syna_ai.speculation import SpeculativeReply
+from app.authentication_onboarding.core.dependencies import get_current_user, role_required
+from app.authentication_onboarding.models.user import AnyUser, Role
+from app.syna_ai.config import TEMPORAL_MODE, CASCADE_ENABLED, SPECULATIVE_LLM, SPECULATIVE_RISK
+from app.syna_ai.config import HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE, ANALYTICS_MAX_DAYS
 
 def get_models_and_utils():
     # Deferred imports to prevent startup DLL conflicts
+    # Model calls go through the inference facade (in-process or model server)
     from app.syna_ai.models.risk_model import detect_risk_rule
-    from app.syna_ai.models.ensemble_risk import predict_risk_ensemble
-    from app.syna_ai.models.ml_infer import predict_risk_xgb
-    from app.syna_ai.models.temporal_infer import predict_temporal_risk_lstm
-    from app.syna_ai.models.semantic_risk import detect_semantic_risk
+    from app.syna_ai import inference
+    from app.syna_ai import cascade
+    from app.syna_ai import feature_store
+    from app.syna_ai.embedding_store import resolve_history_embeddings
+    from app.syna_ai.temporal_state import stream_temporal_risk
     from app.syna_ai.gemini_client import get_gemini_response
-    from app.syna_ai.crisis_alerts import send_crisis_alerts
+    from app.syna_ai.alert_dispatcher import wake_dispatcher
     from app.syna_ai.language_processor import detect_language, translate_to_english, clean_for_analysis
-    from app.syna_ai.models.mood_logic import save_mood
+    from app.syna_ai.storage import get_storage
 
     return {
+        "encode_turn": inference.encode_turn,
         "detect_risk_rule": detect_risk_rule,
-        "predict_risk_ensemble": predict_risk_ensemble,
-        "predict_risk_xgb": predict_risk_xgb,
-        "predict_temporal_risk_lstm": predict_temporal_risk_lstm,
-        "detect_semantic_risk": detect_semantic_risk,
+        "predict_risk_ensemble": inference.predict_risk_ensemble,
+        "predict_ensemble": inference.predict_ensemble,
+        "predict_risk_xgb": inference.predict_risk_xgb,
+        "predict_temporal_risk_lstm": inference.predict_temporal_risk_lstm,
+        "predict_temporal_risk_from_embeddings": inference.predict_temporal_risk_from_embeddings,
+        "resolve_history_embeddings": resolve_history_embeddings,
+        "stream_temporal_risk": stream_temporal_risk,
+        "detect_semantic_risk": inference.detect_semantic_risk_async,
+        "cascade_cheap_stage": cascade.cheap_stage,
+        "cascade_decide": cascade.decide,
+        "cascade_record": cascade.record,
+        "features": feature_store,
         "get_gemini_response": get_gemini_response,
-        "send_crisis_alerts": send_crisis_alerts,
+        "wake_alert_dispatcher": wake_dispatcher,
         "detect_language": detect_language,
         "translate_to_english": translate_to_english,
         "clean_for_analysis": clean_for_analysis,
-        "save_mood": save_mood
+        "storage": get_storage()
     }
 
 router = APIRouter(prefix="/syna", tags=["Syna AI Chatbot"])
@@ -55,18 +68,13 @@ class ChatMessageOut(BaseModel):
 
 class ChatHistoryOut(BaseModel):
     history: List[ChatMessageOut]
+    # Pass as `cursor` to fetch the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
 
 def detect_crisis(text: str) -> bool:
     crisis_phrases = ["i want to die", "i feel like dying", "i want to kill myself", "end my life", "don't want to live", "suicide"]
     return any(phrase in text.lower() for phrase in crisis_phrases)
 
-async def run_db_op(op_func):
-    """Wrapper to run a DB operation function in a separate thread with its own context."""
-    def wrapped_op():
-        with get_db_context() as (conn, cursor):
-            return op_func(conn, cursor)
-    return await asyncio.to_thread(wrapped_op)
-
 @router.post("/chat")
 async def chat(
     request: ChatRequest,
@@ -87,13 +95,7 @@ async def chat(
 
     user_input = request.message
     utils = get_models_and_utils()
-
-    def crisis_check_and_save(conn, cursor):
-        cursor.execute(
-            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
-            (user_id, user_role, user_input, "high")
-        )
-        conn.commit()
+    storage = utils["storage"]
 
     # MULTILINGUAL SUPPORT
     lang_code = utils["detect_language"](user_input)
@@ -103,126 +105,193 @@ async def chat(
 
     # 1. Check for immediate crisis keywords
     if detect_crisis(text_normalized) or detect_crisis(original_normalized):
-        await run_db_op(crisis_check_and_save)
-        utils["send_crisis_alerts"](user_id, user_role, user_input, risk_source="keyword_match")
+        await storage.save_chat(
+            user_id, user_role, user_input, "high", text=text_normalized, is_english=True,
+            alert_source="keyword_match"
+        )
+        utils["wake_alert_dispatcher"]()
         return {
             "risk_level": "high", "crisis": True, "trigger_appointment_popup": True,
             "reply": "I hear you, and I'm really glad you shared this with me. Take a slow, deep breath with me - you're safe right now."
         }
 
+    # Speculative reply: overlap the Gemini call with risk detection
+    speculative = None
+    if SPECULATIVE_LLM:
+        speculative = SpeculativeReply(utils["get_gemini_response"], user_input, lang_code, SPECULATIVE_RISK)
+
     # PSYNOVA AI RISK PIPELINE
     try:
-        # Fetch mood trend
-        def fetch_context(conn, cursor):
-            cursor.execute("SELECT mood_score FROM moods WHERE user_id = ? ORDER BY created_at DESC LIMIT 5", (user_id,))
-            mood_rows = cursor.fetchall()
-            
-            cursor.execute("SELECT risk_level FROM chats WHERE user_id = ? ORDER BY created_at DESC LIMIT 10", (user_id,))
-            risk_rows = cursor.fetchall()
-
-            cursor.execute("SELECT message FROM chats WHERE user_id = ? ORDER BY created_at DESC LIMIT 4", (user_id,))
-            msg_rows = cursor.fetchall()
-            return mood_rows, risk_rows, msg_rows
-
-        mood_rows, risk_rows, msg_rows = await run_db_op(fetch_context)
-        
-        mood_trend = sum([m[0] for m in mood_rows]) / len(mood_rows) if mood_rows else 7.0
-        hist_risk_freq = sum([1 for r in risk_rows if r[0] == 'high']) / len(risk_rows) if risk_rows else 0.0
-        clean_history = [utils["translate_to_english"](r[0]) for r in msg_rows][::-1] + [text_normalized]
+        # Mood trend, risk frequency and recent messages: one feature record lookup
+        features, temporal_state = await storage.load_context(user_id)
+
+        mood_trend = utils["features"].mood_trend(features)
+        hist_risk_freq = utils["features"].hist_risk(features)
+        # Oldest first, English; translation only for rows without a stored embedding
+        history_rows = await asyncio.to_thread(
+            utils["features"].history_rows, features, utils["translate_to_english"]
+        )
     except Exception as e:
         print(f"WARNING: Context fetch error: {e}")
-        mood_trend, hist_risk_freq, clean_history = 7.0, 0.0, [text_normalized]
-
-    # --- PARALLEL DETECTION LAYER ---
-    risk_rule = utils["detect_risk_rule"](text_normalized)
-    risk_bert = 0
-    try: 
-        risk_bert = utils["predict_risk_ensemble"](text_normalized)
-    except Exception as e: 
-        print(f"ERROR: predict_risk_ensemble failed: {e}. Text: {text_normalized}")
-        # In a real app, use logger.exception here
-
-    risk_xgb = 0
-    try: 
-        risk_xgb = utils["predict_risk_xgb"](text_normalized, hist_risk=hist_risk_freq, mood_trend=mood_trend)
-    except Exception as e: 
-        print(f"ERROR: predict_risk_xgb failed: {e}. Text: {text_normalized}, hist: {hist_risk_freq}, mood: {mood_trend}")
-
-    risk_temporal = 0
-    try: 
-        risk_temporal = utils["predict_temporal_risk_lstm"](clean_history)
-    except Exception as e: 
-        print(f"ERROR: predict_temporal_risk_lstm failed: {e}. History: {clean_history}")
-
-    final_risk = max(risk_rule, risk_bert, risk_xgb, risk_temporal)
-    try:
-        semantic_risk, _ = utils["detect_semantic_risk"](text_normalized)
-        if semantic_risk == 2 and final_risk >= 1: 
-            final_risk = 2
-    except Exception as e: 
-        print(f"ERROR: detect_semantic_risk failed: {e}. Text: {text_normalized}")
+        mood_trend, hist_risk_freq, history_rows, temporal_state = 7.0, 0.0, [], None
+
+    # --- CASCADE: CHEAP STAGE ---
+    # Rule, XGBoost and MiniLM similarity first; skip the transformers when they settle it
+    cheap, shortcut_risk = None, None
+    if CASCADE_ENABLED:
+        try:
+            cheap = await asyncio.to_thread(utils["cascade_cheap_stage"], text_normalized, hist_risk_freq, mood_trend)
+            shortcut_risk, outcome = utils["cascade_decide"](cheap, hist_risk_freq)
+            utils["cascade_record"](outcome)
+        except Exception as e:
+            print(f"ERROR: cascade cheap stage failed: {e}. Running full pipeline. Text: {text_normalized}")
+            cheap = None
+
+    encoded = None
+    temporal_update = None
+    if shortcut_risk is not None:
+        final_risk = shortcut_risk
+    else:
+        # --- SHARED ENCODE STAGE ---
+        # Tokenize once per tokenizer family; every model head reuses these tensors
+        try:
+            encoded = await asyncio.to_thread(
+                utils["encode_turn"], text_normalized, cheap["semantic_embedding"] if cheap else None
+            )
+        except Exception as e:
+            print(f"ERROR: encode_turn failed: {e}. Text: {text_normalized}")
+
+        # --- PARALLEL DETECTION LAYER ---
+        risk_rule = cheap["rule"] if cheap else utils["detect_risk_rule"](text_normalized)
+        risk_bert = 0
+        try: 
+            if encoded is not None:
+                risk_bert = await utils["predict_ensemble"](encoded["input_ids"])
+            else:
+                risk_bert = await utils["predict_risk_ensemble"](text_normalized)
+        except Exception as e: 
+            print(f"ERROR: predict_risk_ensemble failed: {e}. Text: {text_normalized}")
+            # In a real app, use logger.exception here
+
+        risk_xgb = 0
+        try: 
+            if cheap:
+                risk_xgb = cheap["xgb"]
+            else:
+                risk_xgb = await utils["predict_risk_xgb"](
+                    text_normalized, hist_risk=hist_risk_freq, mood_trend=mood_trend
+                )
+        except Exception as e: 
+            print(f"ERROR: predict_risk_xgb failed: {e}. Text: {text_normalized}, hist: {hist_risk_freq}, mood: {mood_trend}")
+
+        risk_temporal = 0
+        try: 
+            if encoded is not None and TEMPORAL_MODE == "streaming":
+                # One LSTM step per new message from the carried (h_n, c_n)
+                risk_temporal, temporal_update = await asyncio.to_thread(
+                    utils["stream_temporal_risk"], temporal_state, history_rows, encoded["cls"],
+                    utils["features"].already_english
+                )
+            elif encoded is not None:
+                # Stored embeddings: only the current message is encoded this turn
+                history_vectors = await asyncio.to_thread(
+                    utils["resolve_history_embeddings"], history_rows, utils["features"].already_english
+                )
+                risk_temporal = await utils["predict_temporal_risk_from_embeddings"](history_vectors + [encoded["cls"]])
+            else:
+                clean_history = [r[1] for r in history_rows] + [text_normalized]
+                risk_temporal = await utils["predict_temporal_risk_lstm"](clean_history)
+        except Exception as e: 
+            print(f"ERROR: predict_temporal_risk_lstm failed: {e}. History rows: {[r[0] for r in history_rows]}")
+
+        final_risk = max(risk_rule, risk_bert, risk_xgb, risk_temporal)
+        try:
+            if cheap:
+                semantic_risk = cheap["semantic"]
+            else:
+                semantic_risk, _ = await utils["detect_semantic_risk"](
+                    text_normalized, text_embedding=encoded["semantic"] if encoded else None
+                )
+            if semantic_risk == 2 and final_risk >= 1: 
+                final_risk = 2
+        except Exception as e: 
+            print(f"ERROR: detect_semantic_risk failed: {e}. Text: {text_normalized}")
 
     risk_label = "high" if final_risk == 2 else "medium" if final_risk == 1 else "low"
 
+    if final_risk == 2 and speculative is not None:
+        speculative.cancel()
+
     # Final save
-    def save_final(conn, cursor):
-        cursor.execute(
-            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
-            (user_id, user_role, user_input, risk_label)
-        )
-        conn.commit()
-    
-    await run_db_op(save_final)
+    await storage.save_chat(
+        user_id, user_role, user_input, risk_label, text=text_normalized, is_english=True,
+        embedding=encoded["cls"] if encoded is not None else None, temporal_update=temporal_update,
+        alert_source="pipeline" if final_risk == 2 else None
+    )
 
     if final_risk == 2:
-        utils["send_crisis_alerts"](user_id, user_role, user_input, risk_source="pipeline")
+        utils["wake_alert_dispatcher"]()
         return {
             "risk_level": "high", "crisis": True, "trigger_appointment_popup": True,
             "reply": "I can sense you're going through something really tough... Let's take a moment together. Breathe in slowly... and out."
         }
 
-    reply = utils["get_gemini_response"](user_input, final_risk, language=lang_code)
+    reply = await speculative.resolve(final_risk) if speculative is not None else None
+    if reply is None:
+        reply = await utils["get_gemini_response"](user_input, final_risk, language=lang_code)
     
     # Save bot reply to history for isolation
-    def save_bot_reply(conn, cursor):
-        cursor.execute(
-            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
-            (user_id, "bot", reply, risk_label)
-        )
-        conn.commit()
-    
-    await run_db_op(save_bot_reply)
+    await storage.save_chat(user_id, "bot", reply, risk_label, text=reply, is_english=lang_code == "en")
 
     return {"risk_level": risk_label, "reply": reply}
 
 
+async def fetch_history_page(kind: str, user_id: str, cursor: Optional[str], limit: int,
+                             if_none_match: Optional[str]):
+    """
+    (etag, rows, next_cursor) for one keyset page; rows is None when the
+    client's If-None-Match still matches (nothing newer was written).
+    """
+    from app.syna_ai.storage import get_storage
+    try:
+        return await get_storage().history_page(kind, user_id, cursor, limit, if_none_match)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
 @router.get("/history", response_model=ChatHistoryOut)
 async def get_chat_history(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
     current_user: AnyUser = Depends(get_current_user)
 ):
     """
-    Fetch the isolated chat history for the logged-in user.
+    Fetch the isolated chat history for the logged-in user, one page at a
+    time: the newest `limit` messages (oldest first within the page), then
+    older pages via `cursor`. Supports If-None-Match.
     """
     user_id = str(current_user.id)
 
-    def fetch_history(conn, cursor):
-        cursor.execute(
-            "SELECT id, role, message, risk_level, created_at FROM chats WHERE user_id = ? ORDER BY created_at ASC",
-            (user_id,)
-        )
-        rows = cursor.fetchall()
-        return [
-            ChatMessageOut(
-                id=r[0],
-                role=r[1],
-                message=r[2],
-                risk_level=r[3],
-                created_at=str(r[4])
-            ) for r in rows
-        ]
-
-    history = await run_db_op(fetch_history)
-    return ChatHistoryOut(history=history)
+    etag, rows, next_cursor = await fetch_history_page("chats", user_id, cursor, limit, if_none_match)
+    if rows is None:
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    history = [
+        ChatMessageOut(
+            id=r[0],
+            role=r[2],
+            message=r[3],
+            risk_level=r[4],
+            created_at=str(r[1])
+        ) for r in reversed(rows)
+    ]
+    return ChatHistoryOut(history=history, next_cursor=next_cursor)
 
 # ---------------------------------------------------------
 # COPING MECHANISMS: MOOD & JOURNALS
@@ -240,14 +309,10 @@ async def post_mood(
     current_user: AnyUser = Depends(get_current_user)
 ):
     """Save a user's isolated mood check-in."""
+    from app.syna_ai.storage import get_storage
     user_id = str(current_user.id)
-    utils = get_models_and_utils()
-    
-    # Run synchronously in threadpool to avoid DB blocking
-    def _save():
-        utils["save_mood"](user_id, request.mood)
-    
-    await asyncio.to_thread(_save)
+
+    await get_storage().add_mood(user_id, request.mood)
     return {"status": "success", "user_id": user_id}
 
 @router.get("/mood/history")
@@ -255,10 +320,10 @@ async def get_mood_history(
     current_user: AnyUser = Depends(get_current_user)
 ):
     """Fetch recent mood check-ins for the isolated user."""
-    from app.syna_ai.models.mood_logic import get_recent_moods
+    from app.syna_ai.storage import get_storage
     user_id = str(current_user.id)
-    
-    rows = await asyncio.to_thread(get_recent_moods, user_id)
+
+    rows = await get_storage().recent_moods(user_id)
     return {"history": [{"mood_score": r[0], "date": r[1]} for r in rows]}
 
 @router.post("/journal")
@@ -267,47 +332,107 @@ async def post_journal(
     current_user: AnyUser = Depends(get_current_user)
 ):
     """Save an isolated journal entry."""
+    from app.syna_ai.storage import get_storage
     user_id = str(current_user.id)
-    
-    def _save(conn, cursor):
-        cursor.execute(
-            "INSERT INTO journals (user_id, content) VALUES (?, ?)",
-            (user_id, request.content)
-        )
-        conn.commit()
-    
-    # Reuse existing run_db_op if possible, but let's just use get_db_context for simplicity
-    with get_db_context() as (conn, cursor):
-         _save(conn, cursor)
-         
+
+    await get_storage().add_journal(user_id, request.content)
     return {"status": "success"}
 
 @router.get("/journal/history")
 async def get_journal_history(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None),
     current_user: AnyUser = Depends(get_current_user)
 ):
-    """Fetch isolated journal history."""
+    """Fetch isolated journal history, newest first, one page at a time."""
     user_id = str(current_user.id)
 
-    def _fetch(conn, cursor):
-        cursor.execute("SELECT content, created_at FROM journals WHERE user_id = ? ORDER BY created_at DESC", (user_id,))
-        return cursor.fetchall()
+    etag, rows, next_cursor = await fetch_history_page("journals", user_id, cursor, limit, if_none_match)
+    if rows is None:
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return {"history": [{"content": r[2], "date": r[1]} for r in rows], "next_cursor": next_cursor}
+
 
-    with get_db_context() as (conn, cursor):
-        rows = _fetch(conn, cursor)
+@router.get("/journal/search")
+async def search_journal(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    current_user: AnyUser = Depends(get_current_user)
+):
+    """
+    Full-text search over the user's own journal entries, best match first.
+    Snippets are HTML-escaped with matches wrapped in <mark>; page with `cursor`.
+    """
+    from app.syna_ai.storage import get_storage
+    user_id = str(current_user.id)
+
+    try:
+        rows, next_cursor = await get_storage().search_journals(user_id, q, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "results": [{"id": r[0], "date": r[1], "snippet": r[2], "score": -r[3]} for r in rows],
+        "next_cursor": next_cursor,
+    }
 
-    return {"history": [{"content": r[0], "date": r[1]} for r in rows]}
+
+def since_day(days: Optional[int]) -> str:
+    """Lower bound ("YYYY-MM-DD", UTC) for the last `days` days; "" for all time."""
+    if days is None:
+        return ""
+    from datetime import datetime, timedelta, timezone
+    return (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
 
 
 @router.get("/analytics/risks")
 async def get_analytics_risks(
+    days: Optional[int] = Query(None, ge=1, le=ANALYTICS_MAX_DAYS),
     current_user: AnyUser = Depends(get_current_user)
 ):
-    """Isolated risk analytics for the logged-in user."""
+    """Isolated risk analytics for the logged-in user (all time, or the last `days` days)."""
+    from app.syna_ai.storage import get_storage
     user_id = str(current_user.id)
-    def _fetch_risk_counts():
-        with get_db_context() as (conn, cursor):
-            cursor.execute("SELECT risk_level, COUNT(*) FROM chats WHERE user_id = ? GROUP BY risk_level", (user_id,))
-            return dict(cursor.fetchall())
-    
-    return await asyncio.to_thread(_fetch_risk_counts)
+
+    return await get_storage().risk_distribution(user_id, since_day(days))
+
+
+@router.get("/analytics/summary")
+async def get_analytics_summary(
+    days: int = Query(30, ge=1, le=ANALYTICS_MAX_DAYS),
+    current_user: AnyUser = Depends(get_current_user)
+):
+    """Risk distribution, daily mood averages and peak hours (UTC) for the logged-in user."""
+    from app.syna_ai.storage import get_storage
+    user_id = str(current_user.id)
+
+    return await get_storage().analytics_summary(user_id, since_day(days))
+
+
+@router.get("/analytics/platform", dependencies=[Depends(role_required(Role.ADMIN))])
+async def get_platform_analytics(
+    days: int = Query(30, ge=1, le=ANALYTICS_MAX_DAYS)
+):
+    """Platform-wide risk distribution, daily mood averages and peak hours (UTC). Admin only."""
+    from app.syna_ai.analytics import PLATFORM
+    from app.syna_ai.storage import get_storage
+
+    return await get_storage().analytics_summary(PLATFORM, since_day(days))
+
+
+@router.get("/metrics", dependencies=[Depends(role_required(Role.ADMIN))])
+async def get_pipeline_metrics():
+    """Pipeline metrics (inference batching, cascade, LLM, crisis alert delivery, group commits). Admin only."""
+    from app.syna_ai import inference, cascade, speculation, llm_client, alert_dispatcher, db_writer
+    metrics = await asyncio.to_thread(inference.stats)
+    metrics["crisis_alerts"] = await asyncio.to_thread(alert_dispatcher.stats)
+    metrics["llm"] = llm_client.stats()
+    metrics["cascade"] = cascade.stats()
+    metrics["speculative_llm"] = speculation.stats()
+    metrics["db_writer"] = db_writer.stats()
+    return metrics
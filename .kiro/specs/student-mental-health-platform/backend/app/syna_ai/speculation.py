@@ -0,0 +1,82 @@
+"""
+PSYNOVA Speculative Replies
+Runs the Gemini call concurrently with risk detection.
+
+The reply is generated for an assumed risk level (SYNA_SPECULATIVE_RISK,
+normally low) as soon as the message is translated. Once the pipeline
+resolves the real risk:
+- same level:  the speculative reply is used, so latency is max(risk, LLM)
+- high risk:   the speculation is cancelled and the crisis response is sent
+- other level: the reply is discarded and regenerated for the real level
+"""
+
+import asyncio
+import threading
+import time
+
+OUTCOMES = ("used", "cancelled_high", "discarded_mismatch", "failed")
+
+_lock = threading.Lock()
+_counts = dict.fromkeys(OUTCOMES, 0)
+_timing = {"llm_ms": 0.0, "waited_ms": 0.0}
+
+
+def _record(outcome: str, llm_ms: float = 0.0, waited_ms: float = 0.0):
+    with _lock:
+        _counts[outcome] += 1
+        _timing["llm_ms"] += llm_ms
+        _timing["waited_ms"] += waited_ms
+
+
+def stats() -> dict:
+    with _lock:
+        counts, timing = dict(_counts), dict(_timing)
+    total = sum(counts.values())
+    wasted = counts["cancelled_high"] + counts["discarded_mismatch"] + counts["failed"]
+    used = counts["used"]
+    return {
+        "started": total,
+        "counts": counts,
+        "wasted_rate": round(wasted / total, 4) if total else 0.0,
+        # LLM time hidden behind risk detection, per used speculation
+        "mean_overlap_ms": round((timing["llm_ms"] - timing["waited_ms"]) / used, 1) if used else 0.0,
+    }
+
+
+class SpeculativeReply:
+    """One in-flight speculative Gemini call for a chat turn."""
+
+    def __init__(self, generate, user_text: str, language: str, assumed_risk: int):
+        self.assumed_risk = assumed_risk
+        self._started = time.perf_counter()
+        self._finished = None
+        self._task = asyncio.create_task(self._run(generate, user_text, language))
+
+    async def _run(self, generate, user_text, language):
+        try:
+            return await generate(user_text, self.assumed_risk, language=language)
+        finally:
+            self._finished = time.perf_counter()
+
+    def cancel(self):
+        """Final risk is high: abort the in-flight request, its reply will never be shown."""
+        self._task.cancel()
+        _record("cancelled_high")
+
+    async def resolve(self, final_risk: int):
+        """The speculative reply if it was generated for `final_risk`, else None."""
+        if final_risk != self.assumed_risk:
+            self._task.cancel()
+            _record("discarded_mismatch")
+            return None
+
+        wait_start = time.perf_counter()
+        try:
+            reply = await self._task
+        except Exception as e:
+            print(f"ERROR: Speculative Gemini call failed: {e}")
+            _record("failed")
+            return None
+        waited_ms = (time.perf_counter() - wait_start) * 1000
+        _record("used", llm_ms=((self._finished or time.perf_counter()) - self._started) * 1000, waited_ms=waited_ms)
+        return reply
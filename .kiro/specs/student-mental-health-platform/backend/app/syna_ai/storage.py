@@ -0,0 +1,489 @@
+"""
+PSYNOVA Syna Storage
+Backend-neutral access to Syna's per-user data (chats, moods, journals and
+the streaming temporal state), selected with SYNA_STORAGE:
+
+- "sqlite" (default): syna_internal.db via the pooled connections, the
+  group-commit writer and the per-user feature store.
+- "mongo": native async Motor collections in the platform's MongoDB
+  (app/database.py), so any number of API hosts can serve Syna.
+
+Crisis alerts go to the local alert outbox (crisis_alerts.py) with both
+backends: the dispatcher claims and retries deliveries from it, and a
+per-host outbox is enough to guarantee delivery.
+
+Existing SQLite data is copied with tools/migrate_to_mongo.py.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.syna_ai import pagination
+from app.syna_ai.analytics import PLATFORM
+from app.syna_ai.config import STORAGE_BACKEND, TEMPORAL_MODE
+
+# Mongo rollup collection -> key field after (scope, day)
+ROLLUP_KEYS = {"rollup_daily_risk": "risk_level", "rollup_hourly_activity": "hour", "rollup_daily_mood": None}
+
+# history_page() row layout per kind
+HISTORY_COLUMNS = {
+    "chats": "id, created_at, role, message, risk_level",
+    "journals": "id, created_at, content",
+}
+
+
+class SynaStorage:
+    """
+    Interface used by the Syna router. Timestamps come back as
+    "YYYY-MM-DD HH:MM:SS" strings (UTC) from every backend.
+    """
+
+    name = "base"
+
+    async def open(self):
+        """Prepare schema / indexes. Called once at startup."""
+
+    async def close(self):
+        pass
+
+    async def load_context(self, user_id: str) -> tuple:
+        """
+        (features, temporal_state) for a chat turn. `features` has the
+        feature_store record shape (moods, risks, recent, embeddings);
+        temporal_state is None unless TEMPORAL_MODE is "streaming".
+        """
+        raise NotImplementedError
+
+    async def save_chat(self, user_id: str, role: str, message: str, risk_level: str, *, text: str,
+                        is_english: bool, embedding=None, temporal_update: Optional[dict] = None,
+                        alert_source: Optional[str] = None) -> int:
+        """
+        Persist one chats row and everything derived from it: the English
+        `text` the models saw, its CLS `embedding`, the advanced temporal
+        state and, with `alert_source`, a queued crisis alert. Returns the id.
+        """
+        raise NotImplementedError
+
+    async def history_page(self, kind: str, user_id: str, after: Optional[str], limit: int,
+                           if_none_match: Optional[str] = None) -> tuple:
+        """
+        (etag, rows, next_cursor) for one keyset page of "chats" or
+        "journals", newest first, rows laid out as HISTORY_COLUMNS[kind].
+        rows is None when If-None-Match still matches. Raises ValueError
+        for a malformed cursor.
+        """
+        raise NotImplementedError
+
+    async def add_journal(self, user_id: str, content: str):
+        raise NotImplementedError
+
+    async def search_journals(self, user_id: str, query: str, after: Optional[str], limit: int) -> tuple:
+        """
+        (rows, next_cursor) of the user's journal entries matching `query`,
+        best first; rows are (id, created_at, snippet_html, score). Raises
+        ValueError for a query without terms or a malformed cursor.
+        """
+        raise NotImplementedError
+
+    async def add_mood(self, user_id: str, mood_score: int):
+        raise NotImplementedError
+
+    async def recent_moods(self, user_id: str, limit: int = 7) -> list:
+        """[(mood_score, created_at)], newest first."""
+        raise NotImplementedError
+
+    async def risk_distribution(self, scope: str, since_day: str = "") -> dict:
+        """
+        {risk_level: count} from the analytics rollups; `scope` is a user id
+        or analytics.PLATFORM, `since_day` a "YYYY-MM-DD" lower bound.
+        """
+        raise NotImplementedError
+
+    async def analytics_summary(self, scope: str, since_day: str = "") -> dict:
+        """Risk distribution, daily mood averages and peak hours from the rollups."""
+        raise NotImplementedError
+
+
+# ===============================
+# SQLITE
+# ===============================
+
+class SQLiteStorage(SynaStorage):
+    name = "sqlite"
+
+    @staticmethod
+    async def _read(op_func):
+        from app.syna_ai.database import get_db_context
+
+        def wrapped_op():
+            with get_db_context() as (conn, cursor):
+                return op_func(conn, cursor)
+        return await asyncio.to_thread(wrapped_op)
+
+    async def open(self):
+        from app.syna_ai.database import init_db
+        await asyncio.to_thread(init_db)
+
+    async def close(self):
+        from app.syna_ai import db_writer
+        await db_writer.close()
+
+    async def load_context(self, user_id: str) -> tuple:
+        from app.syna_ai.feature_store import get_features
+        from app.syna_ai.temporal_state import load_temporal_state
+
+        def fetch_context(conn, cursor):
+            features = get_features(cursor, user_id)
+            temporal_state = None
+            if TEMPORAL_MODE == "streaming":
+                temporal_state = load_temporal_state(cursor, user_id)
+            conn.commit()  # persists a first-use bootstrap
+            return features, temporal_state
+
+        return await self._read(fetch_context)
+
+    async def save_chat(self, user_id: str, role: str, message: str, risk_level: str, *, text: str,
+                        is_english: bool, embedding=None, temporal_update: Optional[dict] = None,
+                        alert_source: Optional[str] = None) -> int:
+        from app.syna_ai import analytics
+        from app.syna_ai.crisis_alerts import enqueue_crisis_alert
+        from app.syna_ai.db_writer import write_db_op
+        from app.syna_ai.embedding_store import save_embedding
+        from app.syna_ai.feature_store import record_chat
+        from app.syna_ai.temporal_state import save_temporal_state
+
+        def save(conn, cursor):
+            cursor.execute(
+                "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+                (user_id, role, message, risk_level)
+            )
+            chat_id = cursor.lastrowid
+            record_chat(cursor, user_id, chat_id, text, is_english, risk_level, embedding=embedding)
+            analytics.record_chat(cursor, user_id, chat_id)
+            if embedding is not None:
+                save_embedding(cursor, chat_id, embedding)
+            if temporal_update is not None:
+                save_temporal_state(cursor, user_id, temporal_update, chat_id)
+            # Queued in the same transaction; delivery happens in the background
+            if alert_source is not None:
+                enqueue_crisis_alert(cursor, user_id, role, message, alert_source)
+            return chat_id
+
+        return await write_db_op(save)
+
+    async def history_page(self, kind: str, user_id: str, after: Optional[str], limit: int,
+                           if_none_match: Optional[str] = None) -> tuple:
+        def fetch(conn, cursor):
+            newest_id = pagination.latest_id(cursor, kind, user_id)
+            etag = pagination.page_etag(kind, user_id, newest_id, after, limit)
+            if pagination.etag_matches(if_none_match, etag):
+                return etag, None, None
+            rows, next_cursor = pagination.fetch_page(cursor, kind, HISTORY_COLUMNS[kind], user_id, after, limit)
+            if kind == "chats" and next_cursor is None:
+                # Past the live rows: continue into the archived months
+                from app.syna_ai.archive import extend_page
+                rows, next_cursor = extend_page(
+                    cursor, user_id, rows, pagination.decode_cursor(after) if after else None, limit
+                )
+            return etag, rows, next_cursor
+
+        return await self._read(fetch)
+
+    async def add_journal(self, user_id: str, content: str):
+        from app.syna_ai.db_writer import write_db_op
+
+        def save(conn, cursor):
+            cursor.execute("INSERT INTO journals (user_id, content) VALUES (?, ?)", (user_id, content))
+
+        await write_db_op(save)
+
+    async def search_journals(self, user_id: str, query: str, after: Optional[str], limit: int) -> tuple:
+        from app.syna_ai.journal_search import search
+        return await self._read(lambda conn, cursor: search(cursor, user_id, query, after, limit))
+
+    async def add_mood(self, user_id: str, mood_score: int):
+        from app.syna_ai.db_writer import write_db_op
+        from app.syna_ai.models.mood_logic import insert_mood
+
+        # Insert, rollup and feature record in one op on the single writer
+        await write_db_op(lambda conn, cursor: insert_mood(cursor, user_id, mood_score))
+
+    async def recent_moods(self, user_id: str, limit: int = 7) -> list:
+        from app.syna_ai.models.mood_logic import fetch_recent_moods
+        return await self._read(lambda conn, cursor: fetch_recent_moods(cursor, user_id, limit))
+
+    async def risk_distribution(self, scope: str, since_day: str = "") -> dict:
+        from app.syna_ai.analytics import get_risk_distribution
+        return await self._read(lambda conn, cursor: get_risk_distribution(cursor, scope, since_day))
+
+    async def analytics_summary(self, scope: str, since_day: str = "") -> dict:
+        from app.syna_ai import analytics
+
+        def fetch(conn, cursor):
+            return {
+                "risk_distribution": analytics.get_risk_distribution(cursor, scope, since_day),
+                "mood_trend": analytics.get_mood_trend(cursor, scope, since_day),
+                "peak_hours": analytics.get_peak_hours(cursor, scope, since_day),
+            }
+
+        return await self._read(fetch)
+
+
+# ===============================
+# MONGODB
+# ===============================
+
+def format_time(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class MongoStorage(SynaStorage):
+    """
+    Collections (prefixed "syna_") in the platform database:
+    - chats:    _id (int), user_id, role, message, risk_level, created_at,
+                text / is_english (model input), embedding (float16 bytes)
+    - moods, journals: _id (int), user_id, ..., created_at
+    - temporal_state: _id = user_id (the conversation id)
+    - counters: per-collection integer id sequences, so ids, cursors and
+      API payloads keep the SQLite shape
+    - rollup_daily_risk / rollup_hourly_activity / rollup_daily_mood: the
+      analytics.py rollups, _id "<scope>|<day>|<key>", updated with $inc
+
+    Every per-user query is served by a (user_id, created_at, _id) index.
+    The feature record is computed from the last few chats/moods on each
+    turn rather than stored.
+    """
+
+    name = "mongo"
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        if self._db is None:
+            from app import database
+            from app.config import settings
+            self._db = database.client[settings.MONGODB_DB_NAME]
+        return self._db
+
+    def _col(self, kind: str):
+        return self.db[f"syna_{kind}"]
+
+    async def open(self):
+        for kind in ("chats", "moods", "journals"):
+            await self._col(kind).create_index(
+                [("user_id", 1), ("created_at", -1), ("_id", -1)], name=f"syna_{kind}_user_created"
+            )
+        # Journal search: text index scoped to one user by the equality prefix
+        await self._col("journals").create_index([("user_id", 1), ("content", "text")], name="syna_journals_search")
+        for kind in ("rollup_daily_risk", "rollup_hourly_activity", "rollup_daily_mood"):
+            await self._col(kind).create_index([("scope", 1), ("day", 1)], name=f"syna_{kind}_scope_day")
+
+    async def _next_id(self, kind: str) -> int:
+        from pymongo import ReturnDocument
+        counter = await self._col("counters").find_one_and_update(
+            {"_id": kind}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return counter["seq"]
+
+    @staticmethod
+    def _newest_first(query):
+        return query.sort([("created_at", -1), ("_id", -1)])
+
+    async def _rollup(self, kind: str, user_id: str, day: str, key, inc: dict):
+        for scope in (user_id, PLATFORM):
+            fields = {"scope": scope, "day": day}
+            if key is not None:
+                fields[ROLLUP_KEYS[kind]] = key
+            await self._col(kind).update_one(
+                {"_id": "|".join(str(v) for v in fields.values())},
+                {"$inc": inc, "$setOnInsert": fields}, upsert=True
+            )
+
+    async def _insert(self, kind: str, doc: dict) -> int:
+        doc["_id"] = await self._next_id(kind)
+        doc.setdefault("created_at", datetime.now(timezone.utc).replace(tzinfo=None))
+        await self._col(kind).insert_one(doc)
+        return doc["_id"]
+
+    async def load_context(self, user_id: str) -> tuple:
+        from app.syna_ai.feature_store import MOOD_WINDOW, RECENT_WINDOW, RISK_WINDOW
+
+        async def chats():
+            query = self._col("chats").find({"user_id": user_id}, {"risk_level": 1, "text": 1, "is_english": 1})
+            return await self._newest_first(query).limit(RISK_WINDOW).to_list(RISK_WINDOW)
+
+        async def moods():
+            query = self._col("moods").find({"user_id": user_id}, {"mood_score": 1})
+            return await self._newest_first(query).limit(MOOD_WINDOW).to_list(MOOD_WINDOW)
+
+        recent_chats, recent_moods = await asyncio.gather(chats(), moods())
+        recent_chats.reverse()
+        recent = recent_chats[-RECENT_WINDOW:]
+        embeddings = {}
+        if recent:
+            cursor = self._col("chats").find(
+                {"_id": {"$in": [c["_id"] for c in recent]}, "embedding": {"$ne": None}}, {"embedding": 1}
+            )
+            embeddings = {doc["_id"]: doc["embedding"] async for doc in cursor}
+
+        features = {
+            "moods": [m["mood_score"] for m in reversed(recent_moods)],
+            "risks": [c["risk_level"] for c in recent_chats],
+            "recent": [[c["_id"], c["text"], c["is_english"]] for c in recent],
+            "embeddings": embeddings,
+        }
+        temporal_state = await self._load_temporal_state(user_id) if TEMPORAL_MODE == "streaming" else None
+        return features, temporal_state
+
+    async def _load_temporal_state(self, user_id: str):
+        import numpy as np
+
+        doc = await self._col("temporal_state").find_one({"_id": user_id})
+        if doc is None:
+            return None
+        unseen = await self._col("chats").count_documents({"user_id": user_id, "_id": {"$gt": doc["last_chat_id"]}})
+        return {
+            "h_n": np.frombuffer(doc["h_n"], dtype=np.float32).copy(),
+            "c_n": np.frombuffer(doc["c_n"], dtype=np.float32).copy(),
+            "steps": doc["steps"],
+            "last_chat_id": doc["last_chat_id"],
+            "unseen": unseen,
+        }
+
+    async def save_chat(self, user_id: str, role: str, message: str, risk_level: str, *, text: str,
+                        is_english: bool, embedding=None, temporal_update: Optional[dict] = None,
+                        alert_source: Optional[str] = None) -> int:
+        from app.syna_ai.embedding_store import pack_embedding
+
+        doc = {
+            "user_id": user_id, "role": role, "message": message, "risk_level": risk_level,
+            "text": text, "is_english": is_english,
+            "embedding": pack_embedding(embedding) if embedding is not None else None,
+        }
+        chat_id = await self._insert("chats", doc)
+        day = doc["created_at"].strftime("%Y-%m-%d")
+        await self._rollup("rollup_daily_risk", user_id, day, risk_level, {"count": 1})
+        await self._rollup("rollup_hourly_activity", user_id, day, doc["created_at"].hour, {"count": 1})
+        if temporal_update is not None:
+            import numpy as np
+            await self._col("temporal_state").replace_one({"_id": user_id}, {
+                "h_n": np.asarray(temporal_update["h_n"], dtype=np.float32).tobytes(),
+                "c_n": np.asarray(temporal_update["c_n"], dtype=np.float32).tobytes(),
+                "steps": temporal_update["steps"],
+                "last_chat_id": chat_id,
+                "updated_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            }, upsert=True)
+        if alert_source is not None:
+            from app.syna_ai.crisis_alerts import send_crisis_alerts
+            await asyncio.to_thread(send_crisis_alerts, user_id, role, message, alert_source)
+        return chat_id
+
+    async def history_page(self, kind: str, user_id: str, after: Optional[str], limit: int,
+                           if_none_match: Optional[str] = None) -> tuple:
+        columns = [c.strip() for c in HISTORY_COLUMNS[kind].split(",")]
+        fields = {c: 1 for c in columns if c != "id"}
+
+        newest = await self._newest_first(self._col(kind).find({"user_id": user_id}, {"_id": 1})).limit(1).to_list(1)
+        etag = pagination.page_etag(kind, user_id, newest[0]["_id"] if newest else 0, after, limit)
+        if pagination.etag_matches(if_none_match, etag):
+            return etag, None, None
+
+        query = {"user_id": user_id}
+        if after:
+            created_at, row_id = pagination.decode_cursor(after)
+            created_at = datetime.fromisoformat(created_at)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": row_id}},
+            ]
+        docs = await self._newest_first(self._col(kind).find(query, fields)).limit(limit + 1).to_list(limit + 1)
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = pagination.encode_cursor(docs[-1]["created_at"].isoformat(), docs[-1]["_id"])
+        rows = [
+            tuple(doc["_id"] if c == "id" else format_time(doc[c]) if c == "created_at" else doc[c] for c in columns)
+            for doc in docs
+        ]
+        return etag, rows, next_cursor
+
+    async def add_journal(self, user_id: str, content: str):
+        await self._insert("journals", {"user_id": user_id, "content": content})
+
+    async def search_journals(self, user_id: str, query: str, after: Optional[str], limit: int) -> tuple:
+        from app.syna_ai import journal_search
+
+        terms = journal_search.query_terms(query)
+        if not terms:
+            raise ValueError("search query has no searchable terms")
+        # Quoted terms are ANDed by $text; score is the negated textScore so lower is better, as with bm25
+        pipeline = [
+            {"$match": {"user_id": user_id, "$text": {"$search": " ".join(f'"{t}"' for t in terms)}}},
+            {"$addFields": {"score": {"$multiply": [-1, {"$meta": "textScore"}]}}},
+        ]
+        if after:
+            score, row_id = pagination.decode_cursor(after, key_type=float)
+            pipeline.append({"$match": {"$or": [{"score": {"$gt": score}}, {"score": score, "_id": {"$gt": row_id}}]}})
+        pipeline += [{"$sort": {"score": 1, "_id": 1}}, {"$limit": limit + 1}]
+        docs = await self._col("journals").aggregate(pipeline).to_list(limit + 1)
+        rows = [
+            (d["_id"], format_time(d["created_at"]), journal_search.make_snippet(d["content"], terms), d["score"])
+            for d in docs
+        ]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, pagination.encode_cursor(rows[-1][3], rows[-1][0])
+
+    async def add_mood(self, user_id: str, mood_score: int):
+        doc = {"user_id": user_id, "mood_score": mood_score}
+        await self._insert("moods", doc)
+        await self._rollup(
+            "rollup_daily_mood", user_id, doc["created_at"].strftime("%Y-%m-%d"), None,
+            {"mood_sum": mood_score, "mood_count": 1}
+        )
+
+    async def recent_moods(self, user_id: str, limit: int = 7) -> list:
+        query = self._col("moods").find({"user_id": user_id}, {"mood_score": 1, "created_at": 1})
+        docs = await self._newest_first(query).limit(limit).to_list(limit)
+        return [(d["mood_score"], format_time(d["created_at"])) for d in docs]
+
+    async def _rollup_docs(self, kind: str, scope: str, since_day: str) -> list:
+        return await self._col(kind).find({"scope": scope, "day": {"$gte": since_day}}).to_list(None)
+
+    async def risk_distribution(self, scope: str, since_day: str = "") -> dict:
+        counts = {}
+        for doc in await self._rollup_docs("rollup_daily_risk", scope, since_day):
+            counts[doc["risk_level"]] = counts.get(doc["risk_level"], 0) + doc["count"]
+        return counts
+
+    async def analytics_summary(self, scope: str, since_day: str = "") -> dict:
+        moods = await self._rollup_docs("rollup_daily_mood", scope, since_day)
+        hours = {}
+        for doc in await self._rollup_docs("rollup_hourly_activity", scope, since_day):
+            hours[doc["hour"]] = hours.get(doc["hour"], 0) + doc["count"]
+        return {
+            "risk_distribution": await self.risk_distribution(scope, since_day),
+            "mood_trend": sorted((d["day"], round(d["mood_sum"] / d["mood_count"], 2)) for d in moods),
+            "peak_hours": sorted(hours.items(), key=lambda item: (-item[1], item[0]))[:5],
+        }
+
+
+BACKENDS = {"sqlite": SQLiteStorage, "mongo": MongoStorage}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> SynaStorage:
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND not in BACKENDS:
+                raise ValueError(f"SYNA_STORAGE must be one of {sorted(BACKENDS)}, got {STORAGE_BACKEND!r}")
+            _storage = BACKENDS[STORAGE_BACKEND]()
+        return _storage
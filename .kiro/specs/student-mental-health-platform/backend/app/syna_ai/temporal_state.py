@@ -0,0 +1,86 @@
+"""
+PSYNOVA Streaming Temporal State
+Persists the temporal LSTM's (h_n, c_n) per conversation so each new message
+costs one LSTM step instead of a full 5-step window.
+
+A user's Syna chat is a single thread, so its conversation id is the user id.
+"""
+
+import numpy as np
+from app.syna_ai.config import TEMPORAL_RESET_STEPS
+from app.syna_ai.embedding_store import resolve_history_embeddings
+from app.syna_ai import inference
+
+
+def load_temporal_state(cursor, conversation_id: str):
+    """
+    Stored state for a conversation, or None. `unseen` counts chats rows
+    written after the state was last advanced.
+    """
+    cursor.execute(
+        "SELECT h_n, c_n, steps, last_chat_id FROM temporal_state WHERE conversation_id = ?",
+        (conversation_id,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+
+    cursor.execute(
+        "SELECT COUNT(*) FROM chats WHERE user_id = ? AND id > ?",
+        (conversation_id, row[3])
+    )
+    return {
+        "h_n": np.frombuffer(row[0], dtype=np.float32).copy(),
+        "c_n": np.frombuffer(row[1], dtype=np.float32).copy(),
+        "steps": row[2],
+        "last_chat_id": row[3],
+        "unseen": cursor.fetchone()[0],
+    }
+
+
+def save_temporal_state(cursor, conversation_id: str, update: dict, last_chat_id: int):
+    """Persist the state produced by stream_temporal_risk (caller commits)."""
+    cursor.execute(
+        """INSERT OR REPLACE INTO temporal_state (conversation_id, h_n, c_n, steps, last_chat_id, updated_at)
+           VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)""",
+        (
+            conversation_id,
+            np.asarray(update["h_n"], dtype=np.float32).tobytes(),
+            np.asarray(update["c_n"], dtype=np.float32).tobytes(),
+            update["steps"],
+            last_chat_id,
+        )
+    )
+
+
+def stream_temporal_risk(state: dict, history_rows: list, current_embedding, translate,
+                         reset_steps: int = TEMPORAL_RESET_STEPS):
+    """
+    Advance the conversation's LSTM state over messages it hasn't seen yet
+    (normally just the last bot reply) plus the current message.
+
+    history_rows: (chat_id, message, embedding_blob_or_None), oldest first.
+    The state is re-primed from `history_rows` when there is none, when more
+    rows were written than the window holds, or after `reset_steps` steps.
+
+    Returns (risk_class, update); persist `update` with save_temporal_state
+    once the current message has its chats.id.
+    """
+    new_rows = [] if state is None else [r for r in history_rows if r[0] > state["last_chat_id"]]
+    reprime = (
+        state is None
+        or state["unseen"] > len(new_rows)
+        or (reset_steps > 0 and state["steps"] >= reset_steps)
+    )
+
+    if reprime:
+        rows, start, steps = history_rows, None, 0
+    else:
+        rows, start, steps = new_rows, (state["h_n"], state["c_n"]), state["steps"]
+
+    vectors = resolve_history_embeddings(rows, translate) + [current_embedding]
+    risk, hidden = inference.advance_temporal_state(vectors, start)
+    if hidden is None:
+        # LSTM weights unavailable; nothing to persist
+        return risk, None
+    return risk, {"h_n": hidden[0], "c_n": hidden[1], "steps": steps + len(vectors)}
@@ -0,0 +1,39 @@
+"""
+Move old Syna chats into compressed monthly archive segments (archive.py).
+
+Meant to run from cron (e.g. nightly); each complete month older than the
+threshold is archived once, in its own transaction, so the job can be
+interrupted and re-run safely. History endpoints keep serving archived rows.
+
+Usage:
+    python -m app.syna_ai.tools.archive_chats [--older-than-days 180] [--vacuum]
+"""
+
+import argparse
+import time
+
+from app.syna_ai.archive import archive_dir, archive_old_chats
+from app.syna_ai.config import ARCHIVE_AFTER_DAYS
+from app.syna_ai.database import close_db_pool, get_db_context
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM afterwards to return freed pages to the OS (locks the database while it runs)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    archived = archive_old_chats(args.older_than_days)
+    print(f"Archived {sum(archived.values())} chats from {len(archived)} months to {archive_dir()} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    if args.vacuum and archived:
+        with get_db_context() as (conn, cursor):
+            cursor.execute("VACUUM")
+    close_db_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark the per-operation overhead of Syna SQLite access.
+
+Compares the old access pattern (connect, re-run _init_db, close on every
+operation, rollback journal) against the pooled WAL connections from
+get_db_context(), for the operations a chat turn performs:
+- read:  the fetch_context history query
+- write: one chat INSERT + commit
+
+Runs against a scratch database by default, so production data is untouched.
+
+Usage:
+    python -m app.syna_ai.tools.bench_db [--ops 2000] [--rows 5000] [--db PATH]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app.syna_ai import database
+
+
+@contextmanager
+def _legacy_context(path):
+    """The pre-pool get_db_context: new connection + schema init per op."""
+    conn = sqlite3.connect(path)
+    try:
+        database._init_db(conn.cursor())
+        conn.commit()
+        yield conn, conn.cursor()
+    finally:
+        conn.close()
+
+
+def _seed(path, rows: int):
+    with _legacy_context(path) as (conn, cursor):
+        cursor.executemany(
+            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+            [(f"user{i % 50}", "student", f"seed message {i}", "low") for i in range(rows)]
+        )
+        conn.commit()
+
+
+def _read(conn, cursor):
+    cursor.execute("""
+        SELECT c.id, c.message, e.embedding FROM chats c
+        LEFT JOIN chat_embeddings e ON e.chat_id = c.id
+        WHERE c.user_id = ? ORDER BY c.created_at DESC, c.id DESC LIMIT 4
+    """, ("user7",))
+    cursor.fetchall()
+
+
+def _write(conn, cursor):
+    cursor.execute(
+        "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+        ("bench", "student", "benchmark message", "low")
+    )
+    conn.commit()
+
+
+def _time(context_factory, op, n: int):
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        with context_factory() as (conn, cursor):
+            op(conn, cursor)
+        times.append((time.perf_counter() - t0) * 1e6)
+    times.sort()
+    return sum(times) / n, times[int(n * 0.5)], times[int(n * 0.95)]
+
+
+def run(path: str, ops: int) -> list:
+    database.DB_PATH = path
+    ops_by_name = (("read", _read), ("write", _write))
+    # Legacy first: the pool switches the file to WAL, which persists
+    rows = [("per-op connect + init", name, *_time(lambda: _legacy_context(path), op, ops)) for name, op in ops_by_name]
+    rows += [("pooled WAL", name, *_time(database.get_db_context, op, ops)) for name, op in ops_by_name]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=5000, help="Seed rows for a scratch database")
+    parser.add_argument("--db", help="Benchmark a copy of this database instead of a scratch one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        if args.db:
+            src, dst = sqlite3.connect(args.db), sqlite3.connect(path)
+            src.backup(dst)
+            src.close()
+            dst.close()
+        else:
+            _seed(path, args.rows)
+
+        rows = run(path, args.ops)
+        database.close_db_pool()
+
+    print(f"# Syna SQLite per-op overhead ({args.ops} ops each, microseconds)")
+    print()
+    print("| Access | Op | Mean | p50 | p95 |")
+    print("|--------|----|------|-----|-----|")
+    for access, op, mean, p50, p95 in rows:
+        print(f"| {access} | {op} | {mean:.1f} | {p50:.1f} | {p95:.1f} |")
+
+
+if __name__ == "__main__":
+    main()
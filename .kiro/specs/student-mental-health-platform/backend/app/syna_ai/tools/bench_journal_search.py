@@ -0,0 +1,104 @@
+"""
+Benchmark journal search: FTS5 (journal_search.py) vs a naive LIKE scan.
+
+Builds a synthetic corpus in a scratch database (default 1M entries spread
+over --users users, words drawn from a Zipf-like vocabulary in which the
+searched words are rare, as real search terms are, except for one common
+query), then times each query both ways for random users:
+- LIKE:  user_id index + content LIKE '%term%' for every term (scans the
+         user's entries and all of their text)
+- FTS5:  journal_search.search() (posting-list intersection + bm25)
+
+Usage:
+    python -m app.syna_ai.tools.bench_journal_search [--entries 1000000] [--users 100] [--queries 200]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from app.syna_ai import database, journal_search
+
+VOCABULARY_SIZE = 20000
+COMMON_WORDS = ["today", "felt", "really", "class", "friends", "sleep", "tired", "happy", "exam", "family"]
+RARE_WORDS = ["anxious", "dinner", "panicked", "panicking", "lonely", "weekend", "grateful", "counselor"]
+QUERIES = ["exam", "anxious", "family dinner", "panic*", "lonely weekend", "grateful", "counselor"]
+
+
+def _vocabulary(rng) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = {"".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(VOCABULARY_SIZE)}
+    return COMMON_WORDS + sorted(words - set(COMMON_WORDS) - set(RARE_WORDS)) + RARE_WORDS
+
+
+def _seed(path, entries: int, users: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+    # Zipf-like: word i drawn with weight 1 / (i + 1)
+    cum_weights = list(itertools.accumulate(1.0 / (i + 1) for i in range(len(vocabulary))))
+
+    def rows():
+        for i in range(entries):
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(20, 80))
+            yield f"user{i % users}", " ".join(words)
+
+    with database.get_db_context() as (conn, cursor):
+        cursor.executemany("INSERT INTO journals (user_id, content) VALUES (?, ?)", rows())
+        conn.commit()
+
+
+def _like(cursor, user_id: str, query: str):
+    terms = journal_search.query_terms(query)
+    sql = "SELECT id, content FROM journals WHERE user_id = ?" + " AND content LIKE ?" * len(terms)
+    cursor.execute(sql + " ORDER BY created_at DESC LIMIT 20", [user_id] + [f"%{t}%" for t in terms])
+    return cursor.fetchall()
+
+
+def _fts(cursor, user_id: str, query: str):
+    return journal_search.search(cursor, user_id, query, limit=20)
+
+
+def _time(op, cursor, cases):
+    times = []
+    for user_id, query in cases:
+        t0 = time.perf_counter()
+        op(cursor, user_id, query)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    n = len(times)
+    return sum(times) / n, times[n // 2], times[int(n * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        t0 = time.perf_counter()
+        _seed(database.DB_PATH, args.entries, args.users)
+        seed_s = time.perf_counter() - t0
+
+        rng = random.Random(11)
+        cases = [(f"user{rng.randrange(args.users)}", rng.choice(QUERIES)) for _ in range(args.queries)]
+        with database.get_db_context() as (conn, cursor):
+            rows = [("LIKE scan", *_time(_like, cursor, cases)), ("FTS5 + bm25", *_time(_fts, cursor, cases))]
+        database.close_db_pool()
+
+    print(f"# Journal search: {args.entries} entries, {args.users} users, {args.queries} queries (ms)")
+    print(f"(corpus + FTS index built in {seed_s:.1f}s)")
+    print()
+    print("| Method | Mean | p50 | p95 |")
+    print("|--------|------|-----|-----|")
+    for method, mean, p50, p95 in rows:
+        print(f"| {method} | {mean:.2f} | {p50:.2f} | {p95:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
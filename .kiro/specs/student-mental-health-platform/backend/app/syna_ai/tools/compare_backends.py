@@ -0,0 +1,148 @@
+"""
+Accuracy / latency comparison of the Syna inference backends against eager fp32.
+
+For each backend the report shows, per model:
+- agreement: share of messages where the backend's decision matches eager
+  (argmax class for the classifiers, threshold decision for MiniLM)
+- fidelity:  max |logit diff| for classifiers, min cosine similarity for embeddings
+- latency:   mean / p95 milliseconds per single-message call (a chat turn)
+
+Usage:
+    python -m app.syna_ai.tools.compare_backends [--backends int8 onnx onnx-int8] [--from-db 500] [--output report.md]
+"""
+
+import argparse
+import time
+
+import torch
+import torch.nn.functional as F
+
+from app.syna_ai.database import get_db_context
+from app.syna_ai.models import backends
+from app.syna_ai.models.semantic_risk import HIGH_RISK_ANCHORS, SIMILARITY_THRESHOLD
+
+SAMPLE_TEXTS = [
+    "hi, how are you doing today?",
+    "i have an exam tomorrow and i can't sleep",
+    "my parents keep fighting and i feel stuck in the middle",
+    "nothing matters anymore, i feel so empty",
+    "i don't want to exist anymore",
+    "i feel like dying",
+    "had a good day with friends, feeling better",
+    "i keep failing no matter how hard i try and everyone would be better off without me",
+]
+
+
+def _db_texts(limit: int) -> list:
+    with get_db_context() as (conn, cursor):
+        cursor.execute("SELECT message FROM chats WHERE role != 'bot' ORDER BY id DESC LIMIT ?", (limit,))
+        return [r[0].strip().lower() for r in cursor.fetchall()]
+
+
+def _timed(fn, texts):
+    outputs, times = [], []
+    for text in texts:
+        t0 = time.perf_counter()
+        outputs.append(fn(text))
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return outputs, {"mean": sum(times) / len(times), "p95": times[int(len(times) * 0.95)]}
+
+
+def _classifier_fn(name, model_class, backend, tokenizer, token_type_ids):
+    runner = backends.load_sequence_classifier(name, model_class, torch.device("cpu"), backend=backend)
+
+    def run(text):
+        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
+        if token_type_ids and "token_type_ids" not in inputs:
+            inputs["token_type_ids"] = torch.zeros_like(inputs["input_ids"])
+        return runner(**inputs)[0]
+    return run
+
+
+def _feature_fn(backend, tokenizer):
+    runner = backends.load_feature_extractor(torch.device("cpu"), backend=backend)
+
+    def run(text):
+        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=96)
+        return runner(**inputs)[0, 0, :]
+    return run
+
+
+def _semantic_fn(backend):
+    encoder = backends.load_sentence_encoder(backend=backend)
+    anchors = encoder.encode(HIGH_RISK_ANCHORS, convert_to_tensor=True)
+
+    def run(text):
+        return encoder.encode(text, convert_to_tensor=True), anchors
+    return run
+
+
+def compare(texts: list, candidates: list) -> list:
+    from transformers import BertForSequenceClassification, DistilBertForSequenceClassification
+    from app.syna_ai.models.encoder import get_tokenizer
+    tokenizer = get_tokenizer()
+
+    models = {
+        "distilbert-risk": lambda b: _classifier_fn("distilbert-risk", DistilBertForSequenceClassification, b, tokenizer, False),
+        "bert-risk": lambda b: _classifier_fn("bert-risk", BertForSequenceClassification, b, tokenizer, True),
+        backends.FEATURE_MODEL_NAME: lambda b: _feature_fn(b, tokenizer),
+        backends.SEMANTIC_MODEL_NAME: _semantic_fn,
+    }
+
+    rows = []
+    for model_name, factory in models.items():
+        reference, ref_latency = _timed(factory("eager"), texts)
+        rows.append((model_name, "eager", 1.0, "-", ref_latency))
+
+        for backend in candidates:
+            outputs, latency = _timed(factory(backend), texts)
+            if model_name.endswith("-risk"):
+                agree = sum(int(o.argmax() == r.argmax()) for o, r in zip(outputs, reference)) / len(texts)
+                fidelity = f"max |dlogit| {max(float((o - r).abs().max()) for o, r in zip(outputs, reference)):.4f}"
+            elif model_name == backends.SEMANTIC_MODEL_NAME:
+                def decision(out):
+                    embedding, anchors = out
+                    return float(F.cosine_similarity(embedding.unsqueeze(0), anchors).max()) >= SIMILARITY_THRESHOLD
+                agree = sum(int(decision(o) == decision(r)) for o, r in zip(outputs, reference)) / len(texts)
+                fidelity = f"min cos {min(float(F.cosine_similarity(o[0], r[0], dim=0)) for o, r in zip(outputs, reference)):.4f}"
+            else:
+                agree = 1.0
+                fidelity = f"min cos {min(float(F.cosine_similarity(o, r, dim=0)) for o, r in zip(outputs, reference)):.4f}"
+            rows.append((model_name, backend, agree, fidelity, latency))
+    return rows
+
+
+def format_report(rows: list, n_texts: int) -> str:
+    lines = [
+        f"# Syna inference backend comparison ({n_texts} messages)",
+        "",
+        "| Model | Backend | Agreement | Fidelity | Mean ms | p95 ms |",
+        "|-------|---------|-----------|----------|---------|--------|",
+    ]
+    for model_name, backend, agree, fidelity, latency in rows:
+        lines.append(
+            f"| {model_name} | {backend} | {agree:.1%} | {fidelity} | {latency['mean']:.2f} | {latency['p95']:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["int8", "onnx", "onnx-int8"],
+                        choices=[b for b in backends.BACKENDS if b != "eager"])
+    parser.add_argument("--from-db", type=int, default=0, help="Also use the N most recent user messages")
+    parser.add_argument("--output", help="Write the markdown report to this file")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)  # Same setting as the API workers
+    texts = SAMPLE_TEXTS + (_db_texts(args.from_db) if args.from_db else [])
+    report = format_report(compare(texts, args.backends), len(texts))
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare streaming temporal predictions against the windowed LSTM.
+
+Replays each user's Syna history in chats.id order. For every user message it
+predicts risk from the stored embeddings both ways:
+- window:    last 5 messages, re-run from scratch (the default pipeline)
+- streaming: carried (h_n, c_n), advanced one step per message
+
+Usage:
+    python -m app.syna_ai.tools.compare_temporal [--user USER_ID] [--reset-steps N] [--max-users N]
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from app.syna_ai.database import get_db_context
+from app.syna_ai.embedding_store import resolve_history_embeddings
+from app.syna_ai.language_processor import translate_to_english
+from app.syna_ai.models.temporal_infer import advance_temporal_state, predict_temporal_risk_from_embeddings
+
+
+def replay_user(rows: list, reset_steps: int) -> list:
+    """
+    rows: (chat_id, message, embedding_blob_or_None, role) in id order.
+    Returns (window_pred, stream_pred, window_ms, stream_ms) per user message.
+    """
+    vectors = resolve_history_embeddings([r[:3] for r in rows], translate_to_english)
+
+    results = []
+    state, steps, pos = None, 0, 0
+    for i, row in enumerate(rows):
+        if row[3] == "bot":
+            continue
+        window_start = max(0, i - 4)
+        if state is None or (reset_steps > 0 and steps >= reset_steps):
+            # Same priming rule as stream_temporal_risk: start from the window
+            state, steps, pos = None, 0, window_start
+
+        t0 = time.perf_counter()
+        window_pred = predict_temporal_risk_from_embeddings(vectors[window_start:i + 1])
+        t1 = time.perf_counter()
+        stream_pred, state = advance_temporal_state(vectors[pos:i + 1], state)
+        t2 = time.perf_counter()
+
+        steps += i + 1 - pos
+        pos = i + 1
+        results.append((window_pred, stream_pred, (t1 - t0) * 1000, (t2 - t1) * 1000))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="Only replay this user_id")
+    parser.add_argument("--reset-steps", type=int, default=0, help="Re-prime after N steps (0 = never)")
+    parser.add_argument("--max-users", type=int, default=100)
+    args = parser.parse_args()
+
+    with get_db_context() as (conn, cursor):
+        if args.user:
+            users = [args.user]
+        else:
+            cursor.execute("SELECT DISTINCT user_id FROM chats WHERE user_id IS NOT NULL LIMIT ?", (args.max_users,))
+            users = [r[0] for r in cursor.fetchall()]
+
+    results = []
+    for user_id in users:
+        with get_db_context() as (conn, cursor):
+            cursor.execute("""
+                SELECT c.id, c.message, e.embedding, c.role FROM chats c
+                LEFT JOIN chat_embeddings e ON e.chat_id = c.id
+                WHERE c.user_id = ? ORDER BY c.id
+            """, (user_id,))
+            rows = cursor.fetchall()
+        if rows:
+            results.extend(replay_user(rows, args.reset_steps))
+
+    if not results:
+        print("No user messages to replay.")
+        return
+
+    total = len(results)
+    agree = sum(1 for w, s, _, _ in results if w == s)
+    confusion = Counter((w, s) for w, s, _, _ in results)
+    window_high = sum(1 for w, _, _, _ in results if w == 2)
+    both_high = sum(1 for w, s, _, _ in results if w == 2 and s == 2)
+
+    print(f"Users replayed:        {len(users)}")
+    print(f"Predictions compared:  {total}")
+    print(f"Reset policy:          {'every %d steps' % args.reset_steps if args.reset_steps else 'never'}")
+    print(f"Agreement:             {agree / total:.1%}")
+    if window_high:
+        print(f"High-risk recall vs window: {both_high / window_high:.1%} ({both_high}/{window_high})")
+    print(f"Mean latency (ms):     window {sum(r[2] for r in results) / total:.3f} | "
+          f"streaming {sum(r[3] for r in results) / total:.3f}")
+    print("Confusion (window -> streaming):")
+    for (w, s), count in sorted(confusion.items()):
+        print(f"  {w} -> {s}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Export the Syna transformer models to ONNX for the onnx / onnx-int8 backends.
+
+Writes trained_models/onnx/<name>/model.onnx (and model.int8.onnx, dynamically
+quantized with onnxruntime) for:
+- distilbert-risk, bert-risk   -> logits
+- distilbert-base-uncased      -> last_hidden_state (temporal LSTM features)
+- all-MiniLM-L6-v2             -> last_hidden_state (pooled at runtime) + tokenizer
+
+Requires: onnx, onnxruntime
+
+Usage:
+    python -m app.syna_ai.tools.export_onnx [--models NAME ...] [--opset 14] [--no-quantize]
+"""
+
+import argparse
+import os
+
+import torch
+
+from app.syna_ai.config import MODELS_DIR, ONNX_DIR
+from app.syna_ai.models.backends import FEATURE_MODEL_NAME, SEMANTIC_MODEL_NAME, onnx_path
+
+ALL_MODELS = ("distilbert-risk", "bert-risk", FEATURE_MODEL_NAME, SEMANTIC_MODEL_NAME)
+
+
+class _ExportWrapper(torch.nn.Module):
+    """Positional-tensor forward returning a single named output."""
+
+    def __init__(self, model, input_names, output):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+        self.output = output
+
+    def forward(self, *tensors):
+        return getattr(self.model(**dict(zip(self.input_names, tensors))), self.output)
+
+
+def _load(name):
+    """(model, tokenizer, input_names, output_name) for one export target."""
+    from transformers import (
+        AutoTokenizer, BertForSequenceClassification, DistilBertForSequenceClassification, DistilBertModel,
+    )
+    if name == "distilbert-risk":
+        path = os.path.join(MODELS_DIR, name)
+        return (DistilBertForSequenceClassification.from_pretrained(path), AutoTokenizer.from_pretrained(path),
+                ["input_ids", "attention_mask"], "logits")
+    if name == "bert-risk":
+        path = os.path.join(MODELS_DIR, name)
+        return (BertForSequenceClassification.from_pretrained(path), AutoTokenizer.from_pretrained(path),
+                ["input_ids", "attention_mask", "token_type_ids"], "logits")
+    if name == FEATURE_MODEL_NAME:
+        return (DistilBertModel.from_pretrained(name), AutoTokenizer.from_pretrained(name),
+                ["input_ids", "attention_mask"], "last_hidden_state")
+    if name == SEMANTIC_MODEL_NAME:
+        from sentence_transformers import SentenceTransformer
+        transformer = SentenceTransformer(name)[0]
+        return (transformer.auto_model, transformer.tokenizer,
+                ["input_ids", "attention_mask", "token_type_ids"], "last_hidden_state")
+    raise ValueError(f"Unknown model '{name}'. Expected one of {ALL_MODELS}")
+
+
+def export_model(name: str, opset: int = 14, quantize: bool = True):
+    model, tokenizer, input_names, output = _load(name)
+    model.eval()
+
+    out_dir = os.path.join(ONNX_DIR, name)
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = onnx_path(name)
+
+    sample = tokenizer(["export sample", "a second, longer export sample"], padding=True, return_tensors="pt")
+    args = tuple(sample[n] if n in sample else torch.zeros_like(sample["input_ids"]) for n in input_names)
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic_axes[output] = {0: "batch"} if output == "logits" else {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _ExportWrapper(model, input_names, output),
+            args,
+            fp32_path,
+            input_names=input_names,
+            output_names=[output],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    print(f"Exported {name} -> {fp32_path}")
+
+    if name == SEMANTIC_MODEL_NAME:
+        # OnnxSentenceEncoder loads its tokenizer from the export directory
+        tokenizer.save_pretrained(out_dir)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = onnx_path(name, quantized=True)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"Quantized {name} -> {int8_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=list(ALL_MODELS), choices=ALL_MODELS)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the model.int8.onnx variants")
+    args = parser.parse_args()
+
+    for name in args.models:
+        export_model(name, opset=args.opset, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Local stand-in for the Gemini generateContent API, for offline latency tests.
+
+Serves POST /v1beta/models/<model>:generateContent over HTTP/1.1 keep-alive
+with a configurable delay, and can fail a chosen model to exercise the
+Flash -> Pro fallback. Stdlib only.
+
+Usage:
+    python -m app.syna_ai.tools.fake_llm_server [--port 8791] [--latency-ms 800] [--jitter-ms 200]
+        [--fail-model gemini-2.5-flash] [--fail-rate 0.2] [--fail-status 503]
+
+Then run the API with:
+    SYNA_GEMINI_BASE_URL=http://127.0.0.1:8791 GEMINI_API_KEY=fake
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+
+_PATH = re.compile(r"^/v1beta/models/([^/:]+):generateContent")
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+class FakeLLMServer:
+    def __init__(self, latency_ms: float = 800, jitter_ms: float = 0, fail_model: str = "",
+                 fail_rate: float = 1.0, fail_status: int = 503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_model = fail_model
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.connections = 0
+        self.requests = {}
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8791):
+        self._server = await asyncio.start_server(self._handle, host=host, port=port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _respond(self, path: str):
+        match = _PATH.match(path)
+        if not match:
+            return 404, {"error": {"code": 404, "message": f"unknown path {path}"}}
+        model = match.group(1)
+        self.requests[model] = self.requests.get(model, 0) + 1
+
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+        if model == self.fail_model and random.random() < self.fail_rate:
+            return self.fail_status, {"error": {"code": self.fail_status, "message": "fake failure"}}
+        return 200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": f"[{model}] I'm here with you."}]}}],
+        }
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = dict(
+                    (k.strip().lower(), v.strip()) for k, _, v in (h.partition(":") for h in header_lines if h)
+                )
+                await reader.readexactly(int(headers.get("content-length", "0")))
+
+                _, path, _ = request_line.split(" ", 2)
+                status, payload = await self._respond(path)
+                body = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # client closed the connection
+        finally:
+            writer.close()
+
+
+async def _main(args):
+    server = FakeLLMServer(args.latency_ms, args.jitter_ms, args.fail_model, args.fail_rate, args.fail_status)
+    port = await server.start(port=args.port)
+    print(f"Fake LLM server on http://127.0.0.1:{port} (latency {args.latency_ms}±{args.jitter_ms} ms)")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--fail-model", default="", help="Model name that returns errors")
+    parser.add_argument("--fail-rate", type=float, default=1.0)
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Copy Syna data from the SQLite file into MongoDB (SYNA_STORAGE=mongo).
+
+Streams chats (with their stored embeddings), moods, journals and the
+streaming temporal state in id order, BATCH rows at a time, so memory stays
+flat however large the file is. Chats moved to the archive (archive.py) are
+copied into the same chats collection, without embeddings (archival drops
+them); MongoDB has no archive tier, and the rollups copied alongside count
+those rows. Documents keep their SQLite ids and are
+upserted, so the copy can be re-run or resumed: by default each collection
+continues after the highest _id already in MongoDB. The id counters are
+raised to the copied maximum so new writes never collide.
+
+The analytics rollups and the archived chats are copied whole on every run,
+so run the copy before switching SYNA_STORAGE. The SQLite file is opened read-only. Crisis alerts
+stay in SQLite (the local alert outbox) and are not copied.
+
+Usage:
+    python -m app.syna_ai.tools.migrate_to_mongo [--sqlite PATH] [--mongo-url URL]
+        [--db NAME] [--batch 1000] [--no-resume]
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.syna_ai import archive, database
+from app.syna_ai.storage import MongoStorage
+
+
+def _time(value) -> datetime:
+    """SQLite CURRENT_TIMESTAMP text (UTC) -> naive UTC datetime."""
+    if not value:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    return datetime.fromisoformat(str(value))
+
+
+def _chat(row) -> dict:
+    chat_id, user_id, role, message, risk_level, created_at, embedding = row
+    return {
+        "_id": chat_id, "user_id": user_id, "role": role, "message": message, "risk_level": risk_level,
+        "created_at": _time(created_at),
+        # Stored text is the raw input; the feature path translates it lazily if needed
+        "text": message, "is_english": False,
+        "embedding": embedding,
+    }
+
+
+def _mood(row) -> dict:
+    mood_id, user_id, mood_score, created_at = row
+    return {"_id": mood_id, "user_id": user_id, "mood_score": mood_score, "created_at": _time(created_at)}
+
+
+def _journal(row) -> dict:
+    journal_id, user_id, content, created_at = row
+    return {"_id": journal_id, "user_id": user_id, "content": content, "created_at": _time(created_at)}
+
+
+def _temporal_state(row) -> dict:
+    conversation_id, h_n, c_n, steps, last_chat_id, updated_at = row
+    return {
+        "_id": conversation_id, "h_n": h_n, "c_n": c_n, "steps": steps,
+        "last_chat_id": last_chat_id, "updated_at": _time(updated_at),
+    }
+
+
+def _rollup(key: str, *counts: str):
+    def to_doc(row) -> dict:
+        # row: rowid, scope, day, [key,] counts...
+        fields = {"scope": row[1], "day": row[2]}
+        if key:
+            fields[key] = row[3]
+        values = row[4:] if key else row[3:]
+        return {"_id": "|".join(str(v) for v in fields.values()), **fields, **dict(zip(counts, values))}
+    return to_doc
+
+
+# collection -> (keyset query: rows after ? ordered by key, LIMIT ?; row -> document)
+SOURCES = {
+    "chats": ("""
+        SELECT c.id, c.user_id, c.role, c.message, c.risk_level, c.created_at, e.embedding
+        FROM chats c LEFT JOIN chat_embeddings e ON e.chat_id = c.id
+        WHERE c.id > ? ORDER BY c.id LIMIT ?""", _chat),
+    "moods": ("SELECT id, user_id, mood_score, created_at FROM moods WHERE id > ? ORDER BY id LIMIT ?", _mood),
+    "journals": ("SELECT id, user_id, content, created_at FROM journals WHERE id > ? ORDER BY id LIMIT ?", _journal),
+    "temporal_state": ("""
+        SELECT conversation_id, h_n, c_n, steps, last_chat_id, updated_at FROM temporal_state
+        WHERE conversation_id > ? ORDER BY conversation_id LIMIT ?""", _temporal_state),
+    # Rollups are small and copied whole (see ROLLUPS)
+    "rollup_daily_risk": ("""
+        SELECT rowid, scope, day, risk_level, count FROM rollup_daily_risk
+        WHERE rowid > ? ORDER BY rowid LIMIT ?""", _rollup("risk_level", "count")),
+    "rollup_hourly_activity": ("""
+        SELECT rowid, scope, day, hour, count FROM rollup_hourly_activity
+        WHERE rowid > ? ORDER BY rowid LIMIT ?""", _rollup("hour", "count")),
+    "rollup_daily_mood": ("""
+        SELECT rowid, scope, day, mood_sum, mood_count FROM rollup_daily_mood
+        WHERE rowid > ? ORDER BY rowid LIMIT ?""", _rollup(None, "mood_sum", "mood_count")),
+}
+# Counters are rewritten in place, so these are never resumed part-way
+ROLLUPS = {"rollup_daily_risk", "rollup_hourly_activity", "rollup_daily_mood"}
+
+
+def iter_batches(conn, kind: str, batch_size: int, after=None):
+    """Yield lists of up to batch_size documents for `kind`, continuing after key `after`."""
+    query, to_doc = SOURCES[kind]
+    if after is None:
+        after = "" if kind == "temporal_state" else 0
+    while True:
+        rows = conn.execute(query, (after, batch_size)).fetchall()
+        if not rows:
+            return
+        yield [to_doc(row) for row in rows]
+        after = rows[-1][0]
+
+
+def iter_archived_batches(conn, batch_size: int, directory: Path):
+    """Archived chats as chats documents, in lists of up to batch_size (index order, not id order)."""
+    docs = []
+    for user_id, rows in archive.iter_archive(conn.cursor(), directory):
+        for chat_id, created_at, role, message, risk_level in rows:
+            docs.append(_chat((chat_id, user_id, role, message, risk_level, created_at, None)))
+            if len(docs) >= batch_size:
+                yield docs
+                docs = []
+    if docs:
+        yield docs
+
+
+async def _copy(db, collection: str, docs: list, counter: str = None):
+    from pymongo import ReplaceOne
+
+    await db[collection].bulk_write([ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in docs], ordered=False)
+    if counter:
+        await db["syna_counters"].update_one(
+            {"_id": counter}, {"$max": {"seq": max(d["_id"] for d in docs)}}, upsert=True
+        )
+
+
+async def migrate(sqlite_path, db, batch_size: int = 1000, resume: bool = True) -> dict:
+    """Copy every SOURCES collection and the chat archive; returns {source: documents written}."""
+    await MongoStorage(db).open()
+    conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+    written = {}
+    try:
+        for kind in SOURCES:
+            collection = db[f"syna_{kind}"]
+            after = None
+            if resume and kind not in ROLLUPS:
+                last = await collection.find({}, {"_id": 1}).sort("_id", -1).limit(1).to_list(1)
+                after = last[0]["_id"] if last else None
+            written[kind] = 0
+            for docs in iter_batches(conn, kind, batch_size, after):
+                await _copy(db, f"syna_{kind}", docs, kind if kind in ("chats", "moods", "journals") else None)
+                written[kind] += len(docs)
+                print(f"DEBUG: {kind}: {written[kind]} copied (up to id {docs[-1]['_id']})")
+
+        # After the live chats, so resuming them still continues after the newest id
+        written["chat_archive"] = 0
+        for docs in iter_archived_batches(conn, batch_size, archive.archive_dir(sqlite_path)):
+            await _copy(db, "syna_chats", docs, "chats")
+            written["chat_archive"] += len(docs)
+            print(f"DEBUG: chat_archive: {written['chat_archive']} copied")
+    finally:
+        conn.close()
+    return written
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sqlite", default=str(database.DB_PATH))
+    parser.add_argument("--mongo-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db", default=settings.MONGODB_DB_NAME)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--no-resume", action="store_true", help="Re-copy everything instead of continuing")
+    args = parser.parse_args()
+
+    async def run():
+        import certifi
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_url, tlsCAFile=certifi.where())
+        try:
+            started = time.perf_counter()
+            written = await migrate(args.sqlite, client[args.db], args.batch, resume=not args.no_resume)
+            print(f"Copied {written} in {time.perf_counter() - started:.1f}s")
+        finally:
+            client.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measure what the risk cascade (cascade.py) costs in recall against the full pipeline.
+
+Replays each user's Syna history in chats.id order. For every user message it
+runs the full pipeline (all five detectors, as chat() does with the cascade
+off) and the cascade's cheap stage, then checks every threshold combination:
+- short-circuit rate per outcome
+- high / medium+ recall of the cascade relative to the full pipeline
+- mean latency of the cheap stage vs the full pipeline
+
+Usage:
+    python -m app.syna_ai.tools.replay_cascade [--user USER_ID] [--max-users N]
+        [--xgb-low 0.8 0.85 0.9] [--semantic-clear 0.4 0.5] [--max-hist-risk 0.0]
+"""
+
+import argparse
+import itertools
+import time
+from collections import Counter
+
+from app.syna_ai import cascade
+from app.syna_ai.config import (
+    CASCADE_MAX_HIST_RISK, CASCADE_SEMANTIC_CLEAR, CASCADE_XGB_LOW_CONFIDENCE,
+)
+from app.syna_ai.database import get_db_context
+from app.syna_ai.embedding_store import resolve_history_embeddings
+from app.syna_ai.language_processor import translate_to_english
+from app.syna_ai.models.encoder import encode_turn
+from app.syna_ai.models.ensemble_risk import predict_risk_ensemble_ids
+from app.syna_ai.models.temporal_infer import predict_temporal_risk_from_embeddings
+
+
+def _context(rows: list, moods: list, i: int):
+    """(hist_risk, mood_trend) as chat() would have seen them for rows[i]."""
+    prior = rows[max(0, i - 10):i]
+    hist_risk = sum(1 for r in prior if r[4] == "high") / len(prior) if prior else 0.0
+    recent_moods = [score for score, created in moods if created <= rows[i][5]][-5:]
+    mood_trend = sum(recent_moods) / len(recent_moods) if recent_moods else 7.0
+    return hist_risk, mood_trend
+
+
+def replay_user(rows: list, moods: list) -> list:
+    """
+    rows:  (chat_id, message, embedding_blob_or_None, role, risk_level, created_at) in id order.
+    moods: (mood_score, created_at) in time order.
+    Returns (full_risk, cheap, hist_risk, full_ms, cheap_ms) per user message.
+    """
+    vectors = resolve_history_embeddings([r[:3] for r in rows], translate_to_english)
+
+    results = []
+    for i, row in enumerate(rows):
+        if row[3] == "bot":
+            continue
+        text = translate_to_english(row[1]).strip().lower()
+        hist_risk, mood_trend = _context(rows, moods, i)
+
+        t0 = time.perf_counter()
+        cheap = cascade.cheap_stage(text, hist_risk, mood_trend)
+        t1 = time.perf_counter()
+        encoded = encode_turn(text, semantic=cheap["semantic_embedding"])
+        risk_bert = predict_risk_ensemble_ids([encoded["input_ids"]])[0]
+        risk_temporal = predict_temporal_risk_from_embeddings(vectors[max(0, i - 4):i] + [encoded["cls"]])
+        t2 = time.perf_counter()
+
+        full = max(cheap["rule"], risk_bert, cheap["xgb"], risk_temporal)
+        if cheap["semantic"] == 2 and full >= 1:
+            full = 2
+        # The full pipeline also pays for the cheap detectors
+        results.append((full, cheap, hist_risk, (t2 - t0) * 1000, (t1 - t0) * 1000))
+    return results
+
+
+def summarize(results: list, thresholds: dict) -> dict:
+    outcomes = Counter()
+    high_total = high_kept = medium_total = medium_kept = 0
+    for full, cheap, hist_risk, _, _ in results:
+        shortcut, outcome = cascade.decide(cheap, hist_risk, thresholds)
+        outcomes[outcome] += 1
+        final = full if shortcut is None else shortcut
+        if full == 2:
+            high_total += 1
+            high_kept += int(final == 2)
+        if full >= 1:
+            medium_total += 1
+            medium_kept += int(final >= 1)
+    total = len(results)
+    return {
+        "outcomes": outcomes,
+        "short_circuit": (total - outcomes["escalated"]) / total,
+        "high_recall": high_kept / high_total if high_total else 1.0,
+        "high_missed": high_total - high_kept,
+        "medium_recall": medium_kept / medium_total if medium_total else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="Only replay this user_id")
+    parser.add_argument("--max-users", type=int, default=100)
+    parser.add_argument("--xgb-low", type=float, nargs="+", default=[CASCADE_XGB_LOW_CONFIDENCE])
+    parser.add_argument("--semantic-clear", type=float, nargs="+", default=[CASCADE_SEMANTIC_CLEAR])
+    parser.add_argument("--max-hist-risk", type=float, nargs="+", default=[CASCADE_MAX_HIST_RISK])
+    args = parser.parse_args()
+
+    with get_db_context() as (conn, cursor):
+        if args.user:
+            users = [args.user]
+        else:
+            cursor.execute("SELECT DISTINCT user_id FROM chats WHERE user_id IS NOT NULL LIMIT ?", (args.max_users,))
+            users = [r[0] for r in cursor.fetchall()]
+
+    results = []
+    for user_id in users:
+        with get_db_context() as (conn, cursor):
+            cursor.execute("""
+                SELECT c.id, c.message, e.embedding, c.role, c.risk_level, c.created_at FROM chats c
+                LEFT JOIN chat_embeddings e ON e.chat_id = c.id
+                WHERE c.user_id = ? ORDER BY c.id
+            """, (user_id,))
+            rows = cursor.fetchall()
+            cursor.execute("SELECT mood_score, created_at FROM moods WHERE user_id = ? ORDER BY created_at", (user_id,))
+            moods = cursor.fetchall()
+        if rows:
+            results.extend(replay_user(rows, moods))
+
+    if not results:
+        print("No user messages to replay.")
+        return
+
+    total = len(results)
+    full_ms = sum(r[3] for r in results) / total
+    cheap_ms = sum(r[4] for r in results) / total
+    print(f"Users replayed:        {len(users)}")
+    print(f"Messages replayed:     {total}")
+    print(f"Full pipeline labels:  {dict(sorted(Counter(r[0] for r in results).items()))}")
+    print(f"Mean latency (ms):     full {full_ms:.2f} | cheap stage {cheap_ms:.2f}")
+    print()
+    print("| xgb_low | semantic_clear | max_hist_risk | short-circuit | rule_high | xgb_high | cheap_low "
+          "| high recall | missed high | medium+ recall | est. mean ms |")
+    print("|---|---|---|---|---|---|---|---|---|---|---|")
+    for xgb_low, semantic_clear, max_hist in itertools.product(args.xgb_low, args.semantic_clear, args.max_hist_risk):
+        thresholds = {"xgb_low_confidence": xgb_low, "semantic_clear": semantic_clear, "max_hist_risk": max_hist}
+        s = summarize(results, thresholds)
+        est_ms = cheap_ms * s["short_circuit"] + full_ms * (1 - s["short_circuit"])
+        print(f"| {xgb_low} | {semantic_clear} | {max_hist} | {s['short_circuit']:.1%} "
+              f"| {s['outcomes']['rule_high']} | {s['outcomes']['xgb_high']} | {s['outcomes']['cheap_low']} "
+              f"| {s['high_recall']:.1%} | {s['high_missed']} | {s['medium_recall']:.1%} | {est_ms:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.fixture
+def syna_db(tmp_path, monkeypatch):
+    """
+    A fresh, empty Syna SQLite file for one test; yields the database module.
+    Modules that need rows override this fixture and seed on top of it.
+    """
+    from app.syna_ai import database, feature_store
+
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "syna_test.db")
+    monkeypatch.setattr(database, "_db_conn", None)
+    feature_store.invalidate()
+    yield database
+    feature_store.invalidate()
+    if database._db_conn is not None:
+        database._db_conn.close()
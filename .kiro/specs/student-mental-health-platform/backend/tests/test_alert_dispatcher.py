@@ -0,0 +1,95 @@
+import asyncio
+
+from app.syna_ai.alert_dispatcher import CrisisAlertDispatcher
+from app.syna_ai.crisis_alerts import enqueue_crisis_alert
+
+
+def _enqueue(db):
+    with db.get_db_context() as (conn, cursor):
+        alert_id = enqueue_crisis_alert(cursor, "u1", "student", "help", "pipeline")
+        conn.commit()
+    return alert_id
+
+
+def _flags(db, alert_id):
+    with db.get_db_context() as (conn, cursor):
+        cursor.execute("SELECT alerted_psychologist, alerted_parents FROM crisis_alerts WHERE id = ?", (alert_id,))
+        return cursor.fetchone()
+
+
+def _delivery(db, alert_id, channel):
+    with db.get_db_context() as (conn, cursor):
+        cursor.execute(
+            "SELECT status, attempts FROM crisis_alert_deliveries WHERE alert_id = ? AND channel = ?",
+            (alert_id, channel)
+        )
+        return cursor.fetchone()
+
+
+def test_channels_are_flagged_independently_and_failures_retry(syna_db, monkeypatch):
+    monkeypatch.setattr("app.syna_ai.alert_dispatcher.backoff_seconds", lambda attempts: 0.0)
+    sent = []
+
+    def ok(alert_id, message):
+        sent.append(alert_id)
+
+    def flaky(alert_id, message):
+        raise ConnectionError("smtp down")
+
+    alert_id = _enqueue(syna_db)
+    dispatcher = CrisisAlertDispatcher(
+        channels={"psychologist": ok, "psynova_team": ok, "parents": flaky, "institution": ok}, max_attempts=2
+    )
+
+    asyncio.run(dispatcher.run_once())
+    assert _flags(syna_db, alert_id) == (1, 0)
+    assert _delivery(syna_db, alert_id, "parents") == ("pending", 1)
+
+    # Second failure reaches max_attempts
+    asyncio.run(dispatcher.run_once())
+    assert _delivery(syna_db, alert_id, "parents") == ("failed", 2)
+    assert sent == [alert_id] * 3
+
+    stats = dispatcher.snapshot()["channels"]
+    assert stats["psychologist"]["sent"] == 1
+    assert stats["parents"]["gave_up"] == 1
+    assert dispatcher.backlog() == {
+        "parents": {"pending": 0, "in_flight": 0, "failed": 1, "oldest_age_s": 0.0}
+    }
+
+
+def test_pending_deliveries_survive_a_restart(syna_db):
+    alert_id = _enqueue(syna_db)
+    sent = []
+    channels = {name: (lambda a, m, name=name: sent.append(name))
+                for name in ("psychologist", "psynova_team", "parents", "institution")}
+
+    # A worker claimed everything and died before delivering
+    crashed = CrisisAlertDispatcher(channels=channels)
+    crashed._claim_due()
+    assert _delivery(syna_db, alert_id, "parents")[0] == "in_flight"
+
+    # Another worker picks the claims up once the lease expires
+    assert asyncio.run(CrisisAlertDispatcher(channels=channels).run_once()) == 0
+    assert asyncio.run(CrisisAlertDispatcher(channels=channels, lease_s=-1).run_once()) == 4
+    assert sorted(sent) == ["institution", "parents", "psychologist", "psynova_team"]
+    assert _flags(syna_db, alert_id) == (1, 1)
+
+
+def test_late_outcome_from_an_expired_lease_is_ignored(syna_db):
+    alert_id = _enqueue(syna_db)
+    channels = {"parents": lambda a, m: None}
+
+    # Worker A claims, then its send hangs past the lease
+    stale = CrisisAlertDispatcher(channels=channels)
+    stale._claim_due()
+
+    # Worker B reclaims the expired lease and delivers
+    assert asyncio.run(CrisisAlertDispatcher(channels=channels, lease_s=-1).run_once()) == 1
+    assert _delivery(syna_db, alert_id, "parents") == ("sent", 1)
+
+    # A's late failure (or success) must not touch B's outcome
+    assert stale._mark_failed(alert_id, "parents", 1, "timed out") is False
+    assert stale._mark_sent(alert_id, "parents", 1.0) is False
+    assert _delivery(syna_db, alert_id, "parents") == ("sent", 1)
+    assert _flags(syna_db, alert_id) == (0, 1)
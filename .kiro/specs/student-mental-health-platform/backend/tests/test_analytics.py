@@ -0,0 +1,52 @@
+from app.syna_ai import analytics
+from app.syna_ai.models.mood_logic import save_mood
+
+
+def _chat(cursor, user_id, risk_level, created_at):
+    cursor.execute(
+        "INSERT INTO chats (user_id, role, message, risk_level, created_at) VALUES (?, ?, ?, ?, ?)",
+        (user_id, "student", "hi", risk_level, created_at)
+    )
+    analytics.record_chat(cursor, user_id, cursor.lastrowid)
+
+
+def _rollups(cursor):
+    return {
+        table: sorted(cursor.execute(f"SELECT * FROM {table}").fetchall())
+        for table in ("rollup_daily_risk", "rollup_hourly_activity", "rollup_daily_mood")
+    }
+
+
+def test_incremental_rollups_match_a_rebuild(syna_db):
+    save_mood("u1", 4)
+    save_mood("u1", 8)
+    save_mood("u2", 3)
+    with syna_db.get_db_context() as (conn, cursor):
+        _chat(cursor, "u1", "high", "2026-03-01 09:15:00")
+        _chat(cursor, "u1", "low", "2026-03-01 09:45:00")
+        _chat(cursor, "u1", "low", "2026-03-02 22:00:00")
+        _chat(cursor, "u2", "low", "2026-03-02 09:00:00")
+        conn.commit()
+
+        incremental = _rollups(cursor)
+        analytics.rebuild_rollups(cursor)
+        assert _rollups(cursor) == incremental
+
+        assert analytics.get_risk_distribution(cursor, "u1", "") == {"high": 1, "low": 2}
+        assert analytics.get_risk_distribution(cursor, analytics.PLATFORM, "2026-03-02") == {"low": 2}
+        assert analytics.get_peak_hours(cursor, analytics.PLATFORM, "") == [(9, 3), (22, 1)]
+        assert [avg for _, avg in analytics.get_mood_trend(cursor, "u1", "")] == [6.0]
+        assert [avg for _, avg in analytics.get_mood_trend(cursor, analytics.PLATFORM, "")] == [5.0]
+
+
+def test_dashboard_reads_never_touch_base_tables(syna_db):
+    reads = [
+        ("SELECT risk_level, SUM(count) FROM rollup_daily_risk WHERE scope = ? AND day >= ? GROUP BY risk_level",),
+        ("SELECT day, mood_sum FROM rollup_daily_mood WHERE scope = ? AND day >= ? ORDER BY day",),
+        ("SELECT hour, SUM(count) FROM rollup_hourly_activity WHERE scope = ? AND day >= ? GROUP BY hour",),
+    ]
+    with syna_db.get_db_context() as (conn, cursor):
+        for (query,) in reads:
+            plan = " | ".join(row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + query, ("u1", "2026-01-01")))
+            assert "chats" not in plan and "moods" not in plan, plan
+            assert "SEARCH" in plan and "INDEX" in plan, plan
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.syna_ai import analytics, archive
+from app.syna_ai.storage import SQLiteStorage
+from app.syna_ai.tools.migrate_to_mongo import iter_archived_batches
+
+
+@pytest.fixture
+def syna_db(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        rows = [
+            ("u1", "2026-01-10 08:00:00"), ("u1", "2026-01-20 08:00:00"), ("u2", "2026-01-15 08:00:00"),
+            ("u1", "2026-02-03 08:00:00"), ("u1", "2026-02-03 08:00:00"),
+            ("u1", "2026-09-01 08:00:00"), ("u1", "2026-09-02 08:00:00"),
+        ]
+        cursor.executemany(
+            "INSERT INTO chats (user_id, role, message, risk_level, created_at) VALUES (?, 'student', ?, 'low', ?)",
+            [(user, f"{user} {created}", created) for user, created in rows]
+        )
+        conn.commit()
+    return syna_db
+
+
+def _live(db):
+    with db.get_db_context() as (conn, cursor):
+        return [r[0] for r in cursor.execute("SELECT created_at FROM chats ORDER BY id")]
+
+
+def test_old_months_move_to_segments(syna_db, tmp_path):
+    archived = archive.archive_old_chats(older_than_days=100, now=datetime(2026, 10, 1, tzinfo=timezone.utc))
+
+    assert archived == {"2026-01": 3, "2026-02": 2}
+    assert _live(syna_db) == ["2026-09-01 08:00:00", "2026-09-02 08:00:00"]
+    assert len(list((tmp_path / "syna_archive").glob("*.seg"))) == 2
+    with syna_db.get_db_context() as (conn, cursor):
+        assert archive.read_archived(cursor, "u2", None, 10) == [(3, "2026-01-15 08:00:00", "student", "u2 2026-01-15 08:00:00", "low")]
+
+    # Nothing left to archive: re-running is a no-op
+    assert archive.archive_old_chats(older_than_days=100, now=datetime(2026, 10, 1, tzinfo=timezone.utc)) == {}
+
+
+def test_history_pages_continue_into_the_archive(syna_db):
+    archive.archive_old_chats(older_than_days=100, now=datetime(2026, 10, 1, tzinfo=timezone.utc))
+    storage = SQLiteStorage()
+
+    async def walk():
+        pages, cursor = [], None
+        while True:
+            _, rows, cursor = await storage.history_page("chats", "u1", cursor, 2)
+            pages.append([r[0] for r in rows])
+            if cursor is None:
+                return pages
+
+    # Newest first across live rows (7, 6), then archived February (5, 4) and January (2, 1)
+    assert asyncio.run(walk()) == [[7, 6], [5, 4], [2, 1]]
+
+
+def test_rollup_rebuild_and_mongo_copy_include_archived_rows(syna_db):
+    archive.archive_old_chats(older_than_days=100, now=datetime(2026, 10, 1, tzinfo=timezone.utc))
+
+    with syna_db.get_db_context() as (conn, cursor):
+        analytics.rebuild_rollups(cursor)
+        assert analytics.get_risk_distribution(cursor, "u1", "") == {"low": 6}
+        assert analytics.get_risk_distribution(cursor, analytics.PLATFORM, "") == {"low": 7}
+        assert analytics.get_risk_distribution(cursor, "u2", "2026-01-15") == {"low": 1}
+
+        batches = list(iter_archived_batches(conn, 2, archive.archive_dir()))
+
+    docs = [doc for batch in batches for doc in batch]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sorted(doc["_id"] for doc in docs) == [1, 2, 3, 4, 5]
+    assert [doc["user_id"] for doc in docs if doc["_id"] == 3] == ["u2"]
+    assert all(doc["embedding"] is None for doc in docs)
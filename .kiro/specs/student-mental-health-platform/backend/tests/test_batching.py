@@ -0,0 +1,66 @@
+import asyncio
+
+from app.syna_ai.batching import MicroBatcher
+
+
+def test_concurrent_calls_share_one_batch():
+    """Calls arriving inside the wait window are run as a single batch."""
+    seen = []
+
+    def batch_fn(items):
+        seen.append(list(items))
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50, name="test")
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        stats = batcher.stats()
+        await batcher.close()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+
+    assert results == [0, 2, 4, 6, 8]
+    assert seen == [[0, 1, 2, 3, 4]]
+    assert stats["batch_size_histogram"] == {"5": 1}
+    assert stats["items"] == 5
+
+
+def test_batch_size_limit_splits_batches():
+    """No batch exceeds max_batch_size; every caller still gets its own result."""
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return [f"r{item}" for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=20, name="test")
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results == [f"r{i}" for i in range(7)]
+    assert max(sizes) <= 3
+    assert sum(sizes) == 7
+
+
+def test_batch_errors_propagate_to_every_caller():
+    def batch_fn(items):
+        raise ValueError("model failed")
+
+    async def scenario():
+        batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=10, name="test")
+        outcomes = await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+        )
+        stats = batcher.stats()
+        await batcher.close()
+        return outcomes, stats
+
+    outcomes, stats = asyncio.run(scenario())
+
+    assert all(isinstance(o, ValueError) for o in outcomes)
+    assert stats["errors"] == 1
@@ -0,0 +1,42 @@
+from app.syna_ai import cascade
+
+THRESHOLDS = {"xgb_low_confidence": 0.85, "semantic_clear": 0.5, "max_hist_risk": 0.0}
+
+
+def _cheap(rule=0, probs=(0.9, 0.07, 0.03), score=0.2):
+    probs = list(probs)
+    return {
+        "rule": rule,
+        "xgb_probs": probs,
+        "xgb": probs.index(max(probs)),
+        "semantic": 2 if score >= 0.85 else 0,
+        "semantic_score": score,
+        "semantic_embedding": None,
+    }
+
+
+def test_cheap_high_detectors_short_circuit():
+    assert cascade.decide(_cheap(rule=2), 0.0, THRESHOLDS) == (2, "rule_high")
+    assert cascade.decide(_cheap(probs=(0.1, 0.2, 0.7)), 0.0, THRESHOLDS) == (2, "xgb_high")
+
+
+def test_confident_low_exits_only_when_every_gate_is_clear():
+    assert cascade.decide(_cheap(), 0.0, THRESHOLDS) == (0, "cheap_low")
+    # Not confident enough
+    assert cascade.decide(_cheap(probs=(0.6, 0.3, 0.1)), 0.0, THRESHOLDS) == (None, "escalated")
+    # Close to a high-risk anchor
+    assert cascade.decide(_cheap(score=0.7), 0.0, THRESHOLDS) == (None, "escalated")
+    # Recent high-risk history: the temporal model must see this turn
+    assert cascade.decide(_cheap(), 0.1, THRESHOLDS) == (None, "escalated")
+    # Medium from XGBoost can still be raised to high by the transformers
+    assert cascade.decide(_cheap(probs=(0.05, 0.9, 0.05)), 0.0, THRESHOLDS) == (None, "escalated")
+
+
+def test_stats_report_short_circuit_rate(monkeypatch):
+    monkeypatch.setattr(cascade, "_counts", dict.fromkeys(cascade.OUTCOMES, 0))
+    for outcome in ("cheap_low", "cheap_low", "rule_high", "escalated"):
+        cascade.record(outcome)
+    stats = cascade.stats()
+    assert stats["turns"] == 4
+    assert stats["counts"]["cheap_low"] == 2
+    assert stats["short_circuit_rate"] == 0.75
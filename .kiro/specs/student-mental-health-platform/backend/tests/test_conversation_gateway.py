@@ -0,0 +1,175 @@
+import asyncio
+import base64
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault("ENCRYPTION_MASTER_KEY", base64.b64encode(bytes(range(32))).decode())
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.conversations import gateway, read_marks, router as conversations
+from app.conversations.notifier import notifier
+
+STUDENT = SimpleNamespace(id=ObjectId(), role="student", institution_id=None)
+OUTSIDER = SimpleNamespace(id=ObjectId(), role="student", institution_id=None)
+
+
+class _Collection:
+    """The handful of Motor calls the conversation actions make, over a list of dicts."""
+
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def _get(self, doc, path):
+        for part in path.split("."):
+            doc = doc.get(part) if isinstance(doc, dict) else None
+        return doc
+
+    def _match(self, doc, query):
+        for key, cond in query.items():
+            if key == "$or":
+                if not any(self._match(doc, q) for q in cond):
+                    return False
+                continue
+            value = self._get(doc, key)
+            if not isinstance(cond, dict):
+                cond = {"$eq": cond}
+            for op, arg in cond.items():
+                ok = {
+                    "$eq": lambda: value == arg,
+                    "$ne": lambda: value != arg,
+                    "$lt": lambda: value is not None and value < arg,
+                    "$gt": lambda: value is not None and value > arg,
+                    "$exists": lambda: (value is not None) == arg,
+                }[op]()
+                if not ok:
+                    return False
+        return True
+
+    async def find_one(self, query, projection=None, sort=None):
+        docs = [d for d in self.docs if self._match(d, query)]
+        for field, direction in reversed(sort or []):
+            docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return docs[0] if docs else None
+
+    async def insert_one(self, doc):
+        doc = dict(doc, _id=ObjectId())
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if self._match(doc, query):
+                for path, value in update.get("$set", {}).items():
+                    *parents, leaf = path.split(".")
+                    target = doc
+                    for part in parents:
+                        target = target.setdefault(part, {})
+                    target[leaf] = value
+                return
+
+
+@pytest.fixture
+def client(monkeypatch):
+    conversation = {
+        "_id": ObjectId(), "participants": [STUDENT.id], "status": "open",
+        "type": "student_ai", "last_message_at": datetime.now(timezone.utc),
+    }
+    db = SimpleNamespace(conversations=_Collection([conversation]), messages=_Collection())
+    users = {"student-token": STUDENT, "outsider-token": OUTSIDER}
+
+    async def authenticate(token):
+        if token not in users:
+            raise HTTPException(status_code=401, detail="Could not validate credentials.")
+        return users[token]
+
+    monkeypatch.setattr(conversations, "get_db", lambda: db)
+    monkeypatch.setattr(gateway, "authenticate_access_token", authenticate)
+    monkeypatch.setattr(notifier, "grace_seconds", 0)
+    app = FastAPI()
+    app.include_router(conversations.router)
+    client = TestClient(app)
+    client.db, client.conversation_id = db, str(conversation["_id"])
+    return client
+
+
+def test_one_socket_subscribes_and_acts(client):
+    cid = client.conversation_id
+    with client.websocket_connect("/conversations/ws") as socket:
+        socket.send_json({"type": "auth", "token": "student-token"})
+        assert socket.receive_json() == {"type": "ready", "user_id": str(STUDENT.id)}
+
+        socket.send_json({"type": "subscribe", "conversation_id": cid, "ref": 1})
+        assert socket.receive_json() == {"type": "ack", "ref": 1, "action": "subscribe", "result": None}
+
+        socket.send_json({"type": "send", "conversation_id": cid, "content": "hello", "ref": 2})
+        frames = [socket.receive_json(), socket.receive_json()]
+        event = next(f for f in frames if f["type"] == "event")
+        ack = next(f for f in frames if f["type"] == "ack")
+        assert event["conversation_id"] == cid and event["data"]["content"] == "hello"
+        assert ack["ref"] == 2 and ack["result"]["id"] == event["data"]["id"]
+        assert len(client.db.messages.docs) == 1
+
+        # Sending leaves the sender's read watermark alone (own messages count as read)
+        assert "read_marks" not in client.db.conversations.docs[0]
+
+        socket.send_json({"type": "read", "conversation_id": cid, "ref": 3})
+        frames = [socket.receive_json(), socket.receive_json()]
+        receipt = next(f for f in frames if f["type"] == "ack")["result"]
+        assert receipt["user_id"] == str(STUDENT.id) and receipt["last_read_message_id"] == ack["result"]["id"]
+        assert receipt in [f.get("data") for f in frames]
+
+
+def test_access_checks_and_bad_frames_become_error_frames(client):
+    with client.websocket_connect("/conversations/ws") as socket:
+        socket.send_json({"type": "auth", "token": "outsider-token"})
+        socket.receive_json()
+
+        socket.send_json({"type": "send", "conversation_id": client.conversation_id, "content": "hi", "ref": "a"})
+        error = socket.receive_json()
+        assert (error["type"], error["ref"], error["status"]) == ("error", "a", 403)
+
+        socket.send_text("not json")
+        assert socket.receive_json()["status"] == 400
+        socket.send_json({"type": "send", "conversation_id": client.conversation_id})
+        assert socket.receive_json()["status"] == 422
+        assert client.db.messages.docs == []
+
+
+def test_bad_tokens_close_the_socket(client):
+    with client.websocket_connect("/conversations/ws") as socket:
+        socket.send_json({"type": "auth", "token": "nope"})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            socket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_read_marks_only_move_forward_and_bound_unread_messages():
+    conv_id, other = ObjectId(), ObjectId()
+    conversations = _Collection([{"_id": conv_id}])
+    messages = _Collection([
+        {"_id": ObjectId(), "conversation_id": conv_id, "is_deleted": False, "sender_id": other,
+         "created_at": datetime(2026, 1, 1, 10, minute)}
+        for minute in range(4)
+    ])
+    newer, older = messages.docs[2], messages.docs[1]
+
+    async def mark(message):
+        await conversations.update_one(
+            {"_id": conv_id, **read_marks.behind_mark_filter(STUDENT.id, message)},
+            {"$set": read_marks.mark_fields(STUDENT.id, message)}
+        )
+
+    asyncio.run(mark(newer))
+    asyncio.run(mark(older))
+    watermark = read_marks.read_mark(conversations.docs[0], STUDENT.id)
+    assert watermark == {"last_read_at": newer["created_at"], "last_read_message_id": newer["_id"]}
+
+    unread = read_marks.unread_filter(conv_id, watermark, STUDENT.id)
+    assert [m["_id"] for m in messages.docs if messages._match(m, unread)] == [messages.docs[3]["_id"]]
+    assert len([m for m in messages.docs if messages._match(m, read_marks.unread_filter(conv_id, None, STUDENT.id))]) == 4
@@ -0,0 +1,49 @@
+import threading
+
+from app.syna_ai import database
+
+
+def test_connection_is_reused_per_thread_and_schema_runs_once(syna_db, monkeypatch):
+    calls = []
+    original = database._init_db
+    monkeypatch.setattr(database, "_init_db", lambda cursor: (calls.append(1), original(cursor)))
+
+    with syna_db.get_db_context() as (first, _):
+        pass
+    with syna_db.get_db_context() as (second, _):
+        pass
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(syna_db._pooled_connection()))
+    thread.start()
+    thread.join()
+
+    assert first is second
+    assert other[0] is not first
+    assert calls == [1]
+
+
+def test_pragmas_are_applied(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert cursor.execute("PRAGMA busy_timeout").fetchone()[0] == database.SQLITE_BUSY_TIMEOUT_MS
+
+
+def test_uncommitted_work_is_rolled_back_on_exit(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        cursor.execute(
+            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+            ("u1", "student", "never committed", "low")
+        )
+    with syna_db.get_db_context() as (conn, cursor):
+        assert cursor.execute("SELECT COUNT(*) FROM chats").fetchone()[0] == 0
+
+
+def test_closed_pool_reconnects(syna_db):
+    with syna_db.get_db_context() as (before, _):
+        pass
+    syna_db.close_db_pool()
+    with syna_db.get_db_context() as (after, cursor):
+        assert cursor.execute("SELECT 1").fetchone() == (1,)
+    assert after is not before
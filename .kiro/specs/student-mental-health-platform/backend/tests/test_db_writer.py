@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.syna_ai import database, db_writer
+from app.syna_ai.batching import MicroBatcher
+
+
+@pytest.fixture
+def writer(syna_db, monkeypatch):
+    batcher = MicroBatcher(db_writer._commit_group, max_batch_size=8, max_wait_ms=50, name="test-writer")
+    monkeypatch.setattr(db_writer, "_writer", batcher)
+    return batcher
+
+
+def _insert(message):
+    def op(conn, cursor):
+        cursor.execute(
+            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+            ("u1", "student", message, "low")
+        )
+        if message == "bad":
+            raise ValueError("rejected")
+        return cursor.lastrowid
+    return op
+
+
+def _messages():
+    with database.get_db_context() as (conn, cursor):
+        return [r[0] for r in cursor.execute("SELECT message FROM chats ORDER BY id")]
+
+
+def test_concurrent_writes_share_one_commit(writer):
+    async def scenario():
+        return await asyncio.gather(*(db_writer.write_db_op(_insert(f"m{i}")) for i in range(5)))
+
+    ids = asyncio.run(scenario())
+
+    assert len(set(ids)) == 5
+    assert _messages() == ["m0", "m1", "m2", "m3", "m4"]
+    assert writer.stats()["batch_size_histogram"] == {"5": 1}
+
+
+def test_failing_write_is_rolled_back_alone(writer):
+    async def scenario():
+        return await asyncio.gather(
+            *(db_writer.write_db_op(_insert(m)) for m in ("before", "bad", "after")), return_exceptions=True
+        )
+
+    before, bad, after = asyncio.run(scenario())
+
+    assert isinstance(bad, ValueError)
+    assert isinstance(before, int) and isinstance(after, int)
+    assert _messages() == ["before", "after"]
+    assert writer.stats()["batches"] == 1
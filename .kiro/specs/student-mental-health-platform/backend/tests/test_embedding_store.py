@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.syna_ai import embedding_store  # noqa: E402
+
+
+def test_pack_is_float16_and_round_trips():
+    vec = np.linspace(-1.0, 1.0, embedding_store.EMBEDDING_DIM, dtype=np.float32)
+    blob = embedding_store.pack_embedding(vec)
+
+    assert len(blob) == embedding_store.EMBEDDING_DIM * 2
+    assert np.allclose(embedding_store.unpack_embedding(blob), vec, atol=1e-3)
+
+
+def test_stored_embeddings_are_read_without_encoding(syna_db, monkeypatch):
+    vec = np.full(embedding_store.EMBEDDING_DIM, 0.25, dtype=np.float32)
+    with syna_db.get_db_context() as (conn, cursor):
+        cursor.execute(
+            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+            ("u1", "student", "hello", "low")
+        )
+        embedding_store.save_embedding(cursor, cursor.lastrowid, vec)
+        conn.commit()
+
+        cursor.execute("""
+            SELECT c.id, c.message, e.embedding FROM chats c
+            LEFT JOIN chat_embeddings e ON e.chat_id = c.id
+        """)
+        rows = cursor.fetchall()
+
+    def fail_translate(text):
+        raise AssertionError("stored rows must not be translated or re-encoded")
+
+    vectors = embedding_store.resolve_history_embeddings(rows, fail_translate)
+
+    assert len(vectors) == 1
+    assert np.allclose(vectors[0], vec)
@@ -0,0 +1,111 @@
+"""
+Parity between the shared encode stage and the original per-model path.
+
+The reference functions below reproduce the pre-encode-stage behaviour: every
+model loads its own tokenizer and tokenizes the raw text itself.
+"""
+
+import functools
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("sentence_transformers")
+
+from app.syna_ai.config import MODELS_DIR, SHARE_DISTIL_BACKBONE  # noqa: E402
+
+
+def _has_weights(name):
+    path = os.path.join(MODELS_DIR, name)
+    return any(
+        os.path.exists(os.path.join(path, f)) and os.path.getsize(os.path.join(path, f)) > 1024
+        for f in ("model.safetensors", "pytorch_model.bin")
+    )
+
+
+pytestmark = pytest.mark.skipif(
+    not (_has_weights("distilbert-risk") and _has_weights("bert-risk")),
+    reason="trained transformer weights not available",
+)
+
+SAMPLES = [
+    "hi, how are you doing today?",
+    "i have an exam tomorrow and i can't sleep",
+    "nothing matters anymore, i feel so empty",
+    "i feel like dying",
+    "my friends ignored me again " * 30,  # longer than both max lengths
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _reference_models():
+    from transformers import (
+        DistilBertTokenizerFast, DistilBertForSequenceClassification,
+        BertTokenizerFast, BertForSequenceClassification, DistilBertModel,
+    )
+    d_path = os.path.join(MODELS_DIR, "distilbert-risk")
+    b_path = os.path.join(MODELS_DIR, "bert-risk")
+    return {
+        "d_tok": DistilBertTokenizerFast.from_pretrained(d_path),
+        "d_model": DistilBertForSequenceClassification.from_pretrained(d_path).eval(),
+        "b_tok": BertTokenizerFast.from_pretrained(b_path),
+        "b_model": BertForSequenceClassification.from_pretrained(b_path).eval(),
+        "base_tok": DistilBertTokenizerFast.from_pretrained("distilbert-base-uncased"),
+        "base_model": DistilBertModel.from_pretrained("distilbert-base-uncased").eval(),
+    }
+
+
+def _reference_ensemble(text):
+    import torch.nn.functional as F
+    m = _reference_models()
+    d_tok, d_model, b_tok, b_model = m["d_tok"], m["d_model"], m["b_tok"], m["b_model"]
+    with torch.no_grad():
+        probs_d = F.softmax(d_model(**d_tok(text, return_tensors="pt", truncation=True, padding=True, max_length=128)).logits, dim=1)
+        probs_b = F.softmax(b_model(**b_tok(text, return_tensors="pt", truncation=True, padding=True, max_length=128)).logits, dim=1)
+    return torch.argmax((probs_d + probs_b) / 2, dim=1).item()
+
+
+def _reference_cls(text):
+    tok, model = _reference_models()["base_tok"], _reference_models()["base_model"]
+    inputs = tok(text, return_tensors="pt", truncation=True, padding="max_length", max_length=96)
+    with torch.no_grad():
+        return model(**inputs).last_hidden_state[:, 0, :].numpy()[0]
+
+
+def test_shared_tokenizer_matches_per_model_tokenizers():
+    from transformers import BertTokenizerFast
+    from app.syna_ai.models.encoder import tokenize
+
+    bert_tok = BertTokenizerFast.from_pretrained(os.path.join(MODELS_DIR, "bert-risk"))
+    for text in SAMPLES:
+        assert tokenize(text) == bert_tok(text, truncation=True, max_length=128)["input_ids"]
+
+
+def test_ensemble_predictions_match():
+    from app.syna_ai.models.encoder import tokenize
+    from app.syna_ai.models.ensemble_risk import predict_risk_ensemble_ids
+
+    expected = [_reference_ensemble(t) for t in SAMPLES]
+    assert predict_risk_ensemble_ids([tokenize(t) for t in SAMPLES]) == expected
+
+
+@pytest.mark.skipif(SHARE_DISTIL_BACKBONE, reason="shared backbone intentionally changes LSTM features")
+def test_temporal_features_match():
+    import numpy as np
+    from app.syna_ai.models.encoder import encode_turn
+
+    for text in SAMPLES:
+        assert np.allclose(encode_turn(text)["cls"], _reference_cls(text), atol=1e-4)
+
+
+def test_semantic_risk_matches():
+    from app.syna_ai.models.encoder import encode_turn
+    from app.syna_ai.models.semantic_risk import detect_semantic_risk
+
+    for text in SAMPLES:
+        risk, info = detect_semantic_risk(text)
+        shared_risk, shared_info = detect_semantic_risk(text, text_embedding=encode_turn(text)["semantic"])
+        assert risk == shared_risk
+        assert info["similarity"] == pytest.approx(shared_info["similarity"], abs=1e-3)
@@ -0,0 +1,102 @@
+import sqlite3
+
+from app.syna_ai import feature_store
+
+
+def _chat(cursor, user_id, message, risk_level, english=True):
+    cursor.execute(
+        "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+        (user_id, "student", message, risk_level)
+    )
+    feature_store.record_chat(cursor, user_id, cursor.lastrowid, message, english, risk_level)
+    return cursor.lastrowid
+
+
+def _mood(cursor, user_id, score):
+    cursor.execute("INSERT INTO moods (user_id, mood_score) VALUES (?, ?)", (user_id, score))
+    feature_store.record_mood(cursor, user_id, score)
+
+
+def test_first_use_bootstraps_from_existing_rows(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        for score in (2, 4, 6):
+            cursor.execute("INSERT INTO moods (user_id, mood_score) VALUES (?, ?)", ("u1", score))
+        for i, risk in enumerate(["low", "high", "low", "high", "low"]):
+            cursor.execute(
+                "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+                ("u1", "student", f"hola {i}", risk)
+            )
+        conn.commit()
+
+        features = feature_store.get_features(cursor, "u1")
+        conn.commit()
+
+    assert feature_store.mood_trend(features) == 4.0
+    assert feature_store.hist_risk(features) == 0.4
+    assert [text for _, text, _ in feature_store.history_rows(features, str.upper)] == [
+        "HOLA 1", "HOLA 2", "HOLA 3", "HOLA 4"
+    ]
+
+
+def test_incremental_updates_match_a_recompute(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        for i in range(12):
+            _chat(cursor, "u1", f"message {i}", "high" if i % 3 == 0 else "low")
+            if i % 2 == 0:
+                _mood(cursor, "u1", i % 10)
+        conn.commit()
+
+        features = feature_store.get_features(cursor, "u1")
+        recomputed = feature_store._bootstrap(cursor, "u1")
+
+    assert features["moods"] == recomputed["moods"]
+    assert features["risks"] == recomputed["risks"]
+    assert [entry[:2] for entry in features["recent"]] == [entry[:2] for entry in recomputed["recent"]]
+
+
+def test_stored_embeddings_skip_translation(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        first = _chat(cursor, "u1", "bonjour", "low", english=False)
+        cursor.execute(
+            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+            ("u1", "student", "salut", "low")
+        )
+        second = cursor.lastrowid
+        feature_store.record_chat(cursor, "u1", second, "hi", True, "low", embedding=[0.5, 0.25])
+        conn.commit()
+        features = feature_store.get_features(cursor, "u1")
+
+    translated = []
+    rows = feature_store.history_rows(features, lambda text: translated.append(text) or "hello")
+    assert translated == ["bonjour"]
+    assert rows[0] == (first, "hello", None)
+    assert rows[1][0] == second and rows[1][2] is not None
+
+
+def test_rolled_back_write_is_not_served_from_cache(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        _chat(cursor, "u1", "kept", "low")
+        conn.commit()
+        _chat(cursor, "u1", "rolled back", "high")
+        conn.rollback()
+
+        features = feature_store.get_features(cursor, "u1")
+
+    assert features["risks"] == ["low"]
+    assert [text for _, text, _ in features["recent"]] == ["kept"]
+
+
+def test_write_from_another_worker_is_picked_up(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        _mood(cursor, "u1", 3)
+        conn.commit()
+        assert feature_store.get_features(cursor, "u1")["moods"] == [3]
+
+    # Another process updates the record behind this worker's cache
+    other = sqlite3.connect(syna_db.DB_PATH)
+    other.execute("UPDATE user_features SET revision = 'other', moods = '[3, 9]' WHERE user_id = 'u1'")
+    other.commit()
+    other.close()
+
+    with syna_db.get_db_context() as (conn, cursor):
+        assert feature_store.get_features(cursor, "u1")["moods"] == [3, 9]
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.authentication_onboarding.core.dependencies import get_current_user
+from app.syna_ai import database
+from app.syna_ai.router import router
+
+
+@pytest.fixture
+def client(syna_db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="u1")
+    with database.get_db_context() as (conn, cursor):
+        # Same second for all rows: the id breaks created_at ties
+        cursor.executemany(
+            "INSERT INTO chats (user_id, role, message, risk_level, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(user, "student", f"{user} message {i}", "low", "2026-01-01 10:00:00")
+             for i in range(7) for user in ("u1", "u2")]
+        )
+        conn.commit()
+    return TestClient(app)
+
+
+def _page(client, **params):
+    response = client.get("/syna/history", params=params)
+    assert response.status_code == 200
+    body = response.json()
+    return [m["message"] for m in body["history"]], body["next_cursor"]
+
+
+def test_history_pages_walk_back_without_gaps_or_repeats(client):
+    first, cursor = _page(client, limit=3)
+    second, cursor = _page(client, limit=3, cursor=cursor)
+    third, cursor = _page(client, limit=3, cursor=cursor)
+
+    assert first == ["u1 message 4", "u1 message 5", "u1 message 6"]
+    assert second == ["u1 message 1", "u1 message 2", "u1 message 3"]
+    assert third == ["u1 message 0"]
+    assert cursor is None
+
+
+def test_unchanged_history_is_not_modified(client):
+    response = client.get("/syna/history", params={"limit": 3})
+    etag = response.headers["ETag"]
+
+    assert client.get("/syna/history", params={"limit": 3}, headers={"If-None-Match": etag}).status_code == 304
+    # A different page is a different representation
+    assert client.get("/syna/history", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 200
+
+    with database.get_db_context() as (conn, cursor):
+        cursor.execute("INSERT INTO chats (user_id, role, message, risk_level) VALUES ('u1', 'bot', 'new', 'low')")
+        conn.commit()
+    response = client.get("/syna/history", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["history"][-1]["message"] == "new"
+
+
+def test_malformed_cursor_is_rejected(client):
+    assert client.get("/syna/history", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/syna/journal/history", params={"limit": 0}).status_code == 422
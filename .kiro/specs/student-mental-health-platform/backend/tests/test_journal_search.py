@@ -0,0 +1,91 @@
+import pytest
+
+from app.syna_ai import journal_search
+
+
+@pytest.fixture
+def syna_db(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        cursor.executemany(
+            "INSERT INTO journals (user_id, content) VALUES (?, ?)",
+            [
+                ("u1", "Worried about the <exam> tomorrow, could not sleep"),
+                ("u1", "Exam went fine. Exam results on Friday, exam stress gone"),
+                ("u1", "Dinner with family, felt calm"),
+                ("u1", "Panicked before class but it passed"),
+                ("u2", "My exam is next week"),
+            ]
+        )
+        conn.commit()
+    return syna_db
+
+
+def _ids(cursor, user_id, query, **kwargs):
+    rows, _ = journal_search.search(cursor, user_id, query, **kwargs)
+    return [r[0] for r in rows]
+
+
+def test_search_is_per_user_ranked_and_prefix_aware(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        # Entry 2 mentions "exam" three times and ranks first; u2's entry never shows up
+        assert _ids(cursor, "u1", "exam") == [2, 1]
+        assert _ids(cursor, "u2", "exam") == [5]
+        assert _ids(cursor, "u1", "panic*") == [4]
+        assert _ids(cursor, "u1", "family dinner") == [3]
+        assert _ids(cursor, "u1", "family exam") == []
+        # A user id is a phrase, never a query operator
+        assert _ids(cursor, 'u1" OR "u2', "exam") == []
+
+
+def test_snippets_are_escaped_and_highlighted(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        rows, _ = journal_search.search(cursor, "u1", "exam", limit=10)
+    snippet = {r[0]: r[2] for r in rows}[1]
+    assert "&lt;<mark>exam</mark>&gt;" in snippet
+    assert "<exam>" not in snippet
+
+
+def test_triggers_keep_the_index_in_sync(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        cursor.execute("UPDATE journals SET content = 'Felt lonely this weekend' WHERE id = 3")
+        cursor.execute("DELETE FROM journals WHERE id = 1")
+        cursor.execute("INSERT INTO journals (user_id, content) VALUES ('u1', 'Lonely again')")
+        conn.commit()
+
+        assert _ids(cursor, "u1", "dinner") == []
+        assert sorted(_ids(cursor, "u1", "lonely")) == [3, 6]
+        assert _ids(cursor, "u1", "exam") == [2]
+
+
+def test_pages_continue_by_score_then_id(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        cursor.executemany(
+            "INSERT INTO journals (user_id, content) VALUES ('u3', ?)",
+            [("grateful for today",)] * 5
+        )
+        conn.commit()
+
+        seen, after = [], None
+        while True:
+            rows, after = journal_search.search(cursor, "u3", "grateful", after=after, limit=2)
+            seen.extend(r[0] for r in rows)
+            if after is None:
+                break
+        assert seen == [6, 7, 8, 9, 10]
+
+
+def test_queries_without_terms_are_rejected(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        with pytest.raises(ValueError):
+            journal_search.search(cursor, "u1", "*** ???")
+        with pytest.raises(ValueError):
+            journal_search.search(cursor, "u1", "exam", after="not-a-cursor")
+
+
+def test_user_id_phrase_inside_a_longer_id_does_not_leak(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        cursor.execute("INSERT INTO journals (user_id, content) VALUES ('u1-x', 'Another exam entry')")
+        conn.commit()
+        # "u1" matches as a phrase inside the tokenized "u1-x"; only the user_id column check keeps 6 out
+        assert _ids(cursor, "u1", "exam") == [2, 1]
+        assert _ids(cursor, "u1-x", "exam") == [6]
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from app.syna_ai.llm_client import GeminiClient, LLMError
+from app.syna_ai.tools.fake_llm_server import FakeLLMServer
+
+
+def _run(server_kwargs, client_kwargs, scenario):
+    async def main():
+        server = FakeLLMServer(**server_kwargs)
+        port = await server.start(port=0)
+        client = GeminiClient("fake-key", base_url=f"http://127.0.0.1:{port}", **client_kwargs)
+        try:
+            return server, client, await scenario(client)
+        finally:
+            await client.aclose()
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_connections_are_reused_across_calls():
+    async def scenario(client):
+        return [await client.generate("hi") for _ in range(3)]
+
+    server, client, replies = _run({"latency_ms": 1}, {"model": "gemini-2.5-flash"}, scenario)
+    assert replies == ["[gemini-2.5-flash] I'm here with you."] * 3
+    assert server.connections == 1
+
+
+def test_falls_back_to_the_second_model():
+    async def scenario(client):
+        return await client.generate("hi")
+
+    server, client, reply = _run(
+        {"latency_ms": 1, "fail_model": "gemini-2.5-flash"},
+        {"model": "gemini-2.5-flash", "fallback_model": "gemini-2.5-pro"},
+        scenario,
+    )
+    assert reply.startswith("[gemini-2.5-pro]")
+    assert client.stats["fallbacks"] == 1
+
+
+def test_timeout_raises_when_every_model_is_slow():
+    async def scenario(client):
+        with pytest.raises(LLMError):
+            await client.generate("hi")
+
+    _, client, _ = _run({"latency_ms": 500}, {"fallback_model": "", "timeout": 0.05}, scenario)
+    assert client.stats["timeouts"] == 1
+
+
+def test_semaphore_caps_in_flight_calls():
+    async def scenario(client):
+        started = time.perf_counter()
+        await asyncio.gather(*(client.generate("hi") for _ in range(4)))
+        return time.perf_counter() - started
+
+    _, _, elapsed = _run({"latency_ms": 50}, {"max_concurrency": 2}, scenario)
+    # 4 calls, 2 at a time, 50 ms each
+    assert elapsed >= 0.1
@@ -0,0 +1,141 @@
+import asyncio
+import base64
+import json
+import os
+from datetime import datetime, timezone
+
+os.environ.setdefault("ENCRYPTION_MASTER_KEY", base64.b64encode(bytes(range(32))).decode())
+
+import pytest
+from bson import ObjectId
+
+from app.conversations import message_reads, read_marks
+from app.conversations.models.message import Message
+from app.conversations.schemas import MessageRead
+from app.data_storage_and_encryption.encryption_utils import decrypt_many, encrypt_field
+
+READER = ObjectId()
+
+
+class _Aggregation:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class _Collection:
+    """Returns already-projected documents (what message_pipeline would produce), newest first."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return _Aggregation(self.docs)
+
+
+def _documents(n):
+    conv_id = ObjectId()
+    return [
+        {
+            "_id": ObjectId(),
+            "conversation_id": conv_id,
+            "sender_id": None if i % 3 == 0 else ObjectId(),
+            "sender_type": "ai" if i % 3 == 0 else "student",
+            "encrypted_content": encrypt_field(f"message {i} — <é>"),
+            "metadata": {"n": i, "at": datetime(2026, 1, 1, tzinfo=timezone.utc)} if i % 2 else {},
+            "is_deleted": False,
+            "read_by": [READER] if i % 2 else [],
+            "created_at": datetime(2026, 1, 1, 10, 0, i, i * 1000, tzinfo=timezone.utc if i % 4 else None),
+        }
+        for i in reversed(range(n))
+    ]
+
+
+def _old_path(docs):
+    rows = []
+    for m in reversed(docs):
+        msg_obj = Message(**m)
+        rows.append(MessageRead(
+            id=str(m["_id"]),
+            sender_id=str(m["sender_id"]) if m.get("sender_id") else None,
+            sender_type=m["sender_type"],
+            content=msg_obj.get_content() or "",
+            metadata=m.get("metadata", {}),
+            created_at=m["created_at"],
+            is_read=READER in m.get("read_by", [])
+        ).model_dump(mode="json"))
+    return rows
+
+
+def _projected(docs):
+    return [
+        {k: d[k] for k in ("_id", "sender_id", "sender_type", "encrypted_content", "metadata", "created_at")}
+        | {"is_read": READER in d["read_by"]}
+        for d in docs
+    ]
+
+
+def test_fast_path_matches_the_pydantic_response(monkeypatch):
+    monkeypatch.setattr(message_reads.settings, "MESSAGE_DECRYPT_CHUNK", 7)
+    docs = _documents(40)
+    collection = _Collection(_projected(docs))
+
+    mark = {"last_read_at": datetime(2026, 1, 1, 10, 0, 20), "last_read_message_id": ObjectId()}
+    messages = asyncio.run(message_reads.read_messages(collection, {"conversation_id": 1}, mark, READER, 100))
+    body = b"".join(message_reads.iter_json(messages))
+
+    assert json.loads(body) == _old_path(docs)
+    [pipeline] = collection.pipelines
+    assert pipeline[-1]["$project"]["is_read"] == read_marks.is_read_expression(mark, READER)
+    assert "read_by" not in pipeline[-1]["$project"]
+    # No watermark yet: only the reader's own messages are read
+    assert read_marks.is_read_expression(None, READER) == {"$eq": ["$sender_id", {"$literal": READER}]}
+
+
+class _SortingCollection(_Collection):
+    """Applies the pipeline's $sort and $limit, so tie-breaking is exercised."""
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        docs = list(self.docs)
+        for stage in pipeline:
+            if "$sort" in stage:
+                for field, direction in reversed(list(stage["$sort"].items())):
+                    docs.sort(key=lambda d: d[field], reverse=direction < 0)
+            elif "$limit" in stage:
+                docs = docs[:stage["$limit"]]
+        return _Aggregation(docs)
+
+
+def test_equal_timestamps_page_in_watermark_order():
+    at = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+    first, second = sorted([ObjectId(), ObjectId()])
+    docs = [
+        {"_id": _id, "sender_id": None, "sender_type": "ai", "encrypted_content": encrypt_field(text),
+         "metadata": {}, "created_at": at, "is_read": False}
+        for _id, text in ((first, "first"), (second, "second"))
+    ]
+    # Whatever order the documents come back in, the newest page ends on the higher _id
+    for ordering in (docs, docs[::-1]):
+        messages = asyncio.run(message_reads.read_messages(_SortingCollection(ordering), {}, None, READER, 1))
+        assert [m["id"] for m in messages] == [str(second)]
+        messages = asyncio.run(message_reads.read_messages(_SortingCollection(ordering), {}, None, READER, 2))
+        assert [m["content"] for m in messages] == ["first", "second"]
+
+
+def test_empty_page_is_an_empty_array():
+    messages = asyncio.run(message_reads.read_messages(_Collection([]), {}, None, READER, 50))
+    assert b"".join(message_reads.iter_json(messages)) == b"[]"
+
+
+def test_batch_decrypt_rejects_tampered_values():
+    good, bad = encrypt_field("a"), encrypt_field("b")
+    tampered = base64.b64encode(base64.b64decode(bad)[:-1] + b"\0").decode()
+
+    assert decrypt_many([good, None]) == ["a", None]
+    with pytest.raises(Exception):
+        decrypt_many([good, tampered])
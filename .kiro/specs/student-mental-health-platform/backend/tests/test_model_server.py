@@ -0,0 +1,128 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.syna_ai.model_client import ModelServerClient, ModelServerError, parse_address
+from app.syna_ai.model_server import ModelServer
+
+
+# Stand-in ops (module level, so the pool can pickle them to its workers)
+def _shout(p):
+    return {"text": p["text"].upper(), "pid": os.getpid()}
+
+
+def _lengths(items):
+    return [len(item) for item in items]
+
+
+def test_parse_address():
+    import socket
+    assert parse_address("tcp:127.0.0.1:8790") == (socket.AF_INET, ("127.0.0.1", 8790))
+    assert parse_address("unix:/tmp/x.sock")[1] == "/tmp/x.sock"
+    with pytest.raises(ValueError):
+        parse_address("127.0.0.1:8790")
+
+
+def test_health_and_errors_over_socket():
+    async def scenario():
+        server = ModelServer("tcp:127.0.0.1:0", workers=1, warm=False)
+        listener = await server.start()
+        port = listener.sockets[0].getsockname()[1]
+        client = ModelServerClient(f"tcp:127.0.0.1:{port}", timeout=30)
+        try:
+            health = await asyncio.to_thread(client.call, "health")
+            with pytest.raises(ModelServerError):
+                await asyncio.to_thread(client.call, "no_such_op")
+            # The connection survives an error response
+            again = await asyncio.to_thread(client.call, "health")
+        finally:
+            client.close()
+            await server.close()
+        return health, again
+
+    health, again = asyncio.run(scenario())
+    assert health["status"] == "ok"
+    assert health["workers_responding"] is True
+    assert set(health["batchers"]) == {"ensemble", "embed"}
+    assert again["uptime_s"] >= health["uptime_s"]
+
+
+def test_ops_run_in_the_pool_and_through_the_batcher():
+    async def scenario():
+        server = ModelServer("tcp:127.0.0.1:0", workers=1, warm=False,
+                             ops={"shout": _shout}, batch_ops={"length": _lengths})
+        listener = await server.start()
+        port = listener.sockets[0].getsockname()[1]
+        client = ModelServerClient(f"tcp:127.0.0.1:{port}", timeout=30)
+        try:
+            shouted = await asyncio.to_thread(client.call, "shout", text="hello")
+            # Client threads of their own: the server's batcher needs the default executor
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=8) as threads:
+                lengths = await asyncio.gather(*[
+                    loop.run_in_executor(threads, lambda n=n: client.call("length", item="x" * n))
+                    for n in range(1, 9)
+                ])
+            health = await asyncio.to_thread(client.call, "health")
+        finally:
+            client.close()
+            await server.close()
+        return shouted, lengths, health
+
+    shouted, lengths, health = asyncio.run(scenario())
+    assert shouted["text"] == "HELLO"
+    assert shouted["pid"] != os.getpid()
+    assert lengths == list(range(1, 9))
+    assert health["ops"]["shout"]["calls"] == 1
+    assert health["ops"]["length"]["calls"] == 8
+    assert health["batchers"]["length"]["items"] == 8
+
+
+def test_broken_pool_is_rebuilt_once_by_concurrent_callers():
+    async def scenario():
+        server = ModelServer("tcp:127.0.0.1:0", workers=1, warm=False)
+        await server.start()
+        try:
+            # The worker dies on the first try and again on the retry: the pool is left broken
+            with pytest.raises(BrokenProcessPool):
+                await asyncio.to_thread(server._submit_blocking, os._exit, 1)
+            generation = server._generation
+            with ThreadPoolExecutor(max_workers=4) as threads:
+                pids = list(threads.map(lambda _: server._submit_blocking(os.getpid), range(4)))
+            return generation, server._generation, pids
+        finally:
+            await server.close()
+
+    before, after, pids = asyncio.run(scenario())
+    assert after == before + 1
+    assert len(pids) == 4 and os.getpid() not in pids
+
+
+def test_timeouts_are_not_retried():
+    import socket
+    import threading
+
+    listener = socket.create_server(("127.0.0.1", 0))
+    accepted = []
+
+    def hang():
+        # Accept every connection and never reply, like a saturated server
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            accepted.append(conn)
+
+    threading.Thread(target=hang, daemon=True).start()
+    client = ModelServerClient(f"tcp:127.0.0.1:{listener.getsockname()[1]}", timeout=0.2)
+    try:
+        with pytest.raises(socket.timeout):
+            client.call("health")
+    finally:
+        client.close()
+        listener.close()
+    assert len(accepted) == 1
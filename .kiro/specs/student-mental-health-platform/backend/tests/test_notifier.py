@@ -0,0 +1,181 @@
+import asyncio
+
+from app.conversations.broker import LocalBroker, LocalHub, MongoBroker
+from app.conversations.fanout import RESYNC
+from app.conversations.notifier import MessageNotifier
+
+
+def _workers(n, grace_seconds=0):
+    hub = LocalHub()
+    notifiers = [MessageNotifier(LocalBroker(hub)) for _ in range(n)]
+    for notifier in notifiers:
+        notifier.grace_seconds = grace_seconds
+    return hub, notifiers
+
+
+def test_events_reach_subscribers_on_other_workers():
+    hub, (a, b) = _workers(2)
+
+    async def scenario():
+        on_a, on_b = a.subscribe("c1"), b.subscribe("c1")
+        other = b.subscribe("c2")
+        await a.broadcast("c1", {"content": "hi"})
+        await b.broadcast("c3", {"content": "nobody listening"})
+        return on_a.get_nowait(), on_b.get_nowait(), other.empty()
+
+    assert asyncio.run(scenario()) == ((1, {"content": "hi"}), (1, {"content": "hi"}), True)
+
+
+def test_one_upstream_subscription_per_conversation():
+    hub, (a,) = _workers(1)
+    queues = [a.subscribe("c1") for _ in range(3)]
+    assert list(a.broker.topics) == ["c1"]
+
+    for queue in queues[:2]:
+        a.unsubscribe("c1", queue)
+    assert list(a.broker.topics) == ["c1"]
+    a.unsubscribe("c1", queues[2])
+    assert a.broker.topics == {}
+
+
+def test_slow_subscribers_coalesce_then_resync_instead_of_being_dropped():
+    hub, (a, b) = _workers(2)
+    a.max_queue_size = 3
+
+    async def scenario():
+        slow, fast = a.subscribe("c1"), b.subscribe("c1")
+        await b.broadcast("c1", {"content": "hi"})
+        for _ in range(5):
+            await b.broadcast("c1", {"type": "read", "user_id": "u2"})
+        await b.broadcast("c1", {"type": "edit", "message": {"id": "m1", "content": "v1"}})
+        await b.broadcast("c1", {"type": "edit", "message": {"id": "m1", "content": "v2"}})
+        coalesced = [slow.get_nowait() for _ in range(slow.qsize())]
+
+        for n in range(5):
+            await b.broadcast("c1", {"content": n})
+        return coalesced, slow, fast
+
+    coalesced, slow, fast = asyncio.run(scenario())
+    # Newest read receipt and edit win, ids stay ascending
+    assert coalesced == [
+        (1, {"content": "hi"}),
+        (6, {"type": "read", "user_id": "u2"}),
+        (8, {"type": "edit", "message": {"id": "m1", "content": "v2"}}),
+    ]
+    # Overflow: pending events are dropped, the subscriber stays and gets a resync first
+    assert slow.get_nowait() is RESYNC
+    assert [slow.get_nowait() for _ in range(slow.qsize())] == [(12, {"content": 3}), (13, {"content": 4})]
+    assert "c1" in a.queues and fast.qsize() == 8  # coalesced too, but never overflowed
+
+    stats = a.stats()
+    assert (stats["subscriber_count"], stats["coalesced"], stats["dropped"], stats["resyncs"]) == (1, 5, 3, 1)
+    assert stats["subscribers"][0]["max_lag"] == 3
+
+
+def test_reconnects_replay_missed_events_from_the_buffer():
+    hub, (a, b) = _workers(2, grace_seconds=60)
+
+    async def scenario():
+        queue = a.subscribe("c1")
+        await b.broadcast("c1", {"n": 1})
+        a.unsubscribe("c1", queue)  # connection drops; a keeps buffering
+        await b.broadcast("c1", {"n": 2})
+        await b.broadcast("c1", {"n": 3})
+
+        queue = a.subscribe("c1")
+        replayed = a.replay("c1", 1)
+        await b.broadcast("c1", {"n": 4})
+        return replayed, queue.get_nowait(), queue.empty()
+
+    replayed, live, drained = asyncio.run(scenario())
+    assert replayed == [(2, {"n": 2}), (3, {"n": 3})]
+    assert live == (4, {"n": 4}) and drained
+
+
+def test_replay_refuses_when_the_buffer_has_a_gap():
+    hub, (a, b) = _workers(2)
+    a.replay_size = 2
+
+    async def scenario():
+        queue = a.subscribe("c1")
+        for n in range(4):
+            await b.broadcast("c1", {"n": n})
+        return [a.replay("c1", last) for last in (0, 1, 2, 4)]
+
+    # Buffer holds ids 3 and 4: id 2 was evicted
+    assert asyncio.run(scenario()) == [None, None, [(3, {"n": 2}), (4, {"n": 3})], []]
+    # Never-buffered conversations always need a resync
+    assert a.replay("c9", 0) is None
+
+
+def test_upstream_subscription_is_released_after_the_grace_period():
+    hub, (a,) = _workers(1, grace_seconds=0.01)
+
+    async def scenario():
+        a.unsubscribe("c1", a.subscribe("c1"))
+        held = "c1" in a.broker.topics
+        await asyncio.sleep(0.05)
+        return held, "c1" in a.broker.topics, "c1" in a.buffers
+
+    assert asyncio.run(scenario()) == (True, False, False)
+
+
+class _Stream:
+    def __init__(self, changes):
+        self.changes = changes
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for token, event in self.changes:
+            self.resume_token = token
+            yield {"fullDocument": event}
+        await asyncio.Event().wait()  # stay open, like a live change stream
+
+
+class _Events:
+    """conversation_events stand-in: the first watch() fails, later ones replay `changes`."""
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.watches = []
+
+    def watch(self, pipeline, **options):
+        self.watches.append(options)
+        if len(self.watches) == 1:
+            raise ConnectionError("not primary")
+        return _Stream(self.changes)
+
+
+def test_mongo_stream_starts_at_subscribe_time_and_skips_repeats():
+    events = _Events([
+        ("t1", {"event_id": 1, "message": {"n": 1}}),
+        ("t1", {"event_id": 1, "message": {"n": 1}}),
+        ("t2", {"event_id": 2, "message": {"n": 2}}),
+    ])
+    broker = MongoBroker()
+    broker.retry_seconds = 0
+    broker._collection = lambda name=None: events
+    delivered = []
+
+    async def scenario():
+        broker.subscribe("c1", lambda conversation_id, event_id, message: delivered.append(event_id))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        await broker.close()
+
+    asyncio.run(scenario())
+    first, retry = events.watches
+    # The failed first open does not lose the start point
+    assert first["start_at_operation_time"] is not None
+    assert retry["start_at_operation_time"] == first["start_at_operation_time"]
+    assert retry["resume_after"] is None
+    assert delivered == [1, 2]
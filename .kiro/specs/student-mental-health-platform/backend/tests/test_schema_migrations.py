@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+from app.syna_ai import database
+
+
+HOT_QUERIES = [
+    ("SELECT mood_score FROM moods WHERE user_id = ? ORDER BY created_at DESC LIMIT 5", ("u1",)),
+    ("SELECT risk_level FROM chats WHERE user_id = ? ORDER BY created_at DESC LIMIT 10", ("u1",)),
+    ("""SELECT c.id, c.message, e.embedding FROM chats c
+        LEFT JOIN chat_embeddings e ON e.chat_id = c.id
+        WHERE c.user_id = ? ORDER BY c.created_at DESC, c.id DESC LIMIT 4""", ("u1",)),
+    ("SELECT id, role, message, risk_level, created_at FROM chats WHERE user_id = ? ORDER BY created_at ASC", ("u1",)),
+    ("SELECT content, created_at FROM journals WHERE user_id = ? ORDER BY created_at DESC", ("u1",)),
+    ("SELECT risk_level, COUNT(*) FROM chats WHERE user_id = ? GROUP BY risk_level", ("u1",)),
+    ("SELECT COUNT(*) FROM chats WHERE user_id = ? AND id > ?", ("u1", 0)),
+    ("""SELECT id, created_at, content FROM journals WHERE user_id = ? AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC LIMIT 51""", ("u1", "2026-01-01 10:00:00", 9)),
+]
+
+
+@pytest.mark.parametrize("query,params", HOT_QUERIES)
+def test_hot_queries_use_an_index_without_sorting(syna_db, query, params):
+    with syna_db.get_db_context() as (conn, cursor):
+        plan = " | ".join(row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + query, params))
+    assert "USING" in plan and "INDEX" in plan, plan
+    assert not any(step.startswith("SCAN") for step in plan.split(" | ")), plan
+    assert "TEMP B-TREE FOR ORDER BY" not in plan and "RIGHT PART OF ORDER BY" not in plan, plan
+
+
+def test_legacy_database_is_upgraded_once(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute("CREATE TABLE chats (id INTEGER PRIMARY KEY AUTOINCREMENT, message TEXT NOT NULL, "
+                   "risk_level TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    legacy.execute("INSERT INTO chats (message, risk_level) VALUES ('old message', 'low')")
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setattr(database, "DB_PATH", path)
+    with database.get_db_context() as (conn, cursor):
+        assert {"user_id", "role"} <= database._columns(cursor, "chats")
+        assert database.schema_version(cursor) == database.SCHEMA_VERSION
+        assert cursor.execute("SELECT message FROM chats").fetchall() == [("old message",)]
+
+    # Re-running is a no-op: nothing is re-applied
+    conn = sqlite3.connect(path)
+    database._init_db(conn.cursor())
+    versions = [r[0] for r in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    conn.close()
+    assert versions == [v for v, _, _ in database.MIGRATIONS]
+
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    def broken(cursor):
+        cursor.execute("CREATE INDEX idx_half_done ON chats (message)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(database, "MIGRATIONS", database.MIGRATIONS + [(99, "broken", broken)])
+    conn = sqlite3.connect(tmp_path / "broken.db")
+    with pytest.raises(RuntimeError):
+        database._init_db(conn.cursor())
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_half_done" not in indexes
+    assert database.schema_version(conn.cursor()) == database.SCHEMA_VERSION
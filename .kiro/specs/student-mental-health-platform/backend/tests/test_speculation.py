@@ -0,0 +1,50 @@
+import asyncio
+
+from app.syna_ai import speculation
+from app.syna_ai.speculation import SpeculativeReply
+
+
+def _fake_gemini(calls):
+    async def generate(user_text, risk_level, language="en"):
+        calls.append(risk_level)
+        await asyncio.sleep(0.05)
+        return f"reply for risk {risk_level}"
+    return generate
+
+
+def _reset(monkeypatch):
+    monkeypatch.setattr(speculation, "_counts", dict.fromkeys(speculation.OUTCOMES, 0))
+    monkeypatch.setattr(speculation, "_timing", {"llm_ms": 0.0, "waited_ms": 0.0})
+
+
+def test_matching_risk_uses_the_speculative_reply(monkeypatch):
+    _reset(monkeypatch)
+    calls = []
+
+    async def scenario():
+        spec = SpeculativeReply(_fake_gemini(calls), "hello", "en", 0)
+        await asyncio.sleep(0.06)  # risk detection overlaps the LLM call
+        return await spec.resolve(0)
+
+    assert asyncio.run(scenario()) == "reply for risk 0"
+    assert calls == [0]
+    stats = speculation.stats()
+    assert stats["counts"]["used"] == 1
+    assert stats["wasted_rate"] == 0.0
+    assert stats["mean_overlap_ms"] > 0
+
+
+def test_mismatch_and_high_risk_are_counted_as_wasted(monkeypatch):
+    _reset(monkeypatch)
+
+    async def scenario():
+        mismatch = SpeculativeReply(_fake_gemini([]), "hello", "en", 0)
+        high = SpeculativeReply(_fake_gemini([]), "hello", "en", 0)
+        high.cancel()
+        return await mismatch.resolve(1)
+
+    assert asyncio.run(scenario()) is None
+    stats = speculation.stats()
+    assert stats["counts"]["discarded_mismatch"] == 1
+    assert stats["counts"]["cancelled_high"] == 1
+    assert stats["wasted_rate"] == 1.0
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.syna_ai.storage import SQLiteStorage
+from app.syna_ai.tools.migrate_to_mongo import iter_batches
+
+
+def test_sqlite_storage_round_trip(syna_db):
+    storage = SQLiteStorage()
+
+    async def scenario():
+        await storage.open()
+        first = await storage.save_chat("u1", "student", "hola", "low", text="hello", is_english=True,
+                                        embedding=[0.5] * 4)
+        await storage.save_chat("u1", "bot", "reply", "low", text="reply", is_english=True)
+        await storage.save_chat("u2", "student", "other user", "high", text="other user", is_english=True)
+        await storage.add_mood("u1", 6)
+        await storage.add_journal("u1", "dear diary")
+        features, _ = await storage.load_context("u1")
+        page = await storage.history_page("chats", "u1", None, 10)
+        journals = await storage.history_page("journals", "u1", None, 10)
+        return first, features, page, journals, await storage.recent_moods("u1"), await storage.risk_distribution("u1")
+
+    first, features, (etag, rows, next_cursor), journals, moods, risks = asyncio.run(scenario())
+
+    assert [entry[1] for entry in features["recent"]] == ["hello", "reply"]
+    assert first in features["embeddings"]
+    assert features["moods"] == [6]
+    assert [r[3] for r in rows] == ["reply", "hola"] and next_cursor is None
+    assert [r[2] for r in journals[1]] == ["dear diary"]
+    assert [m[0] for m in moods] == [6]
+    assert risks == {"low": 2}
+
+
+def test_sqlite_storage_concurrent_moods(syna_db):
+    storage = SQLiteStorage()
+
+    async def scenario():
+        await storage.open()
+        await asyncio.gather(*[storage.add_mood(f"u{i % 4}", i % 10 + 1) for i in range(200)])
+        features, _ = await storage.load_context("u1")
+        return features, await storage.recent_moods("u1", limit=100)
+
+    features, moods = asyncio.run(scenario())
+    assert len(moods) == 50
+    # The writer applies ops in submission order
+    assert features["moods"] == [i % 10 + 1 for i in range(200) if i % 4 == 1][-len(features["moods"]):]
+    with syna_db.get_db_context() as (conn, cursor):
+        assert cursor.execute("SELECT COUNT(*) FROM moods").fetchone()[0] == 200
+        assert cursor.execute(
+            "SELECT SUM(mood_count), SUM(mood_sum) FROM rollup_daily_mood WHERE scope = '*'"
+        ).fetchone() == (200, sum(i % 10 + 1 for i in range(200)))
+
+
+def test_sqlite_storage_crisis_chat_queues_alert(syna_db):
+    asyncio.run(SQLiteStorage().save_chat(
+        "u1", "student", "help", "high", text="help", is_english=True, alert_source="keyword_match"
+    ))
+    with syna_db.get_db_context() as (conn, cursor):
+        assert cursor.execute("SELECT COUNT(*) FROM crisis_alert_deliveries").fetchone()[0] == 4
+
+
+def test_migration_streams_in_id_order_and_resumes(syna_db):
+    with syna_db.get_db_context() as (conn, cursor):
+        cursor.executemany(
+            "INSERT INTO chats (user_id, role, message, risk_level) VALUES (?, ?, ?, ?)",
+            [("u1", "student", f"m{i}", "low") for i in range(5)]
+        )
+        cursor.execute("INSERT INTO chat_embeddings (chat_id, embedding) VALUES (2, x'00')")
+        conn.commit()
+
+        batches = list(iter_batches(conn, "chats", 2))
+        resumed = list(iter_batches(conn, "chats", 2, after=4))
+
+    assert [[d["_id"] for d in batch] for batch in batches] == [[1, 2], [3, 4], [5]]
+    assert batches[0][1]["embedding"] == b"\x00" and batches[0][0]["embedding"] is None
+    assert [d["message"] for batch in resumed for d in batch] == ["m4"]
@@ -0,0 +1,53 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+pytest.importorskip("transformers")
+
+from app.syna_ai.models import temporal_infer  # noqa: E402
+
+
+class _TinyRiskLSTM(torch.nn.Module):
+    """Same layout as RiskLSTM, randomly initialised."""
+
+    def __init__(self):
+        super().__init__()
+        self.lstm = torch.nn.LSTM(temporal_infer.INPUT_DIM, temporal_infer.HIDDEN_DIM, temporal_infer.NUM_LAYERS, batch_first=True)
+        self.fc = torch.nn.Linear(temporal_infer.HIDDEN_DIM, temporal_infer.NUM_CLASSES)
+
+    def forward(self, x):
+        _, (h_n, _) = self.lstm(x)
+        return self.fc(h_n[-1])
+
+
+@pytest.fixture
+def lstm(monkeypatch):
+    torch.manual_seed(0)
+    model = _TinyRiskLSTM().eval()
+    monkeypatch.setattr(temporal_infer, "_temporal_model", model)
+    monkeypatch.setattr(temporal_infer, "_device", torch.device("cpu"))
+    return model
+
+
+def test_one_step_at_a_time_matches_full_sequence(lstm):
+    rng = np.random.default_rng(0)
+    vectors = [rng.standard_normal(temporal_infer.INPUT_DIM).astype(np.float32) for _ in range(5)]
+
+    state = None
+    for vec in vectors:
+        pred, state = temporal_infer.advance_temporal_state([vec], state)
+
+    full_pred, full_state = temporal_infer.advance_temporal_state(vectors)
+
+    assert pred == full_pred
+    assert np.allclose(state[0], full_state[0], atol=1e-6)
+    assert np.allclose(state[1], full_state[1], atol=1e-6)
+
+
+def test_five_step_stream_matches_unpadded_window(lstm):
+    rng = np.random.default_rng(1)
+    vectors = [rng.standard_normal(temporal_infer.INPUT_DIM).astype(np.float32) for _ in range(5)]
+
+    stream_pred, _ = temporal_infer.advance_temporal_state(vectors)
+
+    assert stream_pred == temporal_infer.predict_temporal_risk_from_embeddings(vectors)